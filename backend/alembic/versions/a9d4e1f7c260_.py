@@ -0,0 +1,53 @@
+"""orders stats summary
+
+Revision ID: a9d4e1f7c260
+Revises: f2c8a6d1b347
+Create Date: 2025-06-16 10:21:05.377412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e1f7c260'
+down_revision: Union[str, None] = 'f2c8a6d1b347'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Так же, как service.order_stats.aggregate_orders
+BACKFILL = {
+    'mysql': ("DATE_FORMAT(o.created_date, '%Y-%m-01')", 'DATEDIFF(o.end_date, o.start_date)'),
+    'sqlite': ("strftime('%Y-%m-01', o.created_date)", 'CAST(julianday(o.end_date) - julianday(o.start_date) AS INTEGER)'),
+}
+
+
+def upgrade() -> None:
+    op.create_table('orders_stats',
+    sa.Column('month', sa.DATE(), nullable=False),
+    sa.Column('status', sa.String(length=64), nullable=False),
+    sa.Column('id_city', sa.Integer(), nullable=False),
+    sa.Column('id_category', sa.Integer(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('final_price_sum', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('duration_days_sum', sa.Integer(), nullable=False),
+    sa.Column('duration_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'status', 'id_city', 'id_category')
+    )
+    month, duration = BACKFILL[op.get_bind().dialect.name]
+    has_duration = 'o.start_date IS NOT NULL AND o.end_date IS NOT NULL'
+    op.execute(f'''
+        INSERT INTO orders_stats (month, status, id_city, id_category, orders_count,
+                                  final_price_sum, duration_days_sum, duration_count)
+        SELECT {month}, o.status, p.id_city, p.id_category, COUNT(o.id), COALESCE(SUM(o.final_price), 0),
+               SUM(CASE WHEN {has_duration} THEN {duration} ELSE 0 END),
+               SUM(CASE WHEN {has_duration} THEN 1 ELSE 0 END)
+        FROM orders o JOIN projects p ON p.id = o.id_project
+        GROUP BY {month}, o.status, p.id_city, p.id_category
+    ''')
+
+
+def downgrade() -> None:
+    op.drop_table('orders_stats')
@@ -0,0 +1,30 @@
+"""unique project slug
+
+Revision ID: b3d9e6f2a715
+Revises: e4a7c9b15d38
+Create Date: 2025-06-30 09:41:27.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e6f2a715'
+down_revision: Union[str, None] = 'e4a7c9b15d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Перед миграцией дубликаты projects.slug нужно убрать вручную, иначе уникальный индекс не создастся.
+    # Импорт находит id вставленных проектов по slug, а create/update отвечают 400 на занятый slug.
+    op.create_index('ux_projects_slug', 'projects', ['slug'], unique=True)
+    op.drop_index('ix_projects_slug', table_name='projects')
+
+
+def downgrade() -> None:
+    op.create_index('ix_projects_slug', 'projects', ['slug'])
+    op.drop_index('ux_projects_slug', table_name='projects')
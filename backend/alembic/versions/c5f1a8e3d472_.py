@@ -0,0 +1,38 @@
+"""order events log
+
+Revision ID: c5f1a8e3d472
+Revises: a9d4e1f7c260
+Create Date: 2025-06-18 15:02:44.918263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1a8e3d472'
+down_revision: Union[str, None] = 'a9d4e1f7c260'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('id_order', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=32), nullable=False),
+    sa.Column('from_status', sa.String(length=64), nullable=True),
+    sa.Column('to_status', sa.String(length=64), nullable=True),
+    sa.Column('id_user', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_events_id_order'), 'order_events', ['id_order'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_events_id_order'), table_name='order_events')
+    op.drop_table('order_events')
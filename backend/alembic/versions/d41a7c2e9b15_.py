@@ -0,0 +1,49 @@
+"""lookup indexes
+
+Revision ID: d41a7c2e9b15
+Revises: cb6fdd78341e
+Create Date: 2025-06-02 11:14:08.512937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c2e9b15'
+down_revision: Union[str, None] = 'cb6fdd78341e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Перед миграцией дубликаты users.email нужно убрать вручную, иначе уникальный индекс не создастся.
+    # Индексы по внешним ключам, которые MySQL создает сам, заменяются составными с тем же префиксом.
+    op.create_index('ux_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_projects_slug', 'projects', ['slug'])
+    op.create_index('ix_projects_name', 'projects', ['name'])
+    op.create_index('ix_projects_category_city', 'projects', ['id_category', 'id_city'])
+    op.create_index('ix_projects_city', 'projects', ['id_city'])
+    op.create_index('ix_orders_user_created', 'orders', ['id_user', 'created_date', 'id'])
+    op.create_index('ix_orders_status_created', 'orders', ['status', 'created_date'])
+    op.create_index('ix_orders_created_date', 'orders', ['created_date'])
+    op.create_index('ix_projects_attributes_attribute_value', 'projects_attributes', ['id_attribute', 'value'])
+
+
+def downgrade() -> None:
+    # Внешним ключам нужен индекс с их колонкой в начале: возвращаем те, что MySQL создавал сам
+    op.create_index('id_attribute', 'projects_attributes', ['id_attribute'])
+    op.create_index('id_user', 'orders', ['id_user'])
+    op.create_index('id_city', 'projects', ['id_city'])
+    op.create_index('id_category', 'projects', ['id_category'])
+    op.drop_index('ix_projects_attributes_attribute_value', table_name='projects_attributes')
+    op.drop_index('ix_orders_created_date', table_name='orders')
+    op.drop_index('ix_orders_status_created', table_name='orders')
+    op.drop_index('ix_orders_user_created', table_name='orders')
+    op.drop_index('ix_projects_city', table_name='projects')
+    op.drop_index('ix_projects_category_city', table_name='projects')
+    op.drop_index('ix_projects_name', table_name='projects')
+    op.drop_index('ix_projects_slug', table_name='projects')
+    op.drop_index('ux_users_email', table_name='users')
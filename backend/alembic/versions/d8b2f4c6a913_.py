@@ -0,0 +1,30 @@
+"""order events customer
+
+Revision ID: d8b2f4c6a913
+Revises: c5f1a8e3d472
+Create Date: 2025-06-20 11:37:05.204716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2f4c6a913'
+down_revision: Union[str, None] = 'c5f1a8e3d472'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('order_events', sa.Column('id_customer', sa.Integer(), nullable=True))
+    op.execute('UPDATE order_events SET id_customer = '
+               '(SELECT orders.id_user FROM orders WHERE orders.id = order_events.id_order)')
+    op.create_index('ix_order_events_id_customer_id', 'order_events', ['id_customer', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_events_id_customer_id', table_name='order_events')
+    op.drop_column('order_events', 'id_customer')
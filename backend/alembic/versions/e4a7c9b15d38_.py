@@ -0,0 +1,47 @@
+"""orders archive
+
+Revision ID: e4a7c9b15d38
+Revises: d8b2f4c6a913
+Create Date: 2025-06-23 10:14:52.630187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c9b15d38'
+down_revision: Union[str, None] = 'd8b2f4c6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('id_user', sa.Integer(), nullable=False),
+    sa.Column('id_project', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=255), nullable=False),
+    sa.Column('created_date', sa.DATE(), nullable=False),
+    sa.Column('updated_date', sa.DATE(), nullable=True),
+    sa.Column('start_price', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('final_price', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('payment_date', sa.DATE(), nullable=True),
+    sa.Column('start_date', sa.DATE(), nullable=True),
+    sa.Column('end_date', sa.DATE(), nullable=True),
+    sa.ForeignKeyConstraint(['id_project'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['id_user'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_archive_user_created', 'orders_archive', ['id_user', 'created_date', 'id'], unique=False)
+    op.create_index('ix_orders_archive_status_created', 'orders_archive', ['status', 'created_date'], unique=False)
+    op.create_index('ix_orders_archive_created_date', 'orders_archive', ['created_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_archive_created_date', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_status_created', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_user_created', table_name='orders_archive')
+    op.drop_table('orders_archive')
@@ -0,0 +1,45 @@
+"""numeric attribute values
+
+Revision ID: e7b3f0c4a812
+Revises: d41a7c2e9b15
+Create Date: 2025-06-09 16:42:51.203184
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3f0c4a812'
+down_revision: Union[str, None] = 'd41a7c2e9b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+
+def upgrade() -> None:
+    op.add_column('units', sa.Column('factor', sa.Double(), nullable=False, server_default='1'))
+    op.add_column('projects_attributes', sa.Column('value_number', sa.Double(), nullable=True))
+    op.create_index('ix_projects_attributes_attribute_number', 'projects_attributes', ['id_attribute', 'value_number'])
+
+    # Заполнение value_number для уже сохраненных значений, так же как utils.units.parse_number
+    connection = op.get_bind()
+    rows = connection.execute(sa.text('SELECT id_project, id_attribute, value FROM projects_attributes')).all()
+    updates = []
+    for id_project, id_attribute, value in rows:
+        value = re.sub(r'[\s ]', '', value or '').replace(',', '.')
+        if NUMBER.fullmatch(value):
+            updates.append({'id_project': id_project, 'id_attribute': id_attribute, 'value_number': float(value)})
+    if updates:
+        connection.execute(sa.text('UPDATE projects_attributes SET value_number = :value_number '
+                                   'WHERE id_project = :id_project AND id_attribute = :id_attribute'), updates)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_attributes_attribute_number', table_name='projects_attributes')
+    op.drop_column('projects_attributes', 'value_number')
+    op.drop_column('units', 'factor')
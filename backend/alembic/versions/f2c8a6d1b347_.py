@@ -0,0 +1,35 @@
+"""materialized project documents
+
+Revision ID: f2c8a6d1b347
+Revises: e7b3f0c4a812
+Create Date: 2025-06-12 11:08:37.514920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a6d1b347'
+down_revision: Union[str, None] = 'e7b3f0c4a812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Документы уже существующих проектов собираются при старте приложения
+    # (service.documents.backfill_project_documents)
+    op.create_table('projects_documents',
+    sa.Column('id_project', sa.Integer(), nullable=False),
+    sa.Column('document', sa.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql'), nullable=False),
+    sa.Column('updated_date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_project'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id_project')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('projects_documents')
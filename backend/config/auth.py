@@ -8,4 +8,9 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 EXPIRATION_TIME = timedelta(hours=2)
 UPDATE_EXPIRATION_TIME = timedelta(days=60)
+AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', 60)) # секунды
+AUTH_CACHE_MAX_SIZE = int(os.getenv('AUTH_CACHE_MAX_SIZE', 10000))
+PASSWORD_HASH_ROUNDS = int(os.getenv('PASSWORD_HASH_ROUNDS', 29000))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 64))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
\ No newline at end of file
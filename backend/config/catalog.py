@@ -0,0 +1,10 @@
+import os
+
+# Раз в столько секунд индексы каталога в памяти перестраиваются из БД целиком:
+# так воркеры подхватывают записи, сделанные другими процессами. 0 - не перестраивать
+CATALOG_REFRESH_INTERVAL = float(os.getenv('CATALOG_REFRESH_INTERVAL', 300))
+# Сколько самых частых значений отдавать в одном фасете
+FACET_VALUES_LIMIT = int(os.getenv('FACET_VALUES_LIMIT', 50))
+# Массовый импорт: строк в одной пачке (проверка + одна транзакция) и сколько ошибок строк возвращать
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 500))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))
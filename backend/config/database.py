@@ -1,8 +1,7 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.engine import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
-import os 
+import os
 
 load_dotenv()
 Base = declarative_base()
@@ -12,15 +11,14 @@ PASSWORD_DB = os.getenv('PASSWORD_DB')
 HOST_DB = os.getenv('HOST_DB')
 NAME_DB = os.getenv('NAME_DB')
 
-engine = create_engine(f'mysql+pymysql://{USERNAME_DB}:{PASSWORD_DB}@{HOST_DB}/{NAME_DB}')
+# DATABASE_URL позволяет подменить базу, например sqlite+aiosqlite:// для тестов
+DATABASE_URL = os.getenv('DATABASE_URL') or f'mysql+aiomysql://{USERNAME_DB}:{PASSWORD_DB}@{HOST_DB}/{NAME_DB}'
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_session():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+engine = create_async_engine(DATABASE_URL, pool_pre_ping=True)
 
+# expire_on_commit=False: после commit объекты не должны лениво перечитываться из базы
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
+async def get_session():
+    async with SessionLocal() as db:
+        yield db
@@ -0,0 +1,18 @@
+import os
+
+IMAGES_DIR = 'images'
+VARIANTS_DIR = os.path.join(IMAGES_DIR, 'variants')
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', 20 * 1024 * 1024)) # байт на один файл
+UPLOAD_MAX_REQUEST_SIZE = int(os.getenv('UPLOAD_MAX_REQUEST_SIZE', 200 * 1024 * 1024)) # байт на весь multipart-запрос
+# Запросы с одной картинкой обрываются уже на IMAGE_MAX_SIZE (плюс заголовки multipart),
+# а не на лимите всего запроса: (метод, регулярное выражение пути)
+SINGLE_IMAGE_MAX_REQUEST_SIZE = IMAGE_MAX_SIZE + 64 * 1024
+SINGLE_IMAGE_UPLOADS = (
+    ('PATCH', r'/api/products/\d+'),
+    ('PATCH', r'/api/cities/\d+/image'),
+    ('PATCH', r'/api/categories/\d+/image'),
+)
+IMAGE_CHUNK_SIZE = 1024 * 1024
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 2))
+# Ширина в пикселях для каждого варианта картинки
+IMAGE_VARIANTS = {'thumb': 320, 'card': 800, 'full': 1920}
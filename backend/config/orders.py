@@ -0,0 +1,19 @@
+import os
+
+# Откуда потоки заказов получают события: memory - только из своего процесса (один воркер),
+# database - воркер раз в ORDER_EVENTS_POLL_INTERVAL секунд читает новые строки order_events
+# и раздает своим подписчикам (несколько воркеров без отдельного брокера)
+ORDER_EVENTS_BROKER = os.getenv('ORDER_EVENTS_BROKER', 'memory')
+ORDER_EVENTS_POLL_INTERVAL = float(os.getenv('ORDER_EVENTS_POLL_INTERVAL', 1))
+# Очередь одного подписчика; при переполнении он дочитывает пропущенное из order_events
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv('ORDER_EVENTS_QUEUE_SIZE', 100))
+# Раз в столько секунд в пустой SSE-поток пишется комментарий, чтобы прокси не закрыли соединение
+ORDER_EVENTS_KEEPALIVE = float(os.getenv('ORDER_EVENTS_KEEPALIVE', 15))
+# Сколько событий читается из базы за раз при возобновлении по Last-Event-ID
+ORDER_EVENTS_BACKLOG_BATCH = int(os.getenv('ORDER_EVENTS_BACKLOG_BATCH', 500))
+# Сколько заказов можно перевести в другой статус одним запросом
+ORDER_BULK_MAX_IDS = int(os.getenv('ORDER_BULK_MAX_IDS', 1000))
+# Архивация: завершенные и отмененные заказы, не менявшиеся столько дней, переносятся в orders_archive
+# пачками по ORDER_ARCHIVE_BATCH_SIZE, каждая в своей транзакции (python -m scripts.archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDER_ARCHIVE_AFTER_DAYS', 180))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv('ORDER_ARCHIVE_BATCH_SIZE', 1000))
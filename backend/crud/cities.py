@@ -1,4 +1,4 @@
-from utils.abstract_repository import IREpository
+from utils.abstract_repository import AsyncIREpository
 
-class CityRepository(IREpository):
+class CityRepository(AsyncIREpository):
     ...
\ No newline at end of file
@@ -1,4 +1,63 @@
-from utils.abstract_repository import IREpository
+from datetime import date
+from sqlalchemy import select
+from utils.abstract_repository import AsyncIREpository, apply_keyset, split_page
+from utils.enums import OrderStatus
+from utils.order_status import FINAL_STATUSES, archive_cutoff
+from utils.pagination import PageParams
 
-class OrderRepository(IREpository):
-    ...
\ No newline at end of file
+# Фильтры-даты: точное значение или нижняя граница. Все даты архивного заказа раньше archive_cutoff:
+# archive_orders переносит только такие (service.order_archive.archivable)
+ORDER_DATE_FILTERS = ('created_date', 'updated_date', 'payment_date', 'start_date', 'end_date', 'created_from')
+
+
+def _as_date(value) -> date | None:
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class OrderRepository(AsyncIREpository):
+    """С archive_model заказы лежат в двух таблицах: orders и orders_archive.
+
+    Архив читается, только когда под фильтры могут попасть архивные заказы, так
+    что обычные запросы идут по маленькой горячей таблице и ее индексам.
+    """
+
+    def __init__(self, model, session, archive_model=None):
+        super().__init__(model, session)
+        self.archive_model = archive_model
+
+    def needs_archive(self, **filter) -> bool:
+        """Статус COMPLETED/CANCELLED или дата раньше archive_cutoff - да; активный статус
+        или дата не раньше отсечки - нет: такие заказы в архив не попадают."""
+        if self.archive_model is None:
+            return False
+        status = filter.get('status')
+        if status is not None and OrderStatus(status) not in FINAL_STATUSES:
+            return False
+        cutoff = archive_cutoff()
+        dates = [_as_date(filter.get(key)) for key in ORDER_DATE_FILTERS if filter.get(key) is not None]
+        if any(value is not None and value >= cutoff for value in dates):
+            return False
+        created_to = _as_date(filter.get('created_to'))
+        return (status is not None or any(value is not None for value in dates)
+                or (created_to is not None and created_to < cutoff))
+
+    def select_archive_filter_by(self, **filters):
+        statement = select(self.archive_model)
+        for key, value in filters.items():
+            statement = statement.filter(getattr(self.archive_model, key) == value)
+        return statement
+
+    async def paginate_with_archive(self, statement, archive_statement, page: PageParams):
+        """Keyset-страница из обеих таблиц: в каждой берется своя страница по тому же ключу, затем они сливаются."""
+        items = await self.fetch_all(apply_keyset(statement, self.model, page))
+        items += await self.fetch_all(apply_keyset(archive_statement, self.archive_model, page))
+        if page.sort == 'id':
+            items.sort(key=lambda item: item.id)
+        else:
+            items.sort(key=lambda item: (getattr(item, page.sort), item.id))
+        return split_page(items[:page.limit + 1], page)
@@ -1,4 +1,4 @@
-from utils.abstract_repository import IREpository
+from utils.abstract_repository import AsyncIREpository
 
-class UserRepository(IREpository):
+class UserRepository(AsyncIREpository):
     ...
\ No newline at end of file
@@ -1,64 +1,77 @@
-from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
+from starlette.requests import HTTPConnection
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import *
 from crud import *
 from service.projects import ProjectService
 from service.orders import OrderService
 from service.cities import CityService
-from config.database import get_session
+from config.database import get_session, SessionLocal
 from config.auth import oauth2_scheme
 from utils.enums import Roles, AuthStatus
 from service.auth import AuthService
 from service.users import UserService
+from schemas.users import CurrentUser
 
 
 # User and Auth
-def get_user_repository(db: Session = Depends(get_session)):
+def get_user_repository(db: AsyncSession = Depends(get_session)):
     return UserRepository(model=User, session=db)
 
 def get_auth_service(user_repository: UserRepository = Depends(get_user_repository)) -> AuthService:
     return AuthService(user_repository=user_repository)
 
-def get_current_user(token: str=Depends(oauth2_scheme), user_repository: UserRepository = Depends(get_user_repository)) -> User:
+async def get_current_user(token: str=Depends(oauth2_scheme), user_repository: UserRepository = Depends(get_user_repository)) -> CurrentUser:
     service = AuthService(user_repository=user_repository)
-    return service.get_user_by_token(token)
+    return await service.get_user_by_token(token)
 
-def get_current_admin(token: str=Depends(oauth2_scheme), user_repository: UserRepository = Depends(get_user_repository)) -> User:
+async def get_current_admin(token: str=Depends(oauth2_scheme), user_repository: UserRepository = Depends(get_user_repository)) -> CurrentUser:
     service = AuthService(user_repository=user_repository)
-    user = service.get_user_by_token(token)
+    user = await service.get_user_by_token(token)
     if user.role != Roles.ADMIN.value:
         raise HTTPException(status_code=403, detail={'status': AuthStatus.FORBIDDEN.value})
     return user
 
+async def get_stream_user(connection: HTTPConnection, access_token: str | None = Query(None)) -> CurrentUser:
+    """Пользователь для долгих соединений (SSE, WebSocket).
+
+    Токен - из заголовка Authorization или ?access_token= (EventSource и браузерный
+    WebSocket не умеют заголовки). Пользователь читается в своей короткой сессии:
+    открытый поток не должен держать соединение с БД.
+    """
+    scheme, _, token = connection.headers.get('authorization', '').partition(' ')
+    token = token if scheme.lower() == 'bearer' and token else access_token
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail={'status': AuthStatus.INVALID_TOKEN.value})
+        async with SessionLocal() as db:
+            return await AuthService(user_repository=UserRepository(model=User, session=db)).get_user_by_token(token)
+    except HTTPException as e:
+        if connection.scope['type'] == 'websocket':
+            raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail['status'])
+        raise
+
 def get_user_service(user_repository: UserRepository = Depends(get_user_repository)) -> UserService:
     return UserService(user_repository=user_repository)
 
 
-# Order
-def get_order_repository(db: Session = Depends(get_session)):
-    return OrderRepository(model=Order, session=db)
-
-def get_order_service(order_repository: OrderRepository = Depends(get_order_repository)) -> OrderService:
-    return OrderService(order_repository=order_repository)
-
-
 # Project
-def get_project_repository(db: Session = Depends(get_session)):
+def get_project_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=Project, session=db)
 
-def get_category_repository(db: Session = Depends(get_session)):
+def get_category_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=Category, session=db)
 
-def get_unit_repository(db: Session = Depends(get_session)):
+def get_unit_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=Unit, session=db)
 
-def get_attribute_repository(db: Session = Depends(get_session)):
+def get_attribute_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=Attribute, session=db)
 
-def get_project_attribute_repository(db: Session = Depends(get_session)):
+def get_project_attribute_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=ProjectAttribute, session=db)
 
-def get_project_image_repository(db: Session = Depends(get_session)):
+def get_project_image_repository(db: AsyncSession = Depends(get_session)):
     return ProjectRepository(model=ProjectImage, session=db)
 
 def get_project_service(project_repository: ProjectRepository = Depends(get_project_repository),
@@ -75,8 +88,23 @@ def get_project_service(project_repository: ProjectRepository = Depends(get_proj
                           project_image_repository=project_image_repository)
 
 
+# Order
+def get_order_repository(db: AsyncSession = Depends(get_session)):
+    return OrderRepository(model=Order, session=db, archive_model=OrderArchive)
+
+def get_order_event_repository(db: AsyncSession = Depends(get_session)):
+    return OrderRepository(model=OrderEvent, session=db)
+
+def get_order_service(order_repository: OrderRepository = Depends(get_order_repository),
+                      order_event_repository: OrderRepository = Depends(get_order_event_repository),
+                      project_service: ProjectService = Depends(get_project_service)) -> OrderService:
+    return OrderService(order_repository=order_repository,
+                        order_event_repository=order_event_repository,
+                        project_service=project_service)
+
+
 # City
-def get_city_repository(db: Session = Depends(get_session)):
+def get_city_repository(db: AsyncSession = Depends(get_session)):
     return CityRepository(model=City, session=db)
 
 def get_city_service(city_repository: CityRepository = Depends(get_city_repository)) -> CityService:
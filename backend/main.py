@@ -1,8 +1,38 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 from routers import routers
 from starlette.middleware.cors import CORSMiddleware
-app = FastAPI(title="Construction-Company API")
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.image import get_image_meta, image_cache_headers, is_not_modified
+from utils.enums import Status
+from utils.middleware import UploadLimitMiddleware
+from config.images import (UPLOAD_MAX_REQUEST_SIZE, SINGLE_IMAGE_MAX_REQUEST_SIZE, SINGLE_IMAGE_UPLOADS,
+                           IMAGE_VARIANTS)
+from utils.image_variants import get_variant, pick_variant, pick_extension
+from config.catalog import CATALOG_REFRESH_INTERVAL
+from config.database import SessionLocal
+from service.catalog import rebuild_catalog_indexes, refresh_catalog_indexes
+from service.order_events import order_events_broker
+from service.documents import backfill_project_documents
+from service.order_archive import reserve_archived_ids
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with SessionLocal() as session:
+        await rebuild_catalog_indexes(session)
+        await backfill_project_documents(session)
+        await reserve_archived_ids(session)
+    refresher = asyncio.create_task(refresh_catalog_indexes()) if CATALOG_REFRESH_INTERVAL else None
+    yield
+    if refresher:
+        refresher.cancel()
+    await order_events_broker.close()
+
+app = FastAPI(title="Construction-Company API", lifespan=lifespan)
 
 app.include_router(routers)
 
@@ -12,8 +42,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(UploadLimitMiddleware, max_size=UPLOAD_MAX_REQUEST_SIZE,
+                   route_limits=[(method, path, SINGLE_IMAGE_MAX_REQUEST_SIZE) for method, path in SINGLE_IMAGE_UPLOADS])
 
 @app.get('/{image_name}')
-async def get_image(image_name: str):
-    return FileResponse(f'./images/{image_name}')
\ No newline at end of file
+async def get_image(image_name: str, request: Request,
+                    w: int | None = Query(None, ge=1, le=4096),
+                    variant: Literal[tuple(IMAGE_VARIANTS)] | None = Query(None)):
+    is_variant = False
+    if w or variant:
+        # Без Pillow или для не-картинки get_variant вернет None и отдается оригинал
+        variant_file = await get_variant(image_name, variant or pick_variant(w),
+                                         pick_extension(request.headers.get('accept', '')))
+        if variant_file:
+            image_name, is_variant = os.path.join('variants', variant_file), True
+    meta = await get_image_meta(image_name)
+    if not meta:
+        raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
+    headers = image_cache_headers(image_name, meta)
+    if is_variant:
+        headers['vary'] = 'Accept'
+    if is_not_modified(request.headers, meta):
+        return Response(status_code=304, headers=headers)
+    # Range и If-Range обрабатывает сам FileResponse
+    return FileResponse(meta.path, stat_result=meta.stat_result, headers=headers)
\ No newline at end of file
@@ -1,4 +1,4 @@
 from .users import User
-from .orders import Order
+from .orders import Order, OrderArchive, OrderStats, OrderEvent
 from .projects import *
 from .cities import City
\ No newline at end of file
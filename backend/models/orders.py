@@ -1,12 +1,10 @@
 from config.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, DECIMAL, ForeignKey, DATE
-from datetime import datetime
+from sqlalchemy import Integer, BigInteger, String, Text, DECIMAL, ForeignKey, DATE, DateTime, Index
+from datetime import date, datetime
 
-class Order(Base):
-    __tablename__ = 'orders'
-
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+class OrderColumns:
+    """Колонки заказа, общие для orders и orders_archive."""
     id_user: Mapped[int] = mapped_column(ForeignKey("users.id"))
     id_project: Mapped[int] = mapped_column(ForeignKey("projects.id"))
     status: Mapped[str] = mapped_column(String(255))
@@ -18,5 +16,72 @@ class Order(Base):
     start_date: Mapped[datetime] = mapped_column(DATE, nullable=True)
     end_date: Mapped[datetime] = mapped_column(DATE, nullable=True)
 
+
+class Order(OrderColumns, Base):
+    __tablename__ = 'orders'
+    __table_args__ = (
+        Index('ix_orders_user_created', 'id_user', 'created_date', 'id'),
+        Index('ix_orders_status_created', 'status', 'created_date'),
+        Index('ix_orders_created_date', 'created_date'),
+        # id не переиспользуются: удаленный или архивный id не достанется новому заказу
+        {'sqlite_autoincrement': True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
     user: Mapped["User"] = relationship("User", back_populates="order")
     project: Mapped["Project"] = relationship("Project", back_populates="order")
+
+
+class OrderArchive(OrderColumns, Base):
+    """Завершенные и отмененные заказы старше ORDER_ARCHIVE_AFTER_DAYS (service.order_archive).
+
+    id сохраняется из orders, поэтому ссылки и order_events остаются верными;
+    счетчик id orders держится выше архивных (reserve_archived_ids).
+    """
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        Index('ix_orders_archive_user_created', 'id_user', 'created_date', 'id'),
+        Index('ix_orders_archive_status_created', 'status', 'created_date'),
+        Index('ix_orders_archive_created_date', 'created_date'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    user: Mapped["User"] = relationship("User")
+    project: Mapped["Project"] = relationship("Project")
+
+
+class OrderStats(Base):
+    """Сводка по заказам, поддерживается инкрементально (service.order_stats)."""
+    __tablename__ = 'orders_stats'
+
+    month: Mapped[date] = mapped_column(DATE, primary_key=True) # первое число месяца created_date
+    status: Mapped[str] = mapped_column(String(64), primary_key=True)
+    id_city: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id_category: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, default=0)
+    final_price_sum: Mapped[DECIMAL] = mapped_column(DECIMAL(14, 2), default=0)
+    duration_days_sum: Mapped[int] = mapped_column(Integer, default=0) # end_date - start_date
+    duration_count: Mapped[int] = mapped_column(Integer, default=0) # заказов, у которых есть обе даты
+
+
+class OrderEvent(Base):
+    """Журнал изменений заказов: строки только добавляются, читаются по возрастанию id.
+
+    id_order без внешнего ключа, чтобы события оставались после архивации заказа.
+    """
+    __tablename__ = 'order_events'
+    __table_args__ = (
+        Index('ix_order_events_id_customer_id', 'id_customer', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    id_order: Mapped[int] = mapped_column(Integer, index=True)
+    event_type: Mapped[str] = mapped_column(String(32)) # created, status_changed, updated, deleted
+    from_status: Mapped[str] = mapped_column(String(64), nullable=True)
+    to_status: Mapped[str] = mapped_column(String(64), nullable=True)
+    id_user: Mapped[int] = mapped_column(Integer, nullable=True) # кто сделал изменение
+    id_customer: Mapped[int] = mapped_column(Integer, nullable=True) # владелец заказа: по нему раздаются события
+    payload: Mapped[str] = mapped_column(Text, nullable=True) # JSON: {поле: [было, стало]}
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
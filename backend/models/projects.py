@@ -1,6 +1,7 @@
 from config.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Text, DECIMAL, ForeignKey, Boolean, DATE
+from sqlalchemy import Integer, String, Text, DECIMAL, ForeignKey, Boolean, DATE, DateTime, Index, Double
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
 from datetime import datetime
 
 class Category(Base):
@@ -15,6 +16,12 @@ class Category(Base):
 
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (
+        Index('ux_projects_slug', 'slug', unique=True),
+        Index('ix_projects_name', 'name'),
+        Index('ix_projects_category_city', 'id_category', 'id_city'),
+        Index('ix_projects_city', 'id_city'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255))
@@ -41,12 +48,22 @@ class ProjectImage(Base):
     project: Mapped["Project"] = relationship("Project", back_populates="project_image")
 
 
+class ProjectDocument(Base):
+    """Готовый JSON ProjectResponse, пересобирается при записи (service.documents)."""
+    __tablename__ = 'projects_documents'
+
+    id_project: Mapped[int] = mapped_column(ForeignKey("projects.id"), primary_key=True)
+    document: Mapped[str] = mapped_column(Text().with_variant(MEDIUMTEXT(), 'mysql'))
+    updated_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
 class Unit(Base):
     __tablename__ = "units"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255))
     full_name: Mapped[str] = mapped_column(String(255), nullable=True)
+    factor: Mapped[float] = mapped_column(Double, default=1) # множитель к базовой единице: га -> м² = 10000
 
     project_attribute: Mapped[list["ProjectAttribute"]] = relationship("ProjectAttribute", back_populates="unit")
 
@@ -61,10 +78,15 @@ class Attribute(Base):
 
 class ProjectAttribute(Base):
     __tablename__ = "projects_attributes"
+    __table_args__ = (
+        Index('ix_projects_attributes_attribute_value', 'id_attribute', 'value'),
+        Index('ix_projects_attributes_attribute_number', 'id_attribute', 'value_number'),
+    )
 
     id_project: Mapped[int] = mapped_column(ForeignKey("projects.id"), primary_key=True)
     id_attribute: Mapped[int] = mapped_column(ForeignKey("attributes.id"), primary_key=True)
     value: Mapped[str] = mapped_column(String(255)) # Строка, если надо конвертируй в нужный тип
+    value_number: Mapped[float] = mapped_column(Double, nullable=True) # value в базовой единице, если это число
     id_unit: Mapped[int] = mapped_column(ForeignKey("units.id"), nullable=True)
 
     unit: Mapped["Unit"] = relationship("Unit", back_populates="project_attribute")
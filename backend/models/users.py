@@ -1,9 +1,12 @@
 from config.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Index
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ux_users_email', 'email', unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255))
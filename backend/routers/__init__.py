@@ -7,6 +7,9 @@ from routers.projects import router as product_router
 from routers.cities import router as cities_router
 from routers.units import router as unit_router
 from routers.orders import router as order_router
+from routers.metrics import router as metrics_router
+from routers.catalog import router as catalog_router
+from routers.suggest import router as suggest_router
 
 routers = APIRouter(prefix='/api')
 routers.include_router(auth_router, prefix='/auth', tags=['auth'])
@@ -16,4 +19,7 @@ routers.include_router(category_router, prefix='/categories', tags=['categories'
 routers.include_router(product_router, prefix='/products', tags=['products'])
 routers.include_router(cities_router, prefix='/cities', tags=['cities'])
 routers.include_router(unit_router, prefix='/units', tags=['units'])
-routers.include_router(order_router, prefix='/orders', tags=['orders'])
\ No newline at end of file
+routers.include_router(order_router, prefix='/orders', tags=['orders'])
+routers.include_router(metrics_router, prefix='/metrics', tags=['metrics'])
+routers.include_router(catalog_router, prefix='/catalog', tags=['catalog'])
+routers.include_router(suggest_router, prefix='/suggest', tags=['suggest'])
\ No newline at end of file
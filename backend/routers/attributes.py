@@ -1,49 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, Response
 from dependencies import *
 from schemas.projects import AttributeResponse, CreateAttribute, UpdateAttribute
 from utils.enums import Status
+from utils.pagination import PageParams, page_params, set_next_cursor
+from utils.reference import check_reference_etag
 
 router = APIRouter()
 
 @router.post('/', status_code=201)
 async def create_attribute(data: CreateAttribute,
                             project_service: ProjectService = Depends(get_project_service)):
-    new_attribute = project_service.create_attribute(data)
+    new_attribute = await project_service.create_attribute(data)
     if new_attribute == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
 
 @router.get('/', status_code=200, response_model=list[AttributeResponse])
-async def get_all_attributes(name: str | None = Query(None), 
+async def get_all_attributes(request: Request, response: Response,
+                             name: str | None = Query(None),
+                             page: PageParams = Depends(page_params('id', 'name')),
                              project_service: ProjectService = Depends(get_project_service)):
-    filter = {k: v for k, v in locals().items() if v is not None and k != 'project_service'}
-    attributes = project_service.get_all_attributes_filter_by(**filter)
+    filter = {k: v for k, v in locals().items() if v is not None and k not in {'project_service', 'page', 'request', 'response'}}
+    not_modified = check_reference_etag(request, response)
+    if not_modified:
+        return not_modified
+    attributes, next_cursor = await project_service.get_all_attributes_filter_by(page, **filter)
     if not attributes:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = [AttributeResponse(**attribute.__dict__) for attribute in attributes]
-    return response
+    set_next_cursor(response, next_cursor)
+    return attributes
 
 @router.get('/{id}', status_code=200, response_model=AttributeResponse)
-async def get_attribute(id: int, project_service: ProjectService = Depends(get_project_service)):
-    attribute = project_service.get_one_attribute_filter_by(id=id)
+async def get_attribute(id: int, request: Request, response: Response,
+                        project_service: ProjectService = Depends(get_project_service)):
+    attribute = await project_service.get_attribute(id)
     if not attribute:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = AttributeResponse(**attribute.__dict__)
-    return response
+    not_modified = check_reference_etag(request, response, 'attributes', attribute)
+    if not_modified:
+        return not_modified
+    return attribute
 
 @router.put('/{id}', status_code=200)
 async def update_attribute(id: int, data: UpdateAttribute,
                           project_service: ProjectService = Depends(get_project_service)):
-    attribute = project_service.get_one_attribute_filter_by(id=id)
+    attribute = await project_service.get_one_attribute_filter_by(id=id)
     if not attribute:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    update_attribute = project_service.update_attribute(id, data)
+    update_attribute = await project_service.update_attribute(id, data)
     return update_attribute
 
 @router.delete('/{id}', status_code=200)
 async def delete_attribute(id: int, project_service: ProjectService = Depends(get_project_service)):
-    attribute = project_service.get_one_attribute_filter_by(id=id)
+    attribute = await project_service.get_one_attribute_filter_by(id=id)
     if not attribute:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    project_service.delete_attribute(id)
+    await project_service.delete_attribute(id)
     return {'status': Status.SUCCESS.value}
@@ -12,17 +12,17 @@ router = APIRouter()
 async def signup(new_user: UserCreate, auth_service: AuthService = Depends(get_auth_service)):
     user_email = new_user.email
     user_password = new_user.password
-    user = auth_service.create_user(new_user)
+    user = await auth_service.create_user(new_user)
     if not user:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
-    token, update_token = auth_service.login(UserLogin(email=user_email, password=user_password))
+    token, update_token = await auth_service.login(UserLogin(email=user_email, password=user_password))
     response = JSONResponse(content=token)
     response.set_cookie(key='update_token', value=update_token, httponly=True, max_age=60*60*24*7)
     return response
 
 @router.post('/login', status_code=200)
 async def login(email: EmailStr = Form(...), password = Form(...), auth_service: AuthService = Depends(get_auth_service)):
-    token, update_token = auth_service.login(UserLogin(email=email, password=password))
+    token, update_token = await auth_service.login(UserLogin(email=email, password=password))
     response = JSONResponse(content=token)
     response.set_cookie(key='update_token', value=update_token, httponly=True, max_age=60*60*24*7)
     return response
@@ -32,7 +32,7 @@ async def refresh(request: Request, auth_service: AuthService = Depends(get_auth
     token = request.cookies.get('update_token')
     if not token:
         raise HTTPException(status_code=401, detail={'status': Status.UNAUTHORIZED.value})
-    new_token, update_token = auth_service.refresh_token(token)
+    new_token, update_token = await auth_service.refresh_token(token)
     response = JSONResponse(content=new_token)
     response.set_cookie(key='update_token', value=update_token, httponly=True, max_age=timedelta(days=60).total_seconds())
     return response
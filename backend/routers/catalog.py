@@ -0,0 +1,52 @@
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from dependencies import *
+from schemas.projects import *
+from utils.enums import Status
+from utils.pagination import PageParams, page_params, set_next_cursor
+from service.projects import ProjectService
+from service.documents import build_project_response
+
+router = APIRouter()
+
+def parse_attribute_filters(attribute: list[str]) -> dict[int, list[str]]:
+    """attribute=3:2&attribute=3:3&attribute=5:кирпич -> {3: ['2', '3'], 5: ['кирпич']}"""
+    attributes = defaultdict(list)
+    for item in attribute:
+        id_attribute, separator, value = item.partition(':')
+        if not separator or not id_attribute.isdigit():
+            raise HTTPException(status_code=400, detail={'status': Status.INVALID_FILTER.value})
+        attributes[int(id_attribute)].append(value)
+    return dict(attributes)
+
+@router.get('/facets', status_code=200)
+async def get_catalog_facets(response: Response,
+                             id_category: int | None = Query(None),
+                             id_city: int | None = Query(None),
+                             is_done: bool | None = Query(None),
+                             attribute: list[str] = Query([], description='id_attribute:value, можно повторять'),
+                             page: PageParams = Depends(page_params('id')),
+                             project_service: ProjectService = Depends(get_project_service)):
+    filter = {k: v for k, v in locals().items() if v is not None
+              and k not in {'project_service', 'attribute', 'page', 'response'}}
+    projects, next_cursor, total, facets = await project_service.search_catalog(
+        page, parse_attribute_filters(attribute), **filter)
+    set_next_cursor(response, next_cursor)
+    return CatalogResponse(
+        total=total,
+        items=[build_project_response(project) for project in projects],
+        facets=[FacetResponse(attribute=attr,
+                              values=[FacetValueResponse(value=value, count=count) for value, count in values])
+                for attr, values in facets])
+
+@router.get('/search', status_code=200)
+async def search_projects(response: Response,
+                          q: str = Query(..., min_length=1, max_length=200),
+                          page: PageParams = Depends(page_params('rank')),
+                          project_service: ProjectService = Depends(get_project_service)):
+    results, next_cursor, total = await project_service.search_projects(page, q)
+    set_next_cursor(response, next_cursor)
+    return SearchResponse(
+        total=total,
+        items=[SearchHitResponse(project=build_project_response(project), score=round(score, 4), highlights=highlights)
+               for project, score, highlights in results])
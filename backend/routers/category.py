@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, Request, BackgroundTasks, Depends, HTTPException, Query, Response, File, UploadFile
 from dependencies import *
 from schemas.projects import CategoryResponse, CreateCategory, UpdateCategory
 from utils.enums import Status
+from utils.pagination import PageParams, page_params, set_next_cursor
+from utils.reference import check_reference_etag
+from utils.image_variants import generate_variants
 from utils.image import save_image
 
 router = APIRouter()
@@ -9,52 +12,61 @@ router = APIRouter()
 @router.post('/', status_code=201)
 async def create_category(data: CreateCategory,
                             project_service: ProjectService = Depends(get_project_service)):
-    new_category = project_service.create_category(data)
+    new_category = await project_service.create_category(data)
     if new_category == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
 
 @router.get('/', status_code=200, response_model=list[CategoryResponse])
-async def get_all_categories(name: str | None = Query(None), 
+async def get_all_categories(request: Request, response: Response,
+                             name: str | None = Query(None),
+                             page: PageParams = Depends(page_params('id', 'name')),
                              project_service: ProjectService = Depends(get_project_service)):
-    filter = {k: v for k, v in locals().items() if v is not None and k != 'project_service'}
-    categories = project_service.get_all_categories_filter_by(**filter)
+    filter = {k: v for k, v in locals().items() if v is not None and k not in {'project_service', 'page', 'request', 'response'}}
+    not_modified = check_reference_etag(request, response)
+    if not_modified:
+        return not_modified
+    categories, next_cursor = await project_service.get_all_categories_filter_by(page, **filter)
     if not categories:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = [CategoryResponse(**category.__dict__) for category in categories]
-    return response
+    set_next_cursor(response, next_cursor)
+    return categories
 
 @router.get('/{id}', status_code=200, response_model=CategoryResponse)
-async def get_category(id: int, project_service: ProjectService = Depends(get_project_service)):
-    category = project_service.get_one_category_filter_by(id=id)
+async def get_category(id: int, request: Request, response: Response,
+                       project_service: ProjectService = Depends(get_project_service)):
+    category = await project_service.get_category(id)
     if not category:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = CategoryResponse(**category.__dict__)
-    return response
+    not_modified = check_reference_etag(request, response, 'categories', category)
+    if not_modified:
+        return not_modified
+    return category
 
 @router.put('/{id}', status_code=200)
 async def update_category(id: int, data: UpdateCategory,
                           project_service: ProjectService = Depends(get_project_service)):
-    category = project_service.get_one_category_filter_by(id=id)
+    category = await project_service.get_one_category_filter_by(id=id)
     if not category:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    update_category = project_service.update_category(id, data)
+    update_category = await project_service.update_category(id, data)
     return {'status': Status.SUCCESS.value, 'category': update_category}
 
 @router.delete('/{id}', status_code=200)
 async def delete_category(id: int, project_service: ProjectService = Depends(get_project_service)):
-    category = project_service.get_one_category_filter_by(id=id)
+    category = await project_service.get_one_category_filter_by(id=id)
     if not category:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    project_service.delete_category(id)
+    await project_service.delete_category(id)
     return {'status': Status.SUCCESS.value}
 
 @router.patch('/{id}/image', status_code=200)
-async def update_category_image(id: int, image: UploadFile = File(...),
+async def update_category_image(id: int, background_tasks: BackgroundTasks, image: UploadFile = File(...),
                                 project_service: ProjectService = Depends(get_project_service)):
-    category = project_service.get_one_category_filter_by(id=id)
+    category = await project_service.get_one_category_filter_by(id=id)
     if not category:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    upd_category = project_service.update_category(id, UpdateCategory(image=image.filename))
-    image_name = save_image(image)
+    image_name = await save_image(image)
+    background_tasks.add_task(generate_variants, image_name)
+    upd_category = await project_service.update_category(id, UpdateCategory(image=image_name))
     return {'status': Status.SUCCESS.value, 'image': image_name}
\ No newline at end of file
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, Request, BackgroundTasks, Depends, HTTPException, Query, Response, File, UploadFile
 from dependencies import *
 from schemas.cities import CityResponse, CreateCity, UpdateCity
 from utils.enums import Status
+from utils.pagination import PageParams, page_params, set_next_cursor
+from utils.reference import check_reference_etag
+from utils.image_variants import generate_variants
 from utils.image import save_image
 
 router = APIRouter()
@@ -9,52 +12,61 @@ router = APIRouter()
 @router.post('/', status_code=201)
 async def create_city(data: CreateCity,
                         city_service: CityService = Depends(get_city_service)):
-    new_city = city_service.create_city(data)
+    new_city = await city_service.create_city(data)
     if new_city == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
 
 @router.get('/', status_code=200, response_model=list[CityResponse])
-async def get_all_cities(name: str | None = Query(None), 
-                        city_service: CityService = Depends(get_city_service)):
-    filter = {k: v for k, v in locals().items() if v is not None and k != 'city_service'}
-    cities = city_service.get_all_cities_filter_by(**filter)
+async def get_all_cities(request: Request, response: Response,
+                         name: str | None = Query(None),
+                         page: PageParams = Depends(page_params('id', 'name')),
+                         city_service: CityService = Depends(get_city_service)):
+    filter = {k: v for k, v in locals().items() if v is not None and k not in {'city_service', 'page', 'request', 'response'}}
+    not_modified = check_reference_etag(request, response)
+    if not_modified:
+        return not_modified
+    cities, next_cursor = await city_service.get_all_cities_filter_by(page, **filter)
     if not cities:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = [CityResponse(**city.__dict__) for city in cities]
-    return response
+    set_next_cursor(response, next_cursor)
+    return cities
 
 @router.get('/{id}', status_code=200, response_model=CityResponse)
-async def get_city(id: int, city_service: CityService = Depends(get_city_service)):
-    city = city_service.get_one_city_filter_by(id=id)
+async def get_city(id: int, request: Request, response: Response,
+                   city_service: CityService = Depends(get_city_service)):
+    city = await city_service.get_city(id)
     if not city:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = CityResponse(**city.__dict__)
-    return response
+    not_modified = check_reference_etag(request, response, 'cities', city)
+    if not_modified:
+        return not_modified
+    return city
 
 @router.put('/{id}', status_code=200)
 async def update_city(id: int, data: UpdateCity,
                           city_service: CityService = Depends(get_city_service)):
-    city = city_service.get_one_city_filter_by(id=id)
+    city = await city_service.get_one_city_filter_by(id=id)
     if not city:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    update_city = city_service.update_city(id, data)
+    update_city = await city_service.update_city(id, data)
     return {'status': Status.SUCCESS.value, 'city': update_city}
 
 @router.delete('/{id}', status_code=200)
 async def delete_city(id: int, city_service: CityService = Depends(get_city_service)):
-    city = city_service.get_one_city_filter_by(id=id)
+    city = await city_service.get_one_city_filter_by(id=id)
     if not city:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    city_service.delete_city(id)
+    await city_service.delete_city(id)
     return {'status': Status.SUCCESS.value}
 
 @router.patch('/{id}/image', status_code=200)
-async def update_city_image(id: int, image: UploadFile = File(...),
+async def update_city_image(id: int, background_tasks: BackgroundTasks, image: UploadFile = File(...),
                                 city_service: CityService = Depends(get_city_service)):
-    city = city_service.get_one_city_filter_by(id=id)
+    city = await city_service.get_one_city_filter_by(id=id)
     if not city:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    upd_city = city_service.update_city(id, UpdateCity(image=image.filename))
-    image_name = save_image(image)
+    image_name = await save_image(image)
+    background_tasks.add_task(generate_variants, image_name)
+    upd_city = await city_service.update_city(id, UpdateCity(image=image_name))
     return {'status': Status.SUCCESS.value, 'image': image_name}
\ No newline at end of file
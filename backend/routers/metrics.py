@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from dependencies import get_current_admin
+from service.auth import auth_cache
+from utils.passwords import password_hasher
+from utils.image import image_meta_cache
+from utils.facets import facet_index
+from utils.search import search_index
+from utils.suggest import suggest_index
+from utils.reference import reference_data
+
+router = APIRouter()
+
+@router.get('/', status_code=200)
+async def get_metrics(admin = Depends(get_current_admin)):
+    return {
+        'auth_cache': auth_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'image_meta_cache': image_meta_cache.stats(),
+        'facet_index': facet_index.stats(),
+        'search_index': search_index.stats(),
+        'suggest_index': suggest_index.stats(),
+        'reference_data': reference_data.stats()
+    }
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, WebSocket
 from dependencies import *
 from schemas.orders import *
 from schemas.users import UserResponse
 from utils.enums import OrderStatus, Status, Roles
-from datetime import datetime
+from utils.pagination import PageParams, page_params, set_next_cursor
+from datetime import date
+from typing import Literal
+from fastapi.responses import StreamingResponse
 from service.orders import OrderService
-from schemas.projects import UpdateProject
+from service.order_events import order_event_stream
+from config.orders import ORDER_EVENTS_KEEPALIVE
 
 router = APIRouter()
 
@@ -16,14 +22,23 @@ async def create_order(data: CreateOrder,
     data_dict = data.model_dump()
     data_dict['id_user'] = user.id
     data_dict['status'] = OrderStatus.PENDING.value
-    data_dict['created_date'] = datetime.now().strftime('%Y-%m-%d')
-    new_order = order_service.create_order(data_dict)
+    data_dict['created_date'] = date.today()
+    new_order = await order_service.create_order(data_dict)
     if new_order == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return {'status': Status.SUCCESS.value, 'id order': new_order.id}
 
+def build_order_response(order: Order) -> OrderResponse:
+    order_data = order.__dict__
+    order_data.update({
+        'user': UserResponse(**order.user.__dict__),
+        'project': ShortProjectResponse(**order.project.__dict__)
+    })
+    return OrderResponse(**order_data)
+
 @router.get('/', status_code=200)
-async def get_all_orders(id_user: int | None = Query(None),
+async def get_all_orders(response: Response,
+                         id_user: int | None = Query(None),
                          id_project: int | None = Query(None),
                          status: OrderStatus | None = Query(None),
                          created_date: str | None = Query(None),
@@ -33,110 +48,174 @@ async def get_all_orders(id_user: int | None = Query(None),
                          payment_date: str | None = Query(None),
                          start_date: str | None = Query(None),
                          end_date: str | None = Query(None),
+                         page: PageParams = Depends(page_params('id', 'created_date')),
                          order_service: OrderService = Depends(get_order_service),
-                         project_service: ProjectService = Depends(get_project_service),
-                         user_service: UserService = Depends(get_user_service),
                          user = Depends(get_current_user)):
     if user.role == Roles.ADMIN.value:
         filter = {k: v for k, v in locals().items() if v is not None and k 
-                not in {'order_service', 'project_service', 'user_service', 'user'}}
+                not in {'order_service', 'user', 'page', 'response'}}
     else:
         filter = {k: v for k, v in locals().items() if v is not None and k 
-                not in {'order_service', 'project_service', 'user_service', 'user'}}
+                not in {'order_service', 'user', 'page', 'response'}}
         filter['id_user'] = user.id
-    orders = order_service.get_all_orders_filter_by(**filter)
+    orders, next_cursor = await order_service.get_all_orders_filter_by(page, **filter)
     if not orders:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = []
-    for order in orders:
-        user = user_service.get_user_filter_by(id=order.id_user)
-        user_resp = UserResponse(**user.__dict__)
-
-        project = project_service.get_one_project_filter_by(id=order.id_project)
-        project_resp = ShortProjectResponse(**project.__dict__)
-
-        order_data = order.__dict__
-        order_data.update({
-            'user': user_resp,
-            'project': project_resp
-        })
-        response.append(OrderResponse(**order_data))
-    return response
+    set_next_cursor(response, next_cursor)
+    return [build_order_response(order) for order in orders]
+
+@router.post('/status', status_code=200, response_model=list[BulkOrderStatusResult])
+async def transition_orders(data: BulkOrderStatus,
+                            order_service: OrderService = Depends(get_order_service),
+                            admin = Depends(get_current_admin)):
+    """Переводит заказы из ids в status; недопустимые переходы и отсутствующие заказы
+    не мешают остальным - исход по каждому id в ответе."""
+    return await order_service.transition_orders(data.ids, data.status, actor=admin.id)
+
+@router.get('/stats', status_code=200, response_model=list[OrderStatsResponse], response_model_exclude_unset=True)
+async def get_order_stats(group_by: list[Literal['month', 'status', 'id_city', 'id_category']] = Query(['status']),
+                          status: OrderStatus | None = Query(None),
+                          id_city: int | None = Query(None),
+                          id_category: int | None = Query(None),
+                          month_from: date | None = Query(None),
+                          month_to: date | None = Query(None),
+                          order_service: OrderService = Depends(get_order_service),
+                          admin = Depends(get_current_admin)):
+    """Количество заказов, сумма final_price и средняя длительность работ по выбранным измерениям."""
+    filter = {k: v for k, v in locals().items() if v is not None and k
+              not in {'order_service', 'admin', 'group_by'}}
+    return await order_service.get_stats(list(dict.fromkeys(group_by)), **filter)
+
+@router.get('/export', status_code=200)
+async def export_orders(id_user: int | None = Query(None),
+                        id_project: int | None = Query(None),
+                        status: OrderStatus | None = Query(None),
+                        created_date: str | None = Query(None),
+                        updated_date: str | None = Query(None),
+                        start_price: float | None = Query(None),
+                        final_price: float | None = Query(None),
+                        payment_date: str | None = Query(None),
+                        start_date: str | None = Query(None),
+                        end_date: str | None = Query(None),
+                        created_from: date | None = Query(None),
+                        created_to: date | None = Query(None),
+                        format: Literal['csv', 'ndjson'] = Query('csv'),
+                        order_service: OrderService = Depends(get_order_service),
+                        user = Depends(get_current_user)):
+    """Все заказы под фильтрами одним потоком, с теми же правами, что и список."""
+    filter = {k: v for k, v in locals().items() if v is not None and k
+              not in {'order_service', 'user', 'format'}}
+    if user.role != Roles.ADMIN.value:
+        filter['id_user'] = user.id
+    query = order_service.select_export(**filter)
+    media_type = 'text/csv; charset=utf-8' if format == 'csv' else 'application/x-ndjson'
+    filename = f'orders-{date.today().isoformat()}.{format}'
+    return StreamingResponse(order_service.export_orders(query, format), media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@router.get('/events', status_code=200, response_model=list[OrderEventResponse])
+async def get_order_events(response: Response,
+                           id_order: int | None = Query(None),
+                           event_type: str | None = Query(None),
+                           page: PageParams = Depends(page_params('id')),
+                           order_service: OrderService = Depends(get_order_service),
+                           admin = Depends(get_current_admin)):
+    """Журнал изменений заказов по возрастанию id; остается и после удаления заказа."""
+    filter = {k: v for k, v in locals().items() if v is not None and k
+              not in {'order_service', 'admin', 'page', 'response'}}
+    events, next_cursor = await order_service.get_events(page, **filter)
+    set_next_cursor(response, next_cursor)
+    return events
+
+async def sse_events(id_customer: int | None, last_event_id: int | None):
+    yield 'retry: 3000\n\n'
+    async for message in order_event_stream(id_customer, last_event_id, ORDER_EVENTS_KEEPALIVE):
+        if message is None:
+            yield ': keepalive\n\n'
+        else:
+            yield f"id: {message['id']}\nevent: order\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
+
+@router.get('/events/stream', status_code=200)
+async def stream_order_events(last_event_id: int | None = Query(None),
+                              last_event_id_header: int | None = Header(None, alias='last-event-id'),
+                              user = Depends(get_stream_user)):
+    """Server-Sent Events с изменениями заказов пользователя (администратору - всех заказов).
+
+    После обрыва EventSource сам присылает Last-Event-ID, и пропущенное дочитывается из журнала.
+    """
+    id_customer = None if user.role == Roles.ADMIN.value else user.id
+    last_event_id = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(sse_events(id_customer, last_event_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@router.websocket('/events/ws')
+async def order_events_websocket(websocket: WebSocket,
+                                 last_event_id: int | None = Query(None),
+                                 user = Depends(get_stream_user)):
+    """То же, что /events/stream, по WebSocket: сообщения - JSON событий журнала."""
+    id_customer = None if user.role == Roles.ADMIN.value else user.id
+    await websocket.accept()
+
+    async def send_events():
+        async for message in order_event_stream(id_customer, last_event_id, ORDER_EVENTS_KEEPALIVE):
+            if message is not None:
+                await websocket.send_json(message)
+
+    async def wait_disconnect():
+        # Клиент ничего не шлет; чтение нужно, чтобы заметить отключение
+        while (await websocket.receive())['type'] != 'websocket.disconnect':
+            pass
+
+    tasks = {asyncio.create_task(send_events()), asyncio.create_task(wait_disconnect())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    for task in done:
+        task.result()
 
 @router.get('/{id}', status_code=200)
 async def get_order(id: int,
                     order_service: OrderService = Depends(get_order_service),
-                    project_service: ProjectService = Depends(get_project_service),
-                    user_service: UserService = Depends(get_user_service),
                     user = Depends(get_current_user)):
-    order = order_service.get_one_order_filter_by(id=id)
+    order = await order_service.get_full_order_filter_by(id=id)
     if not order:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    user = user_service.get_user_filter_by(id=order.id_user)
-    user_resp = UserResponse(**user.__dict__)
-
-    project = project_service.get_one_project_filter_by(id=order.id_project)
-    project_resp = ShortProjectResponse(**project.__dict__)
-
-    order_data = order.__dict__
-    order_data.update({
-        'user': user_resp,
-        'project': project_resp
-    })
-    return OrderResponse(**order_data)
+    return build_order_response(order)
 
 @router.put('/{id}', status_code=200)
 async def update_order(id: int,
                        data: UpdateOrder,
                        order_service: OrderService = Depends(get_order_service),
-                       project_service: ProjectService = Depends(get_project_service),
                        user = Depends(get_current_user)):
-    order = order_service.get_one_order_filter_by(id=id)
-    if not order:
-        raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    data_dict = data.dict()
-    data_dict['updated_date'] = datetime.now().strftime('%Y-%m-%d')
-
-    if 'status' in data.dict(exclude_unset=True):
-        new_status = data.status
-        if new_status == OrderStatus.IN_PROGRESS.value and order.start_date is None:
-            data_dict['start_date'] = datetime.now().strftime('%Y-%m-%d')
-        elif new_status == OrderStatus.COMPLETED.value and order.end_date is None:
-            data_dict['end_date'] = datetime.now().strftime('%Y-%m-%d')
-            project_service.update_project(order.id_project, UpdateProject(is_done=True))
-        elif new_status == OrderStatus.PAID.value and order.payment_date is None:
-            data_dict['payment_date'] = datetime.now().strftime('%Y-%m-%d')
-        
-    if (
-        'final_price' in data.dict(exclude_unset=True) 
-        and (
-            data.final_price < 0 
-            or data.start_price < 0
-            )
-        ):
-        raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
-    
-    data_unset = data.dict(exclude_unset=True)
+    """Допустимые переходы статуса и даты, которые при этом ставятся, - в utils.order_status."""
+    changes = data.model_dump(exclude_unset=True)
+
+    for price_field in ['start_price', 'final_price']:
+        if changes.get(price_field) is not None and changes[price_field] < 0:
+            raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
+
     for date_field in ['start_date', 'end_date', 'payment_date']:
-        if date_field in data_unset:
-            if getattr(data, date_field) > datetime.now().strftime('%Y-%m-%d'):
-                raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
-    
-    if 'start_date' in data_unset and 'end_date' in data_unset:
-        if data.start_date > data.end_date:
+        if changes.get(date_field) is not None and changes[date_field] > date.today():
             raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
-            
-    updated_order = order_service.update_order(id, data_dict)
-    if updated_order == Status.FAILED.value:
+
+    if changes.get('start_date') and changes.get('end_date') and changes['start_date'] > changes['end_date']:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
+
+    updated_order = await order_service.update_order(id, changes, actor=user.id)
+    if updated_order == Status.NOT_FOUND.value:
+        raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
+    if updated_order == Status.INVALID_TRANSITION.value:
+        raise HTTPException(status_code=400, detail={'status': Status.INVALID_TRANSITION.value})
     return {'status': Status.SUCCESS.value}
 
 @router.delete('/{id}', status_code=200)
 async def delete_order(id: int,
                        order_service: OrderService = Depends(get_order_service),
                        user = Depends(get_current_user)):
-    order = order_service.get_one_order_filter_by(id=id)
+    order = await order_service.get_one_order_filter_by(id=id)
     if not order:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    deleted_order = order_service.delete_order(id)
+    deleted_order = await order_service.delete_order(id, actor=user.id)
     return {'status': Status.SUCCESS.value}
\ No newline at end of file
@@ -1,20 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, File, UploadFile, Body
 from dependencies import *
 from schemas.projects import *
 from utils.enums import OrderStatus, Status, Roles
+from utils.pagination import PageParams, page_params, set_next_cursor
 from service.projects import ProjectService
+from utils.image_variants import generate_variants
 from utils.image import save_image, delete_image
+from fastapi.responses import StreamingResponse
+from typing import Literal
+from utils.catalog_import import iter_records, detect_import_format
 
 router = APIRouter()
 
 @router.post('/', status_code=201)
 async def create_project(data: CreateProject,
                          project_service: ProjectService = Depends(get_project_service)):
-    new_project = project_service.create_project(data)
+    new_project = await project_service.create_project(data)
     if new_project == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
 
+@router.post('/import', status_code=200, response_model=ImportReportResponse)
+async def import_projects(file: UploadFile = File(...),
+                          format: Literal['ndjson', 'csv'] | None = Query(None),
+                          dry_run: bool = Query(False),
+                          admin = Depends(get_current_admin),
+                          project_service: ProjectService = Depends(get_project_service)):
+    """Массовый импорт проектов из NDJSON или CSV; формат по format, расширению или Content-Type."""
+    format = format or detect_import_format(file.filename, file.content_type)
+    if not format:
+        raise HTTPException(status_code=415, detail={'status': Status.UNSUPPORTED_MEDIA_TYPE.value})
+    return await project_service.import_projects(iter_records(file.file, format), dry_run=dry_run)
+
+def documents_response(documents: list[str], next_cursor: str | None = None) -> StreamingResponse:
+    """Отдает сохраненные JSON-документы проектов как есть, без повторной сериализации."""
+    def chunks():
+        yield b'['
+        for i, document in enumerate(documents):
+            yield (b',' if i else b'') + document.encode()
+        yield b']'
+    response = StreamingResponse(chunks(), media_type='application/json')
+    set_next_cursor(response, next_cursor)
+    return response
+
 @router.get('/', status_code=200)
 async def get_all_projects(name: str | None = Query(None),
                            slug: str | None = Query(None),
@@ -23,95 +51,38 @@ async def get_all_projects(name: str | None = Query(None),
                            id_city: int | None = Query(None),
                            id_attribute: int | None = Query(None),
                            attribute_value: str | None = Query(None),
-                           project_service: ProjectService = Depends(get_project_service),
-                           city_service: CityService = Depends(get_city_service)):
+                           attribute_gte: float | None = Query(None),
+                           attribute_lte: float | None = Query(None),
+                           page: PageParams = Depends(page_params('id', 'name', 'attribute')),
+                           project_service: ProjectService = Depends(get_project_service)):
     filter = {k: v for k, v in locals().items() if v is not None 
-              and k not in {'project_service', 'city_service', 'id_attribute', 'attribute_value'}}
-    projects = project_service.get_all_projects_filter_by(**filter, id_attribute=id_attribute, attribute_value=attribute_value)
-    if not projects:
+              and k not in {'project_service', 'id_attribute', 'attribute_value', 'attribute_gte', 'attribute_lte',
+                            'page'}}
+    if not id_attribute and (attribute_gte is not None or attribute_lte is not None or page.sort == 'attribute'):
+        raise HTTPException(status_code=400, detail={'status': Status.INVALID_FILTER.value})
+    documents, next_cursor = await project_service.get_project_documents_filter_by(
+        page, **filter, id_attribute=id_attribute, attribute_value=attribute_value,
+        attribute_gte=attribute_gte, attribute_lte=attribute_lte)
+    if not documents:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = []
-    for project in projects:
-        category = project_service.get_one_category_filter_by(id=project.id_category)
-        category_resp = CategoryResponse(**category.__dict__)
-
-        city = city_service.get_one_city_filter_by(id=project.id_city)
-        city_resp = CityResponse(**city.__dict__)
-
-        images = project_service.get_all_project_images_filter_by(id_project=project.id)
-        images_list = [ProjectImageResponse(**image.__dict__) for image in images]
-
-        attribute_assoc = project_service.get_all_project_attributes_filter_by(id_project=project.id)
-        attributes_list = []
-        for attr_assoc in attribute_assoc:
-            attribute = project_service.get_one_attribute_filter_by(id=attr_assoc.id_attribute)
-            attribute_resp = AttributeResponse(**attribute.__dict__)
-
-            unit = project_service.get_one_unit_filter_by(id=attr_assoc.id_unit) if attr_assoc.id_unit else None
-            unit_resp = UnitResponse(**unit.__dict__) if unit else None
-
-            attributes_list.append(ProjectAttributeResponse(
-                attribute=attribute_resp,
-                value=attr_assoc.value,
-                unit=unit_resp
-            ))
-        project_data = project.__dict__
-        project_data.update({
-            'category': category_resp,
-            'city': city_resp,
-            'attributes': attributes_list,
-            'images': images_list
-        })
-        response.append(ProjectResponse(**project_data))
-    return response
+    return documents_response(documents, next_cursor)
 
 @router.get('/{id}', status_code=200)
 async def get_one_project(id: int,
-                          project_service: ProjectService = Depends(get_project_service),
-                          city_service: CityService = Depends(get_city_service)):
-    project = project_service.get_one_project_filter_by(id=id)
-    if not project:
+                          project_service: ProjectService = Depends(get_project_service)):
+    document = await project_service.get_project_document(id)
+    if document is None:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    category = project_service.get_one_category_filter_by(id=project.id_category)
-    category_resp = CategoryResponse(**category.__dict__)
-
-    city = city_service.get_one_city_filter_by(id=project.id_city)
-    city_resp = CityResponse(**city.__dict__)
-
-    images = project_service.get_all_project_images_filter_by(id_project=project.id)
-    images_list = [image.image for image in images]
-
-    attribute_assoc = project_service.get_all_project_attributes_filter_by(id_project=project.id)
-    attributes_list = []
-    for attr_assoc in attribute_assoc:
-        attribute = project_service.get_one_attribute_filter_by(id=attr_assoc.id_attribute)
-        attribute_resp = AttributeResponse(**attribute.__dict__)
-
-        unit = project_service.get_one_unit_filter_by(id=attr_assoc.id_unit) if attr_assoc.id_unit else None
-        unit_resp = UnitResponse(**unit.__dict__) if unit else None
-
-        attributes_list.append(ProjectAttributeResponse(
-            attribute=attribute_resp,
-            value=attr_assoc.value,
-            unit=unit_resp
-        ))
-    project_data = project.__dict__
-    project_data.update({
-        'category': category_resp,
-        'city': city_resp,
-        'attributes': attributes_list,
-        'images': images_list
-    })
-    return ProjectResponse(**project_data)
+    return Response(content=document, media_type='application/json')
     
 @router.put('/{id}', status_code=200)
 async def update_project(id: int,
                           data: UpdateProject,
                           project_service: ProjectService = Depends(get_project_service)):
-    project = project_service.get_one_project_filter_by(id=id)
+    project = await project_service.get_one_project_filter_by(id=id)
     if not project:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    updated_project = project_service.update_project(id, data)
+    updated_project = await project_service.update_project(id, data)
     if updated_project == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
@@ -119,57 +90,62 @@ async def update_project(id: int,
 @router.delete('/{id}', status_code=200)
 async def delete_project(id: int,
                           project_service: ProjectService = Depends(get_project_service)):
-    project = project_service.get_one_project_filter_by(id=id)
+    project = await project_service.get_one_project_filter_by(id=id)
     if not project:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    project_images = project_service.get_all_project_images_filter_by(id_project=id)
+    project_images = await project_service.get_all_project_images_filter_by(id_project=id)
     delete_image(project.main_image)
     for image in project_images:
         delete_image(image.image)
-    deleted_project = project_service.delete_project(id)
+    deleted_project = await project_service.delete_project(id)
     return Status.SUCCESS.value
 
 @router.patch('/{id}', status_code=200)
 async def update_project_main_image(id: int,
+                              background_tasks: BackgroundTasks,
                               main_image: UploadFile = File(...),
                               project_service: ProjectService = Depends(get_project_service)):
-    project = project_service.get_one_project_filter_by(id=id)
+    project = await project_service.get_one_project_filter_by(id=id)
     if not project:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    delete_image(project.main_image)
-    project_service.update_project(id, UpdateProject(main_image=main_image.filename))
-    save_image(main_image)
+    old_image = project.main_image
+    image_name = await save_image(main_image)
+    background_tasks.add_task(generate_variants, image_name)
+    await project_service.update_project(id, UpdateProject(main_image=image_name))
+    delete_image(old_image)
     return Status.SUCCESS.value
 
 # Project Images
 @router.post('/{id}/images', status_code=201)
 async def add_project_images(id: int,
+                             background_tasks: BackgroundTasks,
                              images: list[UploadFile] | None = File(None),
                              project_service: ProjectService = Depends(get_project_service)):
-    project = project_service.get_one_project_filter_by(id=id)
+    project = await project_service.get_one_project_filter_by(id=id)
     if not project:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
     if images:
         for image in images:
-            project_image = ProjectImageForm(id_project=id, image=image.filename)
-            project_service.create_project_image(project_image)
-            save_image(image)
+            image_name = await save_image(image)
+            background_tasks.add_task(generate_variants, image_name)
+            project_image = ProjectImageForm(id_project=id, image=image_name)
+            await project_service.create_project_image(project_image)
     return Status.SUCCESS.value
 
 @router.delete('/{id}/images', status_code=200)
 async def delete_project_images(id: int,
                                 images: ImageToDelete,
                                 project_service: ProjectService = Depends(get_project_service)):
-    project = project_service.get_one_project_filter_by(id=id)
+    project = await project_service.get_one_project_filter_by(id=id)
     if not project:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
     ids_images = images.ids_images
     if ids_images:
         for id_image in ids_images:
-            image = project_service.get_one_project_image_filter_by(id=id_image)
+            image = await project_service.get_one_project_image_filter_by(id=id_image)
             if not image or image.id_project != id:
                 continue
-            project_service.delete_project_image(id_image)
+            await project_service.delete_project_image(id_image)
             delete_image(image.image)
     return Status.SUCCESS.value
 
@@ -0,0 +1,14 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from schemas.projects import SuggestionResponse
+from utils.suggest import suggest_index
+
+router = APIRouter()
+
+@router.get('/', status_code=200, response_model=list[SuggestionResponse])
+async def get_suggestions(q: str = Query(..., min_length=1, max_length=100),
+                          limit: int = Query(10, ge=1, le=50),
+                          kind: list[Literal['project', 'city', 'category']] | None = Query(None)):
+    suggestions = suggest_index.suggest(q, limit, set(kind) if kind else None)
+    return [SuggestionResponse(kind=item.kind, id=item.id, label=item.label, slug=item.slug)
+            for item in suggestions]
@@ -1,50 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, Response
 from dependencies import *
 from schemas.projects import UnitResponse, CreateUnit, UpdateUnit
 from utils.enums import Status
+from utils.pagination import PageParams, page_params, set_next_cursor
+from utils.reference import check_reference_etag
 
 router = APIRouter()
 
 @router.post('/', status_code=201)
 async def create_unit(data: CreateUnit,
                             project_service: ProjectService = Depends(get_project_service)):
-    new_unit = project_service.create_unit(data)
+    new_unit = await project_service.create_unit(data)
     if new_unit == Status.FAILED.value:
         raise HTTPException(status_code=400, detail={'status': Status.FAILED.value})
     return Status.SUCCESS.value
 
 @router.get('/', status_code=200, response_model=list[UnitResponse])
-async def get_all_units(name: str | None = Query(None), 
-                             full_name: str | None = Query(None),
-                             project_service: ProjectService = Depends(get_project_service)):
-    filter = {k: v for k, v in locals().items() if v is not None and k != 'project_service'}
-    units = project_service.get_all_units_filter_by(**filter)
+async def get_all_units(request: Request, response: Response,
+                        name: str | None = Query(None),
+                        full_name: str | None = Query(None),
+                        page: PageParams = Depends(page_params('id', 'name')),
+                        project_service: ProjectService = Depends(get_project_service)):
+    filter = {k: v for k, v in locals().items() if v is not None and k not in {'project_service', 'page', 'request', 'response'}}
+    not_modified = check_reference_etag(request, response)
+    if not_modified:
+        return not_modified
+    units, next_cursor = await project_service.get_all_units_filter_by(page, **filter)
     if not units:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = [UnitResponse(**unit.__dict__) for unit in units]
-    return response
+    set_next_cursor(response, next_cursor)
+    return units
 
 @router.get('/{id}', status_code=200, response_model=UnitResponse)
-async def get_unit(id: int, project_service: ProjectService = Depends(get_project_service)):
-    unit = project_service.get_one_unit_filter_by(id=id)
+async def get_unit(id: int, request: Request, response: Response,
+                   project_service: ProjectService = Depends(get_project_service)):
+    unit = await project_service.get_unit(id)
     if not unit:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    response = UnitResponse(**unit.__dict__)
-    return response
+    not_modified = check_reference_etag(request, response, 'units', unit)
+    if not_modified:
+        return not_modified
+    return unit
 
 @router.put('/{id}', status_code=200)
 async def update_unit(id: int, data: UpdateUnit,
                           project_service: ProjectService = Depends(get_project_service)):
-    unit = project_service.get_one_unit_filter_by(id=id)
+    unit = await project_service.get_one_unit_filter_by(id=id)
     if not unit:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    update_unit = project_service.update_unit(id, data)
+    update_unit = await project_service.update_unit(id, data)
     return {'status': Status.SUCCESS.value, 'unit': update_unit}
 
 @router.delete('/{id}', status_code=200)
 async def delete_unit(id: int, project_service: ProjectService = Depends(get_project_service)):
-    unit = project_service.get_one_unit_filter_by(id=id)
+    unit = await project_service.get_one_unit_filter_by(id=id)
     if not unit:
         raise HTTPException(status_code=404, detail={'status': Status.NOT_FOUND.value})
-    project_service.delete_unit(id)
+    await project_service.delete_unit(id)
     return {'status': Status.SUCCESS.value}
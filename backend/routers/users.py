@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from dependencies import UserService, get_user_service, get_current_user
 from schemas.users import UserResponse, UserUpdate
 from utils.enums import AuthStatus, Roles, Status
+from utils.pagination import PageParams, page_params, set_next_cursor
 
 router = APIRouter()
 
 @router.get('/me')
 async def get_me(user_service: UserService = Depends(get_user_service), user = Depends(get_current_user)):
-    user_info = user_service.get_user_filter_by(id=user.id)
+    user_info = await user_service.get_user_filter_by(id=user.id)
     if not user_info:
         raise HTTPException(status_code=404, detail={'status': AuthStatus.USER_NOT_FOUND.value})
     return UserResponse(**user_info.__dict__) 
@@ -18,23 +19,22 @@ async def update_user(data: UserUpdate, user_id: int = Query(None), user_service
         user_id = user.id
     if not user_id == user.id and user.role != Roles.ADMIN.value:
         raise HTTPException(status_code=403, detail={'status': AuthStatus.FORBIDDEN.value})
-    update_user = user_service.update(user_id, data)
+    update_user = await user_service.update(user_id, data)
     return {'status': Status.SUCCESS.value, 'data': update_user}
 
 @router.get('/all')
-async def get_all_users(user_service: UserService = Depends(get_user_service), user = Depends(get_current_user)):
+async def get_all_users(response: Response, page: PageParams = Depends(page_params('id', 'name')),
+                        user_service: UserService = Depends(get_user_service), user = Depends(get_current_user)):
     if user.role != Roles.ADMIN.value:
         raise HTTPException(status_code=403, detail={'status': AuthStatus.FORBIDDEN.value})
-    users = user_service.get_all_users_filter_by()
-    response = []
-    for user in users:
-        response.append(UserResponse(**user.__dict__))
-    return response
+    users, next_cursor = await user_service.get_all_users_filter_by(page)
+    set_next_cursor(response, next_cursor)
+    return [UserResponse(**user.__dict__) for user in users]
 
 @router.put('/updatename')
 async def update_current_user(name: str, user_service: UserService = Depends(get_user_service), user = Depends(get_current_user)):
     data = UserUpdate(name=name)
-    updated_user = user_service.update(user.id, data)
+    updated_user = await user_service.update(user.id, data)
     return {'status': Status.SUCCESS.value, 'data': updated_user}
 
 @router.delete('/')
@@ -43,5 +43,5 @@ async def delete_user(user_id: int = Query(None), user_service: UserService = De
         user_id = user.id
     if not user_id == user.id and user.role != Roles.ADMIN.value:
         raise HTTPException(status_code=403, detail={'status': AuthStatus.FORBIDDEN.value})
-    user_service.delete_user(user_id)
+    await user_service.delete_user(user_id)
     return {'status': Status.SUCCESS.value}
\ No newline at end of file
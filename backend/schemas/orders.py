@@ -1,9 +1,11 @@
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, field_validator, EmailStr
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
+import json
 from schemas.users import UserResponse
 from schemas.projects import ShortProjectResponse
-from utils.enums import OrderStatus
+from utils.enums import OrderStatus, Status
+from config.orders import ORDER_BULK_MAX_IDS
 
 class OrderResponse(BaseModel):
     id: int
@@ -27,4 +29,45 @@ class UpdateOrder(BaseModel):
     final_price: Optional[float] = None
     payment_date: Optional[date] = None
     start_date: Optional[date] = None
-    end_date: Optional[date] = None
\ No newline at end of file
+    end_date: Optional[date] = None
+
+class BulkOrderStatus(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=ORDER_BULK_MAX_IDS)
+    status: OrderStatus
+
+    @field_validator('ids')
+    @classmethod
+    def unique_ids(cls, value):
+        return list(dict.fromkeys(value))
+
+class BulkOrderStatusResult(BaseModel):
+    id: int
+    status: Status
+    from_status: Optional[OrderStatus] = None
+
+class OrderStatsResponse(BaseModel):
+    month: Optional[date] = None
+    status: Optional[OrderStatus] = None
+    id_city: Optional[int] = None
+    id_category: Optional[int] = None
+    orders_count: int
+    final_price_sum: float
+    avg_duration_days: Optional[float] = None
+
+class OrderEventResponse(BaseModel):
+    id: int
+    id_order: int
+    event_type: str
+    from_status: Optional[OrderStatus] = None
+    to_status: Optional[OrderStatus] = None
+    id_user: Optional[int] = None
+    id_customer: Optional[int] = None
+    payload: Optional[dict] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator('payload', mode='before')
+    @classmethod
+    def parse_payload(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
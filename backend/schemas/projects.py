@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, field_validator, EmailStr
 import re
 from typing import Optional, List
 from .cities import CityResponse
@@ -21,14 +21,17 @@ class UnitResponse(BaseModel):
     id: int
     name: str
     full_name: Optional[str] = None
+    factor: Optional[float] = None
 
 class CreateUnit(BaseModel):
     name: str
     full_name: Optional[str] = None
+    factor: float = Field(1, gt=0)
 
 class UpdateUnit(BaseModel):
     name: Optional[str] = None
     full_name: Optional[str] = None
+    factor: Optional[float] = Field(None, gt=0)
 
 
 class AttributeResponse(BaseModel):
@@ -45,6 +48,7 @@ class UpdateAttribute(BaseModel):
 class ProjectAttributeResponse(BaseModel):
     attribute: AttributeResponse
     value: str
+    value_number: Optional[float] = None
     unit: Optional[UnitResponse] = None
 
 class ProjectAttributeForm(BaseModel):
@@ -97,6 +101,68 @@ class UpdateProject(BaseModel):
     attributes: Optional[List[ProjectAttributeForm]] = None
     images: Optional[List[str]] = None
 
+class ImportAttribute(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    attribute: str
+    value: str
+    unit: Optional[str] = None
+
+class ImportProject(BaseModel):
+    """Строка массового импорта: справочники указываются названиями, а не id."""
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    name: str = Field(min_length=1, max_length=255)
+    slug: str = Field(min_length=1, max_length=255)
+    description: str = ''
+    is_done: bool = False
+    main_image: Optional[str] = None
+    category: str
+    city: str
+    attributes: List[ImportAttribute] = []
+
+class ImportRowError(BaseModel):
+    row: Optional[int] = None # None - ошибка всего файла
+    errors: List[str]
+
+class ImportReportResponse(BaseModel):
+    dry_run: bool
+    total: int
+    imported: int
+    failed: int
+    seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError]
+    errors_truncated: bool
+
+class FacetValueResponse(BaseModel):
+    value: str
+    count: int
+
+class FacetResponse(BaseModel):
+    attribute: AttributeResponse
+    values: List[FacetValueResponse]
+
+class CatalogResponse(BaseModel):
+    total: int
+    items: List[ProjectResponse]
+    facets: List[FacetResponse]
+
+class SearchHitResponse(BaseModel):
+    project: ProjectResponse
+    score: float
+    highlights: dict[str, str]
+
+class SearchResponse(BaseModel):
+    total: int
+    items: List[SearchHitResponse]
+
+class SuggestionResponse(BaseModel):
+    kind: str
+    id: int
+    label: str
+    slug: Optional[str] = None
+
 class ShortProjectResponse(BaseModel):
     id: int
     name: str
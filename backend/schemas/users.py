@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, field_validator, EmailStr
 import re
 from typing import Optional
 
@@ -78,4 +78,15 @@ class UserResponse(BaseModel):
     org_name: str
     phone: str
     email: str
-    phone: str
\ No newline at end of file
+    phone: str
+
+class CurrentUser(BaseModel):
+    """Снимок авторизованного пользователя, который хранится в кэше авторизации."""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: int
+    name: Optional[str] = None
+    org_name: Optional[str] = None
+    role: str
+    email: str
+    phone: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Перенос завершенных и отмененных заказов в orders_archive.
+
+Заказы со статусом COMPLETED или CANCELLED, не менявшиеся ORDER_ARCHIVE_AFTER_DAYS
+дней, переносятся пачками по ORDER_ARCHIVE_BATCH_SIZE, каждая в своей транзакции,
+поэтому запуск можно прервать и повторить. Удобно ставить в cron раз в сутки.
+Запуск из папки backend против базы из DATABASE_URL (или MySQL из .env):
+    python -m scripts.archive_orders
+    python -m scripts.archive_orders --batch-size 500
+"""
+import argparse
+import asyncio
+import time
+
+from config.database import engine, SessionLocal
+from config.orders import ORDER_ARCHIVE_BATCH_SIZE
+import dependencies  # сервисы импортируются через dependencies, иначе циклический импорт
+from service.order_archive import archive_orders
+from utils.order_status import archive_cutoff
+
+
+async def main(batch_size: int):
+    cutoff = archive_cutoff()
+    started = time.perf_counter()
+    async with SessionLocal() as session:
+        moved = await archive_orders(session, cutoff, batch_size)
+    print(f'archived {moved} orders not updated since {cutoff.isoformat()} '
+          f'in {time.perf_counter() - started:.1f} s')
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=ORDER_ARCHIVE_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args().batch_size))
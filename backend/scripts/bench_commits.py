@@ -0,0 +1,129 @@
+"""Задержка записи: commit на каждый вызов репозитория против одной транзакции на операцию.
+
+Создание проекта с --attributes атрибутами и его удаление выполняются одними и
+теми же запросами в двух режимах: "per-call" коммитит после каждого из них (как
+репозитории до utils.unit_of_work), "unit" - один раз в конце. На MySQL каждый
+commit ждет fsync redo-лога (innodb_flush_log_at_trx_commit=1), поэтому разница
+растет с числом атрибутов. Запуск из папки backend против базы из DATABASE_URL
+(или MySQL из .env):
+    python -m scripts.bench_commits --operations 200 --attributes 15
+Созданные записи удаляются в конце прогона.
+
+Результат только для SQLite (файл, aiosqlite; MySQL в том окружении не было,
+на InnoDB с fsync на каждый commit разница должна быть больше),
+--operations 200 --attributes 15, мс:
+    режим      операция    commit/оп      p50      p95      p99
+    per-call   create           17.0    46.24    65.58    81.16
+    per-call   delete            3.0     6.85    10.79    18.20
+    unit       create            1.0    18.45    27.24    36.70
+    unit       delete            1.0     3.73     5.09     9.83
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, delete, text
+
+from config.database import engine, SessionLocal
+from models import *
+import dependencies  # сервисы импортируются через dependencies, иначе циклический импорт
+from scripts.bench_latency import percentile
+from service.documents import materialize_projects, delete_project_documents
+from utils.unit_of_work import unit_of_work
+
+PREFIX = 'bench-commit'
+
+
+async def prepare(session, attributes: int) -> tuple[int, int, list[int]]:
+    category = Category(name=f'{PREFIX} категория')
+    city = City(name=f'{PREFIX} город')
+    items = [Attribute(name=f'{PREFIX} {i}') for i in range(attributes)]
+    session.add_all([category, city, *items])
+    await session.commit()
+    return category.id, city.id, [item.id for item in items]
+
+
+async def step(session, per_call: bool):
+    if per_call:
+        await session.commit()
+    else:
+        await session.flush()
+
+
+async def create_project(session, per_call: bool, number: int, id_category: int, id_city: int, attribute_ids):
+    project = Project(name=f'{PREFIX} {number}', slug=f'{PREFIX}-{number}', description='...',
+                      id_category=id_category, id_city=id_city)
+    session.add(project)
+    await session.flush()
+    await step(session, per_call)
+    for id_attribute in attribute_ids:
+        session.add(ProjectAttribute(id_project=project.id, id_attribute=id_attribute, value=str(number)))
+        await step(session, per_call)
+    await materialize_projects(session, Project.id == project.id)
+    return project.id
+
+
+async def delete_project(session, per_call: bool, id: int):
+    await delete_project_documents(session, id)
+    await step(session, per_call)
+    await session.execute(delete(ProjectAttribute).filter_by(id_project=id))
+    await step(session, per_call)
+    await session.execute(delete(Project).filter_by(id=id))
+
+
+async def run(mode: str, operations: int, references, commits: list) -> dict[str, tuple[list[float], int]]:
+    """{операция: (задержки в мс, число commit)}."""
+    per_call = mode == 'per-call'
+    latencies = {'create': [], 'delete': []}
+    counts = {'create': 0, 'delete': 0}
+    async with SessionLocal() as session:
+        for number in range(operations):
+            for operation in ('create', 'delete'):
+                before = len(commits)
+                started = time.perf_counter()
+                async with unit_of_work(session):
+                    if operation == 'create':
+                        id = await create_project(session, per_call, number, *references)
+                    else:
+                        await delete_project(session, per_call, id)
+                latencies[operation].append((time.perf_counter() - started) * 1000)
+                counts[operation] += len(commits) - before
+    return {operation: (latencies[operation], counts[operation]) for operation in latencies}
+
+
+async def cleanup(id_category: int, id_city: int, attribute_ids):
+    async with SessionLocal() as session, unit_of_work(session):
+        await session.execute(delete(Attribute).filter(Attribute.id.in_(attribute_ids)))
+        await session.execute(delete(Category).filter_by(id=id_category))
+        await session.execute(delete(City).filter_by(id=id_city))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--attributes', type=int, default=15)
+    args = parser.parse_args()
+
+    commits = []
+    event.listen(engine.sync_engine, 'commit', lambda connection: commits.append(1))
+    async with SessionLocal() as session:
+        references = await prepare(session, args.attributes)
+        if engine.dialect.name == 'mysql':
+            variables = await session.execute(text(
+                "SHOW VARIABLES WHERE Variable_name IN ('innodb_flush_log_at_trx_commit', 'sync_binlog')"))
+            print(dict(variables.all()))
+    try:
+        print(f'{"режим":10} {"операция":10} {"commit/оп":>10} {"p50":>8} {"p95":>8} {"p99":>8}  (мс)')
+        for mode in ('per-call', 'unit'):
+            results = await run(mode, args.operations, references, commits)
+            for operation, (values, count) in results.items():
+                print(f'{mode:10} {operation:10} {count / args.operations:10.1f} {statistics.median(values):8.2f} '
+                      f'{percentile(values, 95):8.2f} {percentile(values, 99):8.2f}')
+    finally:
+        await cleanup(*references)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
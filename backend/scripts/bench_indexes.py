@@ -0,0 +1,185 @@
+"""EXPLAIN-планы и время запросов списков для каждой комбинации фильтров.
+
+Запросы строятся так же, как в сервисах (select_filter_by + keyset-страница),
+поэтому план совпадает с тем, что выполняют эндпоинты. Запуск из папки backend
+против базы из DATABASE_URL (или MySQL из .env):
+    python -m scripts.bench_indexes --seed --users 20000 --projects 50000 --orders 500000
+    python -m scripts.bench_indexes > after.txt
+
+Чтобы сравнить "до" и "после", прогон делается на ревизии cb6fdd78341e
+(alembic downgrade cb6fdd78341e) и на d41a7c2e9b15 (alembic upgrade head).
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, select, func
+from sqlalchemy.orm import joinedload
+
+from config.database import engine, SessionLocal
+from models import *
+from datetime import date, timedelta
+import dependencies  # сервисы импортируются через dependencies, иначе циклический импорт
+from service.orders import ORDER_LOAD_OPTIONS
+from utils.abstract_repository import apply_keyset
+from utils.enums import OrderStatus
+from utils.pagination import PageParams, DEFAULT_PAGE_SIZE
+
+CHUNK_SIZE = 5000
+CATEGORIES, CITIES, ATTRIBUTES, UNITS = 10, 50, 20, 5
+ATTRIBUTES_PER_PROJECT = 5
+
+
+async def insert_chunked(session, model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+    await session.commit()
+
+
+async def seed(users: int, projects: int, orders: int):
+    rnd = random.Random(42)
+    async with SessionLocal() as session:
+        await insert_chunked(session, Category, [{'name': f'Категория {i}'} for i in range(CATEGORIES)])
+        await insert_chunked(session, City, [{'name': f'Город {i}'} for i in range(CITIES)])
+        await insert_chunked(session, Attribute, [{'name': f'Атрибут {i}'} for i in range(ATTRIBUTES)])
+        await insert_chunked(session, Unit, [{'name': f'ед{i}'} for i in range(UNITS)])
+        category_ids = list(await session.scalars(select(Category.id)))
+        city_ids = list(await session.scalars(select(City.id)))
+        attribute_ids = list(await session.scalars(select(Attribute.id)))
+        unit_ids = list(await session.scalars(select(Unit.id)))
+
+        first_user = (await session.scalar(select(func.max(User.id)))) or 0
+        await insert_chunked(session, User, [
+            {'name': f'User {i}', 'role': 'USER', 'phone': f'+7900{i:07d}',
+             'email': f'bench-{first_user + i}@example.com', 'password': '!'}
+            for i in range(users)])
+        first_project = (await session.scalar(select(func.max(Project.id)))) or 0
+        await insert_chunked(session, Project, [
+            {'name': f'Проект {rnd.randrange(10 ** 6)}', 'slug': f'bench-{first_project + i}',
+             'description': '...', 'is_done': rnd.random() < 0.3,
+             'id_category': rnd.choice(category_ids), 'id_city': rnd.choice(city_ids)}
+            for i in range(projects)])
+        user_ids = list(await session.scalars(select(User.id).where(User.id > first_user)))
+        project_ids = list(await session.scalars(select(Project.id).where(Project.id > first_project)))
+
+        await insert_chunked(session, ProjectAttribute, [
+            {'id_project': id_project, 'id_attribute': id_attribute,
+             'value': str(rnd.randrange(1, 500)), 'id_unit': rnd.choice(unit_ids)}
+            for id_project in project_ids
+            for id_attribute in rnd.sample(attribute_ids, ATTRIBUTES_PER_PROJECT)])
+        today = date.today()
+        statuses = [status.value for status in OrderStatus]
+        await insert_chunked(session, Order, [
+            {'id_user': rnd.choice(user_ids), 'id_project': rnd.choice(project_ids),
+             'status': rnd.choice(statuses), 'created_date': today - timedelta(days=rnd.randrange(1095))}
+            for _ in range(orders)])
+
+
+async def sample_values() -> dict:
+    """Реальные значения из базы, чтобы фильтры что-то находили."""
+    async with SessionLocal() as session:
+        project = await session.scalar(select(Project).order_by(Project.id.desc()).limit(1))
+        attribute = await session.scalar(select(ProjectAttribute).limit(1))
+        order = await session.scalar(select(Order).order_by(Order.id.desc()).limit(1))
+        user = await session.scalar(select(User).order_by(User.id.desc()).limit(1))
+    if not (project and attribute and order and user):
+        raise SystemExit('База пустая: запустите с --seed')
+    return {'project': project, 'attribute': attribute, 'order': order, 'user': user}
+
+
+def project_query(sort: str, id_attribute: int | None = None, attribute_value: str | None = None, **filters):
+    # Как ProjectService.get_all_projects_filter_by; selectinload-запросы идут по первичному ключу и не сравниваются
+    statement = select(Project).filter_by(**filters).options(
+        joinedload(Project.category), joinedload(Project.city))
+    if id_attribute is not None and attribute_value is not None:
+        statement = statement.join(ProjectAttribute).filter(
+            ProjectAttribute.id_attribute == id_attribute, ProjectAttribute.value == attribute_value)
+    return apply_keyset(statement, Project, PageParams(limit=DEFAULT_PAGE_SIZE, cursor=None, sort=sort))
+
+
+def order_query(sort: str, **filters):
+    statement = select(Order).filter_by(**filters).options(*ORDER_LOAD_OPTIONS)
+    return apply_keyset(statement, Order, PageParams(limit=DEFAULT_PAGE_SIZE, cursor=None, sort=sort))
+
+
+def build_cases(values: dict) -> list[tuple[str, object]]:
+    project, attribute, order, user = values['project'], values['attribute'], values['order'], values['user']
+    return [
+        ('login: email', select(User).filter_by(email=user.email).limit(1)),
+        ('projects: -', project_query('id')),
+        ('projects: sort=name', project_query('name')),
+        ('projects: slug', project_query('id', slug=project.slug)),
+        ('projects: id_category', project_query('id', id_category=project.id_category)),
+        ('projects: id_city', project_query('id', id_city=project.id_city)),
+        ('projects: id_category+id_city', project_query('id', id_category=project.id_category, id_city=project.id_city)),
+        ('projects: id_category+is_done', project_query('id', id_category=project.id_category, is_done=False)),
+        ('projects: id_category sort=name', project_query('name', id_category=project.id_category)),
+        ('projects: attribute', project_query('id', id_attribute=attribute.id_attribute,
+                                              attribute_value=attribute.value)),
+        ('orders: -', order_query('id')),
+        ('orders: sort=created_date', order_query('created_date')),
+        ('orders: id_user', order_query('id', id_user=order.id_user)),
+        ('orders: id_user sort=created_date', order_query('created_date', id_user=order.id_user)),
+        ('orders: id_user+status', order_query('id', id_user=order.id_user, status=order.status)),
+        ('orders: status', order_query('id', status=order.status)),
+        ('orders: status sort=created_date', order_query('created_date', status=order.status)),
+        ('orders: created_date', order_query('id', created_date=order.created_date)),
+        ('orders: id_project', order_query('id', id_project=order.id_project)),
+    ]
+
+
+async def explain(connection, statement) -> list[str]:
+    compiled = statement.compile(dialect=engine.dialect)
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    result = await connection.exec_driver_sql(prefix + str(compiled), params)
+    columns = list(result.keys())
+    return [', '.join(f'{column}={value}' for column, value in zip(columns, row)
+                      if value is not None) for row in result]
+
+
+async def measure(statement, repeat: int) -> float:
+    timings = []
+    async with SessionLocal() as session:
+        await session.execute(statement)  # прогрев буферного пула
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (await session.execute(statement)).unique().all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def run(args):
+    if args.seed:
+        started = time.perf_counter()
+        await seed(args.users, args.projects, args.orders)
+        print(f'seed: {time.perf_counter() - started:.1f} c')
+    cases = build_cases(await sample_values())
+    print(f'{"запрос":40} {"медиана, мс":>12}')
+    async with engine.connect() as connection:
+        for name, statement in cases:
+            elapsed = await measure(statement, args.repeat)
+            print(f'{name:40} {elapsed:12.2f}')
+            if not args.no_explain:
+                for line in await explain(connection, statement):
+                    print(f'    {line}')
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', action='store_true', help='сначала наполнить базу тестовыми данными')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--projects', type=int, default=50000)
+    parser.add_argument('--orders', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--no-explain', action='store_true')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
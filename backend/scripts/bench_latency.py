@@ -0,0 +1,74 @@
+"""Нагрузочный замер латентности (p50/p95/p99) при конкурентных запросах.
+
+Сервер запускается отдельно (uvicorn main:app), затем из папки backend:
+    python -m scripts.bench_latency --url http://127.0.0.1:8000/api/products/ \\
+        --url http://127.0.0.1:8000/api/cities/ --concurrency 50 --requests 2000
+
+Чтобы сравнить "до" и "после", один и тот же прогон делается против сервера
+на синхронном движке (предыдущий коммит) и на асинхронном.
+
+Замер переезда на async (один воркер uvicorn, локальный SQLite-файл: 200 проектов,
+20 городов; MySQL в том окружении не было, по aiomysql цифр пока нет), p99 в мс:
+    --concurrency 10 --requests 1000   sync: products 755, cities 447 (24 rps)
+                                       async: products 739, cities 428 (24 rps)
+    --concurrency 50 --requests 2000   sync: не доработал - QueuePool timeout и ReadTimeout клиента
+                                       async: products 5718, cities 4920, без ошибок
+На локальном SQLite запрос почти не ждет базу, поэтому при умеренной нагрузке разницы
+нет; выигрыш async ожидается там, где есть сетевая задержка до MySQL.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+async def run(urls: list[str], concurrency: int, requests: int, headers: dict) -> dict[str, list[float]]:
+    latencies = {url: [] for url in urls}
+    errors = 0
+    queue = itertools.islice(itertools.cycle(urls), requests)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for url in queue:
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies[url].append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    print(f'{requests} запросов за {elapsed:.2f} c ({requests / elapsed:.0f} rps), ошибок 5xx: {errors}')
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', action='append', required=True)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--token', help='Bearer-токен для закрытых эндпоинтов')
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    latencies = asyncio.run(run(args.url, args.concurrency, args.requests, headers))
+    print(f'{"url":60} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}  (мс)')
+    for url, values in latencies.items():
+        print(f'{url:60} {statistics.median(values):8.1f} {percentile(values, 95):8.1f} '
+              f'{percentile(values, 99):8.1f} {max(values):8.1f}')
+
+
+if __name__ == '__main__':
+    main()
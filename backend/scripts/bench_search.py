@@ -0,0 +1,74 @@
+"""Замер поиска по индексу проектов: время построения и латентность запросов.
+
+Каталог генерируется в памяти, БД не нужна. Запуск из папки backend:
+    python -m scripts.bench_search --projects 20000 --queries 2000
+
+Латентность всего эндпоинта (с загрузкой страницы проектов из БД) меряется
+через scripts.bench_latency на http://.../api/catalog/search?q=...
+"""
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from scripts.bench_latency import percentile
+from utils.search import SearchIndex
+
+WORDS = ('дом коттедж баня дача таунхаус кирпич брус газобетон каркас терраса веранда гараж мансарда '
+         'камин эркер балкон подвал фундамент кровля фасад окна панорамные второй свет просторный уютный '
+         'современный классический скандинавский хайтек шале барнхаус участок лес озеро').split()
+CATEGORIES = ('Дома', 'Бани', 'Коттеджи', 'Дачи', 'Таунхаусы')
+CITIES = ('Москва', 'Казань', 'Сочи', 'Тверь', 'Пермь', 'Самара', 'Уфа', 'Омск')
+QUERIES = ('кирпич', 'дом кирпич', 'баня брус', 'коттедж москва', 'терр', 'каркасный дом казань',
+           'панорамные окна второй свет', 'шале', 'несуществующее слово')
+
+
+def make_projects(count: int, rnd: random.Random):
+    for id in range(1, count + 1):
+        yield SimpleNamespace(
+            id=id,
+            name=' '.join(rnd.choices(WORDS, k=3)).capitalize(),
+            description=' '.join(rnd.choices(WORDS, k=rnd.randint(30, 120))),
+            category=SimpleNamespace(name=rnd.choice(CATEGORIES)),
+            city=SimpleNamespace(name=rnd.choice(CITIES)),
+            project_attribute=[SimpleNamespace(value=rnd.choice(WORDS)) for _ in range(5)],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=20, help='сколько результатов подсвечивать на запрос')
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    projects = list(make_projects(args.projects, rnd))
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.rebuild(projects)
+    print(f'построение: {time.perf_counter() - started:.2f} c, {index.stats()}')
+
+    started = time.perf_counter()
+    for project in projects[:1000]:
+        index.update(project)
+    print(f'обновление одного проекта: {(time.perf_counter() - started) / 1000 * 1000:.3f} мс')
+
+    latencies = {query: [] for query in QUERIES}
+    for i in range(args.queries):
+        query = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        hits = index.search(query)
+        for id, _ in hits[:args.limit]:
+            index.highlight(id, query)
+        latencies[query].append((time.perf_counter() - started) * 1000)
+
+    print(f'{"запрос":32} {"найдено":>8} {"p50":>8} {"p95":>8} {"p99":>8}  (мс)')
+    for query, values in latencies.items():
+        print(f'{query:32} {len(index.search(query)):8} {statistics.median(values):8.2f} '
+              f'{percentile(values, 95):8.2f} {percentile(values, 99):8.2f}')
+
+
+if __name__ == '__main__':
+    main()
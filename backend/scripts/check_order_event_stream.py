@@ -0,0 +1,93 @@
+"""Проверка: новый поток событий заказов без Last-Event-ID после переполнения очереди
+дочитывает только события, пришедшие после подписки, а не весь журнал.
+
+Массовый перевод статуса больше ORDER_EVENTS_QUEUE_SIZE заказов приходит в только что
+открытый поток администратора, в журнале уже есть старые события.
+Запуск из папки backend:
+    python -m scripts.check_order_event_stream
+"""
+import asyncio
+import os
+import sys
+from datetime import date, datetime
+
+os.environ.setdefault('SECRET_KEY', 'order-event-stream-check')
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from config.database import Base, get_session
+from config.orders import ORDER_EVENTS_QUEUE_SIZE
+from main import app
+from models import *
+from dependencies import get_current_admin
+import service.order_events as order_events
+
+HISTORY_EVENTS = 300
+BULK_ORDERS = ORDER_EVENTS_QUEUE_SIZE + 50
+
+
+async def seed(session):
+    session.add_all([Category(name='Дома'), City(name='Москва'),
+                     User(name='admin', phone='1', email='admin@example.com', password='x', org_name='-')])
+    await session.flush()
+    session.add(Project(name='Проект', slug='project', description='...', id_category=1, id_city=1))
+    await session.flush()
+    await session.execute(insert(Order), [{'id_user': 1, 'id_project': 1, 'status': 'PENDING',
+                                           'created_date': date.today()} for _ in range(BULK_ORDERS)])
+    await session.execute(insert(OrderEvent), [{'id_order': 1, 'id_customer': 1, 'event_type': 'updated',
+                                                'created_at': datetime.now()} for _ in range(HISTORY_EVENTS)])
+    await session.commit()
+
+
+async def check() -> bool:
+    engine = create_async_engine('sqlite+aiosqlite://', poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    SessionTest = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with SessionTest() as session:
+        await seed(session)
+
+    async def get_test_session():
+        async with SessionTest() as db:
+            yield db
+
+    order_events.SessionLocal = SessionTest
+    order_events.order_events_broker = order_events.MemoryBroker()
+    app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_current_admin] = lambda: type('Admin', (), {'id': 1, 'role': 'ADMIN'})()
+
+    stream = order_events.order_event_stream(None, None, keepalive=0.5)
+    first = asyncio.create_task(anext(stream))
+    while not order_events.order_events_broker.subscribers:
+        await asyncio.sleep(0.01)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.post('/api/orders/status',
+                                     json={'ids': list(range(1, BULK_ORDERS + 1)), 'status': 'APPROVED'})
+        response.raise_for_status()
+    received = [await first]
+    while received[-1] is not None:
+        received.append(await anext(stream))
+    await stream.aclose()
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    ids = [message['id'] for message in received[:-1]]
+    expected = list(range(HISTORY_EVENTS + 1, HISTORY_EVENTS + BULK_ORDERS + 1))
+    print(f'history {HISTORY_EVENTS}, bulk {BULK_ORDERS}, queue {ORDER_EVENTS_QUEUE_SIZE}: '
+          f'received {len(ids)} events ({ids[0] if ids else None}..{ids[-1] if ids else None})')
+    return ids == expected
+
+
+def main() -> int:
+    if not asyncio.run(check()):
+        print('FAILED: the stream did not deliver exactly the new events')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
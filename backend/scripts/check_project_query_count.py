@@ -0,0 +1,89 @@
+"""Проверка: список и карточка /api/products читают готовые документы одним SELECT,
+и число запросов не зависит от числа проектов.
+
+Запуск из папки backend:
+    python -m scripts.check_project_query_count
+"""
+import asyncio
+import os
+import sys
+
+os.environ.setdefault('SECRET_KEY', 'query-count-check')
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from config.database import Base, get_session
+from main import app
+from models import *
+from service.documents import materialize_projects
+from utils.reference import reference_data
+
+ROW_COUNTS = (5, 50)
+
+
+async def seed(session, count: int):
+    category = Category(name='Дома')
+    city = City(name='Москва')
+    units = [Unit(name='м²'), Unit(name='эт.')]
+    attributes = [Attribute(name='Площадь'), Attribute(name='Этажность')]
+    session.add_all([category, city, *units, *attributes])
+    await session.flush()
+    for i in range(count):
+        project = Project(name=f'Проект {i}', slug=f'project-{i}', description='...',
+                          id_category=category.id, id_city=city.id)
+        session.add(project)
+        await session.flush()
+        session.add_all([ProjectImage(id_project=project.id, image=f'{i}-{n}.jpg') for n in range(3)])
+        session.add_all([ProjectAttribute(id_project=project.id, id_attribute=attribute.id,
+                                          value=str(100 + i), id_unit=unit.id)
+                         for attribute, unit in zip(attributes, units)])
+    await session.commit()
+
+
+async def count_queries(count: int) -> dict:
+    engine = create_async_engine('sqlite+aiosqlite://', poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    SessionTest = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with SessionTest() as session:
+        await seed(session, count)
+        await reference_data.rebuild(session)
+        await materialize_projects(session) # как после записи через сервис
+        await session.commit()
+
+    async def get_test_session():
+        async with SessionTest() as db:
+            yield db
+
+    statements = []
+    event.listen(engine.sync_engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    app.dependency_overrides[get_session] = get_test_session
+    result = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        for name, url in (('list', '/api/products/'), ('detail', '/api/products/1')):
+            statements.clear()
+            response = await client.get(url)
+            response.raise_for_status()
+            result[name] = [statement.split()[0].upper() for statement in statements]
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return result
+
+
+def main() -> int:
+    counts = {count: asyncio.run(count_queries(count)) for count in ROW_COUNTS}
+    for count, result in counts.items():
+        print(f'{count} projects: {result}')
+    # Запись на чтении (пересборка документов) означала бы, что документы не материализованы
+    if any(statements != ['SELECT'] for result in counts.values() for statements in result.values()):
+        print('FAILED: expected a single SELECT per request')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Сводка заказов orders_stats: пересчет с нуля и проверка согласованности.
+
+Запуск из папки backend против базы из DATABASE_URL (или MySQL из .env):
+    python -m scripts.order_stats check     # расхождения с GROUP BY по orders, код 1 если есть
+    python -m scripts.order_stats rebuild   # пересчитать таблицу целиком в одной транзакции
+"""
+import argparse
+import asyncio
+import sys
+
+from config.database import engine, SessionLocal
+import dependencies  # сервисы импортируются через dependencies, иначе циклический импорт
+from service.order_stats import rebuild_order_stats, check_order_stats
+from utils.unit_of_work import unit_of_work
+
+
+async def main(command: str) -> int:
+    async with SessionLocal() as session:
+        if command == 'rebuild':
+            async with unit_of_work(session):
+                rows = await rebuild_order_stats(session)
+            print(f'orders_stats rebuilt: {rows} rows')
+            code = 0
+        else:
+            mismatches = await check_order_stats(session)
+            for key, expected, actual in mismatches:
+                print(f'{key}: expected {expected}, actual {actual}')
+            print('OK' if not mismatches else f'FAILED: {len(mismatches)} mismatched rows')
+            code = 1 if mismatches else 0
+    await engine.dispose()
+    return code
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('check', 'rebuild'))
+    sys.exit(asyncio.run(main(parser.parse_args().command)))
@@ -1,25 +1,36 @@
 from fastapi import HTTPException
 from utils.enums import AuthStatus
-from passlib.hash import pbkdf2_sha256
 from datetime import datetime, timedelta
 import jwt
-from config.auth import SECRET_KEY, ALGORITHM, UPDATE_EXPIRATION_TIME, EXPIRATION_TIME
+from sqlalchemy.exc import IntegrityError
+from config.auth import SECRET_KEY, ALGORITHM, UPDATE_EXPIRATION_TIME, EXPIRATION_TIME, AUTH_CACHE_TTL, AUTH_CACHE_MAX_SIZE
 from crud.users import UserRepository
-from schemas.users import UserCreate, User, UserLogin
+from utils.unit_of_work import unit_of_work
+from schemas.users import UserCreate, User, UserLogin, CurrentUser
+from utils.cache import TTLCache
+from utils.passwords import password_hasher
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Снимки пользователей по sub из токена; сбрасываются в UserService при изменении и удалении
+auth_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL)
+
 class AuthService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
-    def create_user(self, user: UserCreate):
-        user.password = pbkdf2_sha256.hash(user.password)
-        return self.user_repository.add(user.model_dump())
+    async def create_user(self, user: UserCreate):
+        user.password = await password_hasher.hash(user.password)
+        session = self.user_repository.session
+        try:
+            async with unit_of_work(session):
+                return await self.user_repository.add(user.model_dump())
+        except IntegrityError: # уникальный индекс ux_users_email; операция откатывается целиком
+            raise HTTPException(status_code=400, detail={'status': AuthStatus.EMAIL_ALREADY_EXISTS.value})
 
-    def get_user_filter_by(self, **filter_by):
-        return self.user_repository.get_one_filter_by(**filter_by)
+    async def get_user_filter_by(self, **filter_by):
+        return await self.user_repository.get_one_filter_by(**filter_by)
 
 
     def gen_token(self, user: User):
@@ -36,23 +47,32 @@ class AuthService:
         except jwt.InvalidTokenError:
             raise HTTPException(status_code=401, detail={'status': AuthStatus.INVALID_TOKEN.value})
 
-    def get_user_by_token(self, token: str):
+    async def get_user_by_token(self, token: str) -> CurrentUser:
         payload = self.decode_token(token)
-        user = self.get_user_filter_by(id=payload['sub'])
+        user = auth_cache.get(payload['sub'])
+        if user:
+            return user
+        user = await self.get_user_filter_by(id=payload['sub'])
         if not user:
             raise HTTPException(status_code=401, detail={'status': AuthStatus.USER_NOT_FOUND.value})
+        user = CurrentUser.model_validate(user)
+        auth_cache.set(payload['sub'], user)
         return user
     
     def gen_update_token(self, user: User):
         payload = {"sub": user.id, "exp": datetime.now() + UPDATE_EXPIRATION_TIME}
         return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
     
-    def login(self, user_login: UserLogin):
-        user = self.get_user_filter_by(email=user_login.email)
+    async def login(self, user_login: UserLogin):
+        user = await self.get_user_filter_by(email=user_login.email)
         if not user:
             raise HTTPException(status_code=401, detail={'status': AuthStatus.INVALID_EMAIL_OR_PASSWORD.value})
-        if not pbkdf2_sha256.verify(user_login.password, user.password):
+        is_valid, new_hash = await password_hasher.verify_and_update(user_login.password, user.password)
+        if not is_valid:
             raise HTTPException(status_code=401, detail={'status': AuthStatus.INVALID_EMAIL_OR_PASSWORD.value})
+        if new_hash:
+            async with unit_of_work(self.user_repository.session):
+                await self.user_repository.update({'id': user.id, 'password': new_hash})
         token = self.gen_token(user)
         return {
             'access_token': token,
@@ -60,9 +80,9 @@ class AuthService:
             'expires': EXPIRATION_TIME.total_seconds()
         }, self.gen_update_token(user)
 
-    def refresh_token(self, token: str):
+    async def refresh_token(self, token: str):
         payload = self.decode_token(token)
-        user = self.get_user_filter_by(id=payload['sub'])
+        user = await self.get_user_filter_by(id=payload['sub'])
         if not user:
             raise HTTPException(status_code=401, detail={'status': AuthStatus.USER_NOT_FOUND.value})
         token = self.gen_token(user)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from config.catalog import CATALOG_REFRESH_INTERVAL
+from config.database import SessionLocal
+from models.projects import Project
+from utils.facets import facet_index
+from utils.search import search_index
+from utils.suggest import suggest_index, ProjectSuggestions
+from utils.reference import reference_data
+from utils.unit_of_work import after_commit
+
+# Все, что нужно индексам каталога для одного проекта
+CATALOG_LOAD_OPTIONS = (
+    joinedload(Project.category),
+    joinedload(Project.city),
+    selectinload(Project.project_attribute),
+)
+# Индексы в памяти процесса; у каждого есть rebuild(projects), update(project) и remove(id)
+CATALOG_INDEXES = [facet_index, search_index, ProjectSuggestions(suggest_index)]
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_catalog_indexes(session):
+    snapshot = await reference_data.rebuild(session)
+    projects = (await session.scalars(select(Project).options(*CATALOG_LOAD_OPTIONS))).all()
+    for index in CATALOG_INDEXES:
+        index.rebuild(projects)
+    for kind, items in (('category', snapshot.categories), ('city', snapshot.cities)):
+        suggest_index.replace_kind(kind, [(item.id, item.name, None) for item in items.values()])
+
+
+async def reindex_projects(session, *criteria, **filter):
+    """Перечитывает проекты после записи и обновляет их во всех индексах.
+
+    Если искали по id и проекта больше нет, он удаляется из индексов. Внутри
+    внешней операции (update_order -> update_project) откладывается до ее commit.
+    """
+    await after_commit(session, lambda: _reindex(session, criteria, filter))
+
+
+async def _reindex(session, criteria, filter):
+    query = (select(Project).filter(*criteria).filter_by(**filter)
+             .options(*CATALOG_LOAD_OPTIONS)
+             .execution_options(populate_existing=True))
+    projects = (await session.scalars(query)).unique().all()
+    for index in CATALOG_INDEXES:
+        if not projects and 'id' in filter:
+            index.remove(filter['id'])
+        for project in projects:
+            index.update(project)
+
+
+async def refresh_catalog_indexes():
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+        try:
+            async with SessionLocal() as session:
+                await rebuild_catalog_indexes(session)
+        except Exception: # БД недоступна - работаем на старом индексе до следующей попытки
+            logger.exception('catalog index refresh failed')
@@ -1,31 +1,58 @@
 from dependencies import CityRepository
 from schemas.cities import *
 from utils.enums import Status
-from sqlalchemy.orm import joinedload
+from utils.pagination import PageParams
+from service.catalog import reindex_projects
+from service.documents import materialize_projects
+from models.projects import Project
+from utils.suggest import suggest_index
+from utils.reference import reference_data, paginate_items
+from utils.unit_of_work import unit_of_work
 
 class CityService:
     def __init__(self, city_repository: CityRepository):
         self.city_repository = city_repository
 
-    def get_all_cities_filter_by(self, **filter):
-        return self.city_repository.get_all_filter_by(**filter)
+    async def get_all_cities_filter_by(self, page: PageParams, **filter):
+        return paginate_items(reference_data.snapshot.cities.values(), page, **filter)
 
-    def get_one_city_filter_by(self, **filter):
-        return self.city_repository.get_one_filter_by(**filter)
+    async def get_city(self, id: int) -> CityResponse | None:
+        city = reference_data.snapshot.cities.get(id)
+        if city is None: # создан в другом воркере и еще не попал в снимок
+            city = await self.city_repository.get_one_filter_by(id=id)
+            city = CityResponse.model_validate(city, from_attributes=True) if city else None
+        return city
 
-    def create_city(self, new_city: CreateCity):
+    async def get_one_city_filter_by(self, **filter):
+        return await self.city_repository.get_one_filter_by(**filter)
+
+    async def create_city(self, new_city: CreateCity):
         new_city_dict = new_city.model_dump()
-        create_city = self.city_repository.add(new_city_dict)
+        async with unit_of_work(self.city_repository.session):
+            create_city = await self.city_repository.add(new_city_dict)
         if not new_city:
             return Status.FAILED.value
+        suggest_index.put('city', create_city.id, create_city.name)
+        await reference_data.rebuild(self.city_repository.session)
         return create_city
 
-    def update_city(self, id: int, upd_city: UpdateCity):
+    async def update_city(self, id: int, upd_city: UpdateCity):
         entity = upd_city.model_dump()
         entity['id'] = id
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_city = self.city_repository.update(entity)
+        session = self.city_repository.session
+        async with unit_of_work(session):
+            update_city = await self.city_repository.update(entity)
+            await materialize_projects(session, Project.id_city == id, snapshot=await reference_data.load(session))
+        await reference_data.rebuild(session)
+        if 'name' in entity: # название города участвует в поиске
+            suggest_index.put('city', id, entity['name'])
+            await reindex_projects(session, id_city=id)
         return update_city
 
-    def delete_city(self, id: int):
-        return self.city_repository.delete(id)
+    async def delete_city(self, id: int):
+        async with unit_of_work(self.city_repository.session):
+            deleted = await self.city_repository.delete(id)
+        suggest_index.discard('city', id)
+        await reference_data.rebuild(self.city_repository.session)
+        return deleted
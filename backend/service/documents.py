@@ -0,0 +1,87 @@
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.orm import selectinload
+from models.projects import Project, ProjectDocument
+from schemas.projects import ProjectResponse, ProjectAttributeResponse, ProjectImageResponse
+from utils.abstract_repository import build_upsert
+from utils.reference import reference_data, ReferenceSnapshot
+from utils.unit_of_work import unit_of_work
+
+# Коллекции подтягиваются одним IN-запросом каждая: число запросов не зависит
+# от количества проектов. Категория, город, атрибуты и единицы берутся из reference_data
+PROJECT_LOAD_OPTIONS = (
+    selectinload(Project.project_image),
+    selectinload(Project.project_attribute),
+)
+DOCUMENTS_BATCH_SIZE = 500 # столько проектов пересобирается за один проход при переименовании справочника
+
+
+def build_project_response(project: Project, snapshot: ReferenceSnapshot | None = None) -> ProjectResponse:
+    """Справочники берутся из снимка reference_data, а не из связей ORM."""
+    snapshot = snapshot or reference_data.snapshot
+    attributes_list = [ProjectAttributeResponse(
+        attribute=snapshot.attributes[attr_assoc.id_attribute],
+        value=attr_assoc.value,
+        value_number=attr_assoc.value_number,
+        unit=snapshot.units[attr_assoc.id_unit] if attr_assoc.id_unit else None
+    ) for attr_assoc in project.project_attribute]
+    project_data = dict(project.__dict__)
+    project_data.update({
+        'category': snapshot.categories[project.id_category],
+        'city': snapshot.cities[project.id_city],
+        'attributes': attributes_list,
+        'images': [ProjectImageResponse(**image.__dict__) for image in project.project_image]
+    })
+    return ProjectResponse(**project_data)
+
+
+async def materialize_projects(session, *criteria, snapshot: ReferenceSnapshot | None = None) -> dict[int, str]:
+    """Пересобирает и сохраняет документы проектов, подходящих под условия: {id: JSON}.
+
+    Вызывается сервисами в той же транзакции, что и запись, которая меняет содержимое
+    документа (проект, его атрибуты и изображения, изменение справочника). После
+    изменения справочника передается snapshot из reference_data.load.
+    Документы пишутся upsert-ом, поэтому одновременная пересборка одних и тех же
+    проектов не упирается в дубликат ключа.
+    """
+    ids = (await session.scalars(select(Project.id).filter(*criteria).order_by(Project.id))).all()
+    documents = {}
+    for start in range(0, len(ids), DOCUMENTS_BATCH_SIZE):
+        batch = ids[start:start + DOCUMENTS_BATCH_SIZE]
+        query = (select(Project).filter(Project.id.in_(batch))
+                 .options(*PROJECT_LOAD_OPTIONS)
+                 .execution_options(populate_existing=True))
+        projects = (await session.scalars(query)).all()
+        batch_snapshot = snapshot or await reference_data.ensure(session, projects)
+        rows = [{'id_project': project.id,
+                 'document': build_project_response(project, batch_snapshot).model_dump_json(),
+                 'updated_date': datetime.now()} for project in projects]
+        if rows:
+            await session.execute(build_upsert(ProjectDocument, session.get_bind().dialect.name, rows,
+                                               update_columns=('document', 'updated_date')))
+        documents.update((row['id_project'], row['document']) for row in rows)
+    return documents
+
+
+async def delete_project_documents(session, id_project: int):
+    await session.execute(delete(ProjectDocument).filter_by(id_project=id_project))
+
+
+async def backfill_project_documents(session) -> int:
+    """Собирает документы проектов, у которых их нет (записаны до появления таблицы).
+    Вызывается при старте, чтобы чтение каталога не писало в базу."""
+    async with unit_of_work(session):
+        missing = select(ProjectDocument.id_project)
+        return len(await materialize_projects(session, Project.id.not_in(missing)))
+
+
+async def fill_missing_documents(session, rows) -> list[str]:
+    """Документы из строк выборки (id, document); отсутствующие (проект записан в обход
+    сервиса после старта) собираются на месте. Проекты, удаленные между запросами, пропускаются."""
+    missing = [row.id for row in rows if row.document is None]
+    built = {}
+    if missing:
+        async with unit_of_work(session):
+            built = await materialize_projects(session, Project.id.in_(missing))
+    return [row.document if row.document is not None else built[row.id]
+            for row in rows if row.document is not None or row.id in built]
@@ -0,0 +1,75 @@
+import logging
+from datetime import date
+from sqlalchemy import select, insert, delete, func, text
+from config.orders import ORDER_ARCHIVE_BATCH_SIZE
+from models.orders import Order, OrderArchive
+from utils.order_status import FINAL_STATUSES, archive_cutoff
+from utils.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = [column.name for column in Order.__table__.columns]
+# OrderRepository.needs_archive считает, что все даты архивного заказа раньше archive_cutoff
+ARCHIVE_DATE_COLUMNS = ('created_date', 'updated_date', 'payment_date', 'start_date', 'end_date')
+
+
+def archivable(cutoff: date) -> list:
+    """Завершенный заказ, у которого ни одна дата не позже cutoff."""
+    criteria = [Order.status.in_([status.value for status in FINAL_STATUSES])]
+    for name in ARCHIVE_DATE_COLUMNS:
+        column = getattr(Order, name)
+        criteria.append(column < cutoff if name == 'created_date' else (column.is_(None) | (column < cutoff)))
+    return criteria
+
+
+async def reserve_archived_ids(session):
+    """Поднимает AUTO_INCREMENT orders выше всех id архива, чтобы новый заказ не получил архивный id.
+
+    MySQL до 8.0 после рестарта берет счетчик как max(id) + 1 по orders, поэтому
+    вызывается и после каждой пачки, и при старте приложения. В SQLite у orders
+    AUTOINCREMENT, и id там не переиспользуются сами.
+    """
+    if session.get_bind().dialect.name != 'mysql':
+        return
+    top = await session.scalar(select(func.max(OrderArchive.id)))
+    if top:
+        # ALTER TABLE коммитит неявно, поэтому вне пачки; значение ниже max(id) + 1 MySQL не примет
+        await session.execute(text(f'ALTER TABLE orders AUTO_INCREMENT = {int(top) + 1}'))
+        await session.commit()
+
+
+async def archive_orders(session, cutoff: date | None = None, batch_size: int = ORDER_ARCHIVE_BATCH_SIZE) -> int:
+    """Переносит завершенные и отмененные заказы, все даты которых раньше cutoff, в orders_archive.
+
+    Каждая пачка - отдельная транзакция: INSERT ... SELECT в архив и DELETE из orders
+    по одному и тому же списку id. Строки, заблокированные пользователями, пропускаются
+    (SKIP LOCKED) и уйдут при следующем запуске. Заказ, чей id уже есть в архиве,
+    не переносится и пишется в лог. Сводка orders_stats считается по обеим
+    таблицам и не меняется, order_events ссылается на id без внешнего ключа.
+    cutoff позже archive_cutoff() не принимается: на это опирается чтение архива.
+    Возвращает число перенесенных заказов.
+    """
+    cutoff = min(cutoff or archive_cutoff(), archive_cutoff())
+    moved, last_id = 0, 0
+    while True:
+        async with unit_of_work(session):
+            query = (select(Order.id)
+                     .filter(Order.id > last_id, *archivable(cutoff))
+                     .order_by(Order.id).limit(batch_size)
+                     .with_for_update(skip_locked=True))
+            ids = (await session.scalars(query)).all()
+            if not ids:
+                break
+            last_id = ids[-1]
+            taken = set((await session.scalars(select(OrderArchive.id).filter(OrderArchive.id.in_(ids)))).all())
+            if taken:
+                logger.warning('orders %s are already in orders_archive, left in orders', sorted(taken))
+                ids = [id for id in ids if id not in taken]
+            if ids:
+                columns = [getattr(Order, name) for name in ARCHIVE_COLUMNS]
+                await session.execute(insert(OrderArchive).from_select(
+                    ARCHIVE_COLUMNS, select(*columns).filter(Order.id.in_(ids))))
+                await session.execute(delete(Order).filter(Order.id.in_(ids)))
+        moved += len(ids)
+        await reserve_archived_ids(session)
+    return moved
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from config.database import SessionLocal
+from config.orders import (ORDER_EVENTS_BROKER, ORDER_EVENTS_POLL_INTERVAL, ORDER_EVENTS_QUEUE_SIZE,
+                           ORDER_EVENTS_BACKLOG_BATCH)
+from models.orders import OrderEvent
+from schemas.orders import OrderEventResponse
+
+logger = logging.getLogger(__name__)
+
+PENDING_EVENTS_KEY = 'order_events' # session.info: события транзакции, которые уйдут подписчикам после commit
+LAGGED = object() # сигнал подписчику: очередь переполнилась, пропущенное нужно дочитать из order_events
+
+
+def event_message(order_event: OrderEvent) -> dict:
+    return OrderEventResponse.model_validate(order_event).model_dump(mode='json')
+
+
+class Subscription:
+    """Очередь одного потока. Пока клиент молчит, стоит только она и ожидающая корутина."""
+
+    def __init__(self, id_customer: int | None):
+        self.id_customer = id_customer # None - все заказы (администратор)
+        self.queue = asyncio.Queue(ORDER_EVENTS_QUEUE_SIZE)
+        self.lagged = False
+
+    def put(self, message: dict):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Медленный клиент не задерживает остальных: очередь сбрасывается, он дочитает из базы
+            self.lagged = True
+            self.drain()
+            self.queue.put_nowait(LAGGED)
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def reset(self):
+        self.lagged = False
+        self.drain()
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class OrderEventBroker(ABC):
+    """Раздача событий заказов подписчикам внутри процесса.
+
+    publish вызывается после commit транзакции, записавшей события. Подкласс
+    решает, откуда берутся события: из своего процесса или из общего источника.
+    """
+
+    def __init__(self):
+        self.subscribers: dict[int | None, set[Subscription]] = {}
+
+    def subscribe(self, id_customer: int | None) -> Subscription:
+        subscription = Subscription(id_customer)
+        self.subscribers.setdefault(id_customer, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.subscribers.get(subscription.id_customer)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[subscription.id_customer]
+
+    @abstractmethod
+    def publish(self, messages: list[dict]):
+        pass
+
+    def fan_out(self, message: dict):
+        for key in (message['id_customer'], None):
+            for subscription in self.subscribers.get(key, ()):
+                subscription.put(message)
+
+    async def close(self):
+        pass
+
+
+class MemoryBroker(OrderEventBroker):
+    """События своего процесса; подходит, когда воркер один."""
+
+    def publish(self, messages: list[dict]):
+        for message in messages:
+            self.fan_out(message)
+
+
+class DatabaseBroker(OrderEventBroker):
+    """События всех воркеров: один опрос order_events на воркер, сколько бы ни было подписчиков.
+
+    Опрос идет, только пока есть подписчики. Последние POLL_LOOKBACK id перечитываются:
+    транзакция с меньшим id может закоммититься позже транзакции с большим.
+    """
+    POLL_LOOKBACK = 100
+
+    def __init__(self, interval: float = ORDER_EVENTS_POLL_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._poller: asyncio.Task | None = None
+
+    def subscribe(self, id_customer: int | None) -> Subscription:
+        subscription = super().subscribe(id_customer)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        return subscription
+
+    def publish(self, messages: list[dict]):
+        pass # подписчики получат события из базы, в том числе свои
+
+    async def _poll(self):
+        async with SessionLocal() as session:
+            last_id = await session.scalar(select(func.max(OrderEvent.id))) or 0
+            seen = set((await session.scalars(
+                select(OrderEvent.id).filter(OrderEvent.id > last_id - self.POLL_LOOKBACK))).all())
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                async with SessionLocal() as session:
+                    query = (select(OrderEvent).filter(OrderEvent.id > last_id - self.POLL_LOOKBACK)
+                             .order_by(OrderEvent.id))
+                    events = (await session.scalars(query)).all()
+            except Exception:
+                logger.exception('order events poll failed')
+                continue
+            for order_event in events:
+                if order_event.id in seen or order_event.id <= last_id - self.POLL_LOOKBACK:
+                    continue
+                seen.add(order_event.id)
+                self.fan_out(event_message(order_event))
+            if events:
+                last_id = max(last_id, events[-1].id)
+            seen = {id for id in seen if id > last_id - self.POLL_LOOKBACK}
+
+    async def close(self):
+        if self._poller:
+            self._poller.cancel()
+
+
+BROKERS = {'memory': MemoryBroker, 'database': DatabaseBroker}
+order_events_broker: OrderEventBroker = BROKERS[ORDER_EVENTS_BROKER]()
+
+
+def queue_event(session, order_event: OrderEvent):
+    """Событие уйдет подписчикам, только если транзакция закоммитится."""
+    session.info.setdefault(PENDING_EVENTS_KEY, []).append(order_event)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    events = session.info.pop(PENDING_EVENTS_KEY, None)
+    if events:
+        order_events_broker.publish([event_message(order_event) for order_event in events])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+async def load_order_events(id_customer: int | None, after_id: int) -> list[dict]:
+    """Следующая пачка событий после after_id; своя короткая сессия, чтобы поток не держал соединение."""
+    query = select(OrderEvent).filter(OrderEvent.id > after_id)
+    if id_customer is not None:
+        query = query.filter(OrderEvent.id_customer == id_customer)
+    async with SessionLocal() as session:
+        events = await session.scalars(query.order_by(OrderEvent.id).limit(ORDER_EVENTS_BACKLOG_BATCH))
+        return [event_message(order_event) for order_event in events]
+
+
+async def latest_event_id() -> int:
+    async with SessionLocal() as session:
+        return await session.scalar(select(func.max(OrderEvent.id))) or 0
+
+
+async def order_event_stream(id_customer: int | None, last_event_id: int | None, keepalive: float):
+    """События заказов для SSE и WebSocket; None - ничего не пришло за keepalive секунд.
+
+    С last_event_id сначала отдаются события из order_events после него, потом живые.
+    Без него поток начинается с текущего конца журнала: и при переполнении очереди
+    дочитывается только то, что пришло после подписки, а не вся история.
+    Подписка делается до чтения базы, поэтому на стыке ничего не теряется, а повторы
+    отсекаются по id.
+    """
+    subscription = order_events_broker.subscribe(id_customer)
+    try:
+        resync = last_event_id is not None
+        last_id = last_event_id if resync else await latest_event_id()
+        delivered = set()
+        while True:
+            if resync:
+                subscription.reset()
+                delivered = set()
+                while True:
+                    messages = await load_order_events(id_customer, last_id)
+                    for message in messages:
+                        delivered.add(message['id'])
+                        last_id = message['id']
+                        yield message
+                    if len(messages) < ORDER_EVENTS_BACKLOG_BATCH:
+                        break
+                resync = False
+            try:
+                message = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if message is LAGGED:
+                resync = True
+                continue
+            if message['id'] in delivered:
+                continue
+            last_id = max(last_id, message['id'])
+            yield message
+    finally:
+        order_events_broker.unsubscribe(subscription)
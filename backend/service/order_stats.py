@@ -0,0 +1,145 @@
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select, delete, func, case, cast, Integer
+from models.orders import Order, OrderArchive, OrderStats
+from models.projects import Project
+from utils.abstract_repository import build_upsert
+
+STATS_KEY = ('month', 'status', 'id_city', 'id_category')
+STATS_MEASURES = ('orders_count', 'final_price_sum', 'duration_days_sum', 'duration_count')
+
+
+def _month(dialect: str, column):
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m-01')
+    return func.strftime('%Y-%m-01', column)
+
+
+def _duration(dialect: str, model):
+    if dialect == 'mysql':
+        return func.datediff(model.end_date, model.start_date)
+    return cast(func.julianday(model.end_date) - func.julianday(model.start_date), Integer)
+
+
+def aggregate_orders(dialect: str, *criteria, model=Order):
+    """Сводка, посчитанная с нуля по заказам (GROUP BY) - в той же форме, что и orders_stats.
+    model=OrderArchive - то же по архиву."""
+    has_duration = model.start_date.is_not(None) & model.end_date.is_not(None)
+    month = _month(dialect, model.created_date)
+    return (select(month.label('month'), model.status.label('status'),
+                   Project.id_city.label('id_city'), Project.id_category.label('id_category'),
+                   func.count(model.id).label('orders_count'),
+                   func.coalesce(func.sum(model.final_price), 0).label('final_price_sum'),
+                   func.sum(case((has_duration, _duration(dialect, model)), else_=0)).label('duration_days_sum'),
+                   func.sum(case((has_duration, 1), else_=0)).label('duration_count'))
+            .join(Project, Project.id == model.id_project)
+            .filter(*criteria)
+            .group_by(month, model.status, Project.id_city, Project.id_category))
+
+
+async def load_aggregate(session, *criteria, model=Order, result: dict | None = None) -> dict[tuple, dict]:
+    """{(month, status, id_city, id_category): {мера: значение}} по заказам, подходящим под условия.
+    С result значения прибавляются к уже посчитанным (заказы и архив)."""
+    rows = await session.execute(aggregate_orders(session.get_bind().dialect.name, *criteria, model=model))
+    result = {} if result is None else result
+    for row in rows.mappings():
+        key = (date.fromisoformat(str(row['month'])[:10]), row['status'], row['id_city'], row['id_category'])
+        values = {'orders_count': int(row['orders_count']),
+                  'final_price_sum': Decimal(str(row['final_price_sum'])),
+                  'duration_days_sum': int(row['duration_days_sum']),
+                  'duration_count': int(row['duration_count'])}
+        if key in result:
+            values = {measure: result[key][measure] + value for measure, value in values.items()}
+        result[key] = values
+    return result
+
+
+async def load_total_aggregate(session, *criteria, archive_criteria=()) -> dict[tuple, dict]:
+    """Сводка по orders и orders_archive вместе: перенос в архив ее не меняет."""
+    result = await load_aggregate(session, *criteria)
+    return await load_aggregate(session, *archive_criteria, model=OrderArchive, result=result)
+
+
+async def apply_stats_delta(session, before: dict[tuple, dict], after: dict[tuple, dict]):
+    """Прибавляет к orders_stats разницу after - before одним upsert; нулевые разницы не пишутся."""
+    rows = []
+    for key in before.keys() | after.keys():
+        old, new = before.get(key, {}), after.get(key, {})
+        delta = {measure: new.get(measure, 0) - old.get(measure, 0) for measure in STATS_MEASURES}
+        if any(delta.values()):
+            rows.append({**dict(zip(STATS_KEY, key)), **delta})
+    if rows:
+        await session.execute(build_upsert(OrderStats, session.get_bind().dialect.name, rows,
+                                           increment_columns=STATS_MEASURES))
+
+
+@asynccontextmanager
+async def track_order_stats(session, *criteria, archive_criteria=None):
+    """Обновляет сводку по заказам, подходящим под условия, на изменения внутри блока.
+
+    Заказы агрегируются до и после записи, в сводку идет разница. Вызывается
+    внутри unit_of_work, чтобы сводка менялась в той же транзакции, что и заказ.
+    archive_criteria задаются, когда запись затрагивает и архивные заказы (город
+    или категория проекта).
+    """
+    async def load():
+        if archive_criteria is None:
+            return await load_aggregate(session, *criteria)
+        return await load_total_aggregate(session, *criteria, archive_criteria=archive_criteria)
+
+    before = await load()
+    yield
+    await apply_stats_delta(session, before, await load())
+
+
+async def rebuild_order_stats(session) -> int:
+    """Пересчитывает сводку целиком; возвращает число строк."""
+    after = await load_total_aggregate(session)
+    await session.execute(delete(OrderStats))
+    await apply_stats_delta(session, {}, after)
+    return len(after)
+
+
+async def check_order_stats(session) -> list[tuple[tuple, dict, dict]]:
+    """Сравнивает orders_stats со сводкой, посчитанной с нуля: [(ключ, ожидалось, в таблице), ...]."""
+    expected = await load_total_aggregate(session)
+    actual = {}
+    for row in await session.scalars(select(OrderStats)):
+        values = {measure: getattr(row, measure) for measure in STATS_MEASURES}
+        if any(values.values()):
+            actual[tuple(getattr(row, column) for column in STATS_KEY)] = values
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        old, new = expected.get(key, {}), actual.get(key, {})
+        if any(old.get(measure, 0) != new.get(measure, 0) for measure in STATS_MEASURES):
+            mismatches.append((key, old, new))
+    return mismatches
+
+
+async def get_order_stats(session, group_by: list[str], month_from: date | None = None,
+                          month_to: date | None = None, **filter) -> list[dict]:
+    """Сводка, сгруппированная по выбранным измерениям; читается только маленькая таблица orders_stats."""
+    columns = [getattr(OrderStats, column) for column in group_by]
+    query = (select(*columns,
+                    func.sum(OrderStats.orders_count).label('orders_count'),
+                    func.sum(OrderStats.final_price_sum).label('final_price_sum'),
+                    func.sum(OrderStats.duration_days_sum).label('duration_days_sum'),
+                    func.sum(OrderStats.duration_count).label('duration_count'))
+             .filter(*(getattr(OrderStats, key) == value for key, value in filter.items()))
+             .group_by(*columns)
+             .having(func.sum(OrderStats.orders_count) > 0)
+             .order_by(*columns))
+    if month_from:
+        query = query.filter(OrderStats.month >= month_from.replace(day=1))
+    if month_to:
+        query = query.filter(OrderStats.month <= month_to)
+    result = []
+    for row in (await session.execute(query)).mappings():
+        item = {column: row[column] for column in group_by}
+        item['orders_count'] = row['orders_count']
+        item['final_price_sum'] = row['final_price_sum'] or 0
+        item['avg_duration_days'] = (round(row['duration_days_sum'] / row['duration_count'], 1)
+                                     if row['duration_count'] else None)
+        result.append(item)
+    return result
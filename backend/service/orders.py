@@ -1,30 +1,288 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
 from dependencies import OrderRepository
+from config.database import SessionLocal
 from schemas.orders import CreateOrder, UpdateOrder
 from schemas.projects import *
+from schemas.users import UserResponse
+from service.projects import ProjectService
 from utils.enums import Status, OrderStatus
+from utils.order_status import ORDER_STATUS_RULES, can_transition
+from utils.pagination import PageParams
+from utils.unit_of_work import unit_of_work
+from service.order_stats import load_aggregate, apply_stats_delta, track_order_stats, get_order_stats
+from service.order_events import queue_event
+from sqlalchemy import select, insert, func, union_all
+from sqlalchemy.orm import joinedload
+from models.orders import Order, OrderArchive, OrderEvent
+from models.users import User
+from models.projects import Project
+
+def order_load_options(model=Order):
+    # Пользователь и проект подтягиваются JOIN-ом, причем только те колонки,
+    # которые есть в UserResponse и ShortProjectResponse
+    return (
+        joinedload(model.user).load_only(
+            *[getattr(User, field) for field in UserResponse.model_fields]),
+        joinedload(model.project).load_only(
+            *[getattr(Project, field) for field in ShortProjectResponse.model_fields]),
+    )
+
+ORDER_LOAD_OPTIONS = order_load_options(Order)
+ARCHIVE_LOAD_OPTIONS = order_load_options(OrderArchive)
+
+ORDER_EXPORT_FIELDS = ('id', 'status', 'created_date', 'updated_date', 'start_price', 'final_price',
+                       'payment_date', 'start_date', 'end_date')
+
+def export_columns(model=Order):
+    # Колонки выгрузки: заказ плоско вместе с пользователем и проектом
+    return (
+        *((name, getattr(model, name)) for name in ORDER_EXPORT_FIELDS),
+        ('user_id', User.id), ('user_name', User.name), ('user_org_name', User.org_name),
+        ('user_email', User.email), ('user_phone', User.phone),
+        ('project_id', Project.id), ('project_name', Project.name), ('project_slug', Project.slug),
+    )
+
+EXPORT_COLUMNS = export_columns(Order)
+EXPORT_CHUNK_SIZE = 1000 # строк с сервера за раз и на один кусок ответа
+
+
+def _export_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _changed_fields(order: Order | None, changes: dict) -> dict:
+    """{поле: [было, стало]} для полей, значение которых действительно меняется."""
+    payload = {}
+    for key, value in changes.items():
+        old = getattr(order, key) if order else None
+        if old != value:
+            payload[key] = [_export_value(old), _export_value(value)]
+    return payload
+
 
 class OrderService:
-    def __init__(self, order_repository: OrderRepository):
+    def __init__(self, order_repository: OrderRepository, order_event_repository: OrderRepository,
+                 project_service: ProjectService):
         self.order_repository = order_repository
+        self.order_event_repository = order_event_repository
+        self.project_service = project_service
 
     # Order
-    def get_all_orders_filter_by(self, **filter):
-        return self.order_repository.get_all_filter_by(**filter)
+    async def get_all_orders_filter_by(self, page: PageParams, **filter):
+        query = self.order_repository.select_filter_by(**filter).options(*ORDER_LOAD_OPTIONS)
+        if not self.order_repository.needs_archive(**filter):
+            return await self.order_repository.paginate(query, page)
+        archive_query = self.order_repository.select_archive_filter_by(**filter).options(*ARCHIVE_LOAD_OPTIONS)
+        return await self.order_repository.paginate_with_archive(query, archive_query, page)
     
-    def get_one_order_filter_by(self, **filter):
-        return self.order_repository.get_one_filter_by(**filter)
+    async def get_one_order_filter_by(self, **filter):
+        return await self.order_repository.get_one_filter_by(**filter)
+
+    async def get_full_order_filter_by(self, **filter):
+        """Заказ, которого нет в orders, ищется в архиве: старые ссылки продолжают работать."""
+        query = self.order_repository.select_filter_by(**filter).options(*ORDER_LOAD_OPTIONS)
+        order = await self.order_repository.fetch_one(query)
+        if order is None:
+            query = self.order_repository.select_archive_filter_by(**filter).options(*ARCHIVE_LOAD_OPTIONS)
+            order = await self.order_repository.fetch_one(query)
+        return order
     
-    def create_order(self, new_order: dict):
-        create_order = self.order_repository.add(new_order)
+    async def create_order(self, new_order: dict):
+        session = self.order_repository.session
+        async with unit_of_work(session):
+            create_order = await self.order_repository.add(new_order)
+            await apply_stats_delta(session, {}, await load_aggregate(session, Order.id == create_order.id))
+            await self._add_event(create_order, 'created', new_order.get('id_user'),
+                                  to_status=create_order.status, payload=_changed_fields(None, new_order))
         if not create_order:
             return Status.FAILED.value
         return create_order
     
-    def update_order(self, id: int, entity: dict):
-        entity['id'] = id
-        entity = {k: v for k, v in entity.items() if v is not None}
-        return self.order_repository.update(entity)
+    async def update_order(self, id: int, changes: dict, actor: int | None = None):
+        """Меняет заказ по таблице ORDER_STATUS_RULES; changes - только переданные поля.
+
+        Заказ читается с блокировкой строки, поэтому два одновременных перехода не
+        проверяются по одному и тому же старому статусу. Статус, даты, сводка, событие
+        и отметка проекта выполненным пишутся одной транзакцией.
+        Возвращает заказ или Status.NOT_FOUND / Status.INVALID_TRANSITION.
+        """
+        session = self.order_repository.session
+        async with unit_of_work(session):
+            order = await self.order_repository.fetch_one(
+                select(Order).filter_by(id=id).with_for_update().execution_options(populate_existing=True))
+            if not order:
+                return Status.NOT_FOUND.value
+            changes = {k: v for k, v in changes.items() if v is not None}
+            status = changes.pop('status', None)
+            from_status = order.status
+            rule = None
+            if status is not None and status != order.status:
+                if not can_transition(order.status, status):
+                    return Status.INVALID_TRANSITION.value
+                rule = ORDER_STATUS_RULES[OrderStatus(status)]
+                changes['status'] = OrderStatus(status).value
+                if rule.stamp and getattr(order, rule.stamp) is None and rule.stamp not in changes:
+                    changes[rule.stamp] = date.today()
+
+            payload = _changed_fields(order, changes)
+            if not payload:
+                return order
+            changes['id'] = id
+            changes['updated_date'] = date.today()
+            async with track_order_stats(session, Order.id == id):
+                await self.order_repository.update(changes)
+            await self._add_event(order, 'status_changed' if rule else 'updated', actor,
+                                  from_status=from_status, to_status=changes.get('status', from_status),
+                                  payload=payload)
+            if rule and rule.marks_project_done:
+                await self.project_service.update_project(order.id_project, UpdateProject(is_done=True))
+        return order
     
-    def delete_order(self, id: int):
-        return self.order_repository.delete(id)
+    async def delete_order(self, id: int, actor: int | None = None):
+        session = self.order_repository.session
+        async with unit_of_work(session):
+            order = await self.order_repository.get_one_filter_by(id=id)
+            async with track_order_stats(session, Order.id == id):
+                await self.order_repository.delete(id)
+            if order:
+                await self._add_event(order, 'deleted', actor, from_status=order.status)
+
+    async def transition_orders(self, ids: list[int], status: OrderStatus, actor: int | None = None) -> list[dict]:
+        """Один переход статуса для набора заказов; исход по каждому id в порядке запроса.
+
+        Заказы читаются одним SELECT с блокировкой строк и проверяются по ORDER_STATUS_RULES
+        в памяти. Подходящие меняются одним UPDATE (дата перехода - через COALESCE, чтобы
+        не затереть уже стоящую), события пишутся одним INSERT, проекты - одним UPDATE.
+        """
+        status = OrderStatus(status)
+        rule = ORDER_STATUS_RULES[status]
+        today = date.today()
+        session = self.order_repository.session
+        async with unit_of_work(session):
+            columns = [Order.id, Order.status, Order.id_user, Order.id_project]
+            if rule.stamp:
+                columns.append(getattr(Order, rule.stamp).label('stamp'))
+            query = select(*columns).filter(Order.id.in_(ids)).order_by(Order.id).with_for_update()
+            orders = {row.id: row for row in (await session.execute(query)).all()}
+
+            results, changed = [], []
+            for id in ids:
+                order = orders.get(id)
+                if order is None:
+                    outcome = Status.NOT_FOUND
+                elif not can_transition(order.status, status):
+                    outcome = Status.INVALID_TRANSITION
+                else:
+                    outcome = Status.SUCCESS
+                    if order.status != status:
+                        changed.append(order)
+                results.append({'id': id, 'status': outcome.value, 'from_status': order.status if order else None})
+            if not changed:
+                return results
+
+            changed_ids = [order.id for order in changed]
+            values = {'status': status.value, 'updated_date': today}
+            if rule.stamp:
+                values[rule.stamp] = func.coalesce(getattr(Order, rule.stamp), today)
+            async with track_order_stats(session, Order.id.in_(changed_ids)):
+                await self.order_repository.update_where(values, Order.id.in_(changed_ids))
+
+            events = []
+            for order in changed:
+                payload = {'status': [order.status, status.value]}
+                if rule.stamp and order.stamp is None:
+                    payload[rule.stamp] = [None, today.isoformat()]
+                events.append(self._event_row(order.id, order.id_user, 'status_changed', actor,
+                                              order.status, status.value, payload))
+            await self._add_events(events)
+            if rule.marks_project_done:
+                await self.project_service.mark_projects_done(order.id_project for order in changed)
+        return results
+
+    @staticmethod
+    def _event_row(id_order: int, id_customer: int, event_type: str, actor: int | None,
+                   from_status: str | None = None, to_status: str | None = None, payload: dict | None = None):
+        return {'id_order': id_order, 'id_customer': id_customer, 'event_type': event_type, 'id_user': actor,
+                'from_status': from_status, 'to_status': to_status,
+                'payload': json.dumps(payload, ensure_ascii=False) if payload else None,
+                'created_at': datetime.now()}
+
+    async def _add_event(self, order: Order, event_type: str, actor: int | None,
+                         from_status: str | None = None, to_status: str | None = None, payload: dict | None = None):
+        order_event = await self.order_event_repository.add(
+            self._event_row(order.id, order.id_user, event_type, actor, from_status, to_status, payload))
+        queue_event(self.order_event_repository.session, order_event)
+        return order_event
+
+    async def _add_events(self, rows: list[dict]):
+        """События одним INSERT. RETURNING в MySQL нет, поэтому новые строки перечитываются:
+        заказы заблокированы, и события с id больше прежнего максимума - только наши."""
+        session = self.order_event_repository.session
+        id_orders = [row['id_order'] for row in rows]
+        last_id = await session.scalar(
+            select(func.max(OrderEvent.id)).filter(OrderEvent.id_order.in_(id_orders))) or 0
+        await session.execute(insert(OrderEvent), rows)
+        query = select(OrderEvent).filter(OrderEvent.id_order.in_(id_orders), OrderEvent.id > last_id)
+        for order_event in await self.order_event_repository.fetch_all(query.order_by(OrderEvent.id)):
+            queue_event(session, order_event)
+
+    async def get_events(self, page: PageParams, **filter):
+        query = self.order_event_repository.select_filter_by(**filter)
+        return await self.order_event_repository.paginate(query, page)
+
+    async def get_stats(self, group_by: list[str], **filter):
+        return await get_order_stats(self.order_repository.session, group_by, **filter)
+
+
+    def select_export(self, created_from: date | None = None, created_to: date | None = None, **filter):
+        """Плоская выборка для выгрузки: колонки, а не объекты ORM, пользователь и проект через JOIN.
+        Когда фильтры затрагивают архив, к ней через UNION ALL добавляется та же выборка по нему."""
+        def select_model(model):
+            query = (select(*(column.label(name) for name, column in export_columns(model)))
+                     .join(User, User.id == model.id_user)
+                     .join(Project, Project.id == model.id_project)
+                     .filter(*(getattr(model, key) == value for key, value in filter.items())))
+            if created_from:
+                query = query.filter(model.created_date >= created_from)
+            if created_to:
+                query = query.filter(model.created_date <= created_to)
+            return query
+
+        if self.order_repository.needs_archive(created_from=created_from, created_to=created_to, **filter):
+            return union_all(select_model(Order), select_model(OrderArchive)).order_by('id')
+        return select_model(Order).order_by(Order.id)
+
+    @staticmethod
+    async def export_orders(query, format: str):
+        """Куски CSV/NDJSON по мере чтения серверного курсора: память не зависит от числа заказов.
 
+        Генератор открывает свою сессию: StreamingResponse дочитывает его уже после того,
+        как FastAPI закрыл сессию зависимости get_session.
+        """
+        names = [name for name, _ in EXPORT_COLUMNS]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if format == 'csv':
+            writer.writerow(names)
+            yield buffer.getvalue().encode('utf-8-sig')
+        async with SessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            async for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                for row in rows:
+                    values = [_export_value(value) for value in row]
+                    if format == 'csv':
+                        writer.writerow(values)
+                    else:
+                        buffer.write(json.dumps(dict(zip(names, values)), ensure_ascii=False))
+                        buffer.write('\n')
+                yield buffer.getvalue().encode()
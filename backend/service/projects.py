@@ -1,8 +1,30 @@
+import csv
+import time
+from contextlib import nullcontext
+from bisect import bisect_right
+from itertools import islice
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from starlette.concurrency import run_in_threadpool
 from dependencies import ProjectRepository
 from schemas.projects import *
+from config.catalog import FACET_VALUES_LIMIT, IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from service.catalog import reindex_projects
+from service.order_stats import track_order_stats
+from service.documents import (PROJECT_LOAD_OPTIONS, materialize_projects, delete_project_documents,
+                               fill_missing_documents)
 from utils.enums import Status
-from sqlalchemy.orm import joinedload
-from models.projects import Project, ProjectAttribute
+from utils.facets import facet_index
+from utils.search import search_index
+from utils.suggest import suggest_index
+from utils.units import normalize_value
+from utils.reference import reference_data, paginate_items, normalize_name
+from utils.unit_of_work import unit_of_work
+from utils.pagination import PageParams, encode_cursor, decode_cursor
+from sqlalchemy import select, insert
+from models.projects import Project, ProjectAttribute, ProjectDocument, Unit
+from models.orders import Order, OrderArchive
 
 class ProjectService:
     def __init__(self, project_repository: ProjectRepository, 
@@ -18,182 +40,558 @@ class ProjectService:
         self.project_attribute_repository = project_attribute_repository
         self.project_image_repository = project_image_repository
 
+    async def _raise_if_slug_taken(self, slug: str | None, id: int | None = None):
+        """После IntegrityError: если slug занят другим проектом (ux_projects_slug) - 400, иначе ошибка не про slug."""
+        if slug is None:
+            return
+        query = select(Project.id).filter(Project.slug == slug)
+        if id is not None:
+            query = query.filter(Project.id != id)
+        if await self.project_repository.session.scalar(query.limit(1)) is not None:
+            raise HTTPException(status_code=400, detail={'status': Status.SLUG_ALREADY_EXISTS.value})
+
     
     # Category
-    def get_all_categories_filter_by(self, **filter):
-        return self.category_repository.get_all_filter_by(**filter)
+    async def get_all_categories_filter_by(self, page: PageParams, **filter):
+        return paginate_items(reference_data.snapshot.categories.values(), page, **filter)
     
-    def get_one_category_filter_by(self, **filter):
-        return self.category_repository.get_one_filter_by(**filter)
+    async def get_category(self, id: int) -> CategoryResponse | None:
+        category = reference_data.snapshot.categories.get(id)
+        if category is None: # создана в другом воркере и еще не попала в снимок
+            category = await self.category_repository.get_one_filter_by(id=id)
+            category = CategoryResponse.model_validate(category, from_attributes=True) if category else None
+        return category
+
+    async def get_one_category_filter_by(self, **filter):
+        return await self.category_repository.get_one_filter_by(**filter)
     
-    def create_category(self, new_category: CreateCategory):
-        create_category = self.category_repository.add(new_category.model_dump())
+    async def create_category(self, new_category: CreateCategory):
+        async with unit_of_work(self.category_repository.session):
+            create_category = await self.category_repository.add(new_category.model_dump())
         if not new_category:
             return Status.FAILED.value
+        suggest_index.put('category', create_category.id, create_category.name)
+        await reference_data.rebuild(self.category_repository.session)
         return create_category
     
-    def update_category(self, id: int, upd_category: UpdateCategory):
+    async def update_category(self, id: int, upd_category: UpdateCategory):
         entity = upd_category.model_dump()
         entity['id'] = id
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_category = self.category_repository.update(entity)
+        session = self.category_repository.session
+        async with unit_of_work(session):
+            update_category = await self.category_repository.update(entity)
+            await materialize_projects(session, Project.id_category == id, snapshot=await reference_data.load(session))
+        await reference_data.rebuild(session)
+        if 'name' in entity: # название категории участвует в поиске
+            suggest_index.put('category', id, entity['name'])
+            await reindex_projects(session, id_category=id)
         return update_category
     
-    def delete_category(self, id: int):
-        return self.category_repository.delete(id)
+    async def delete_category(self, id: int):
+        async with unit_of_work(self.category_repository.session):
+            deleted = await self.category_repository.delete(id)
+        suggest_index.discard('category', id)
+        await reference_data.rebuild(self.category_repository.session)
+        return deleted
     
     
     # Unit 
-    def get_all_units_filter_by(self, **filter):
-        return self.unit_repository.get_all_filter_by(**filter)
+    async def get_all_units_filter_by(self, page: PageParams, **filter):
+        return paginate_items(reference_data.snapshot.units.values(), page, **filter)
     
-    def get_one_unit_filter_by(self, **filter):
-        return self.unit_repository.get_one_filter_by(**filter)
+    async def get_unit(self, id: int) -> UnitResponse | None:
+        unit = reference_data.snapshot.units.get(id)
+        if unit is None: # создана в другом воркере и еще не попала в снимок
+            unit = await self.unit_repository.get_one_filter_by(id=id)
+            unit = UnitResponse.model_validate(unit, from_attributes=True) if unit else None
+        return unit
+
+    async def get_one_unit_filter_by(self, **filter):
+        return await self.unit_repository.get_one_filter_by(**filter)
     
-    def create_unit(self, new_unit: CreateUnit):
-        create_unit = self.unit_repository.add(new_unit.model_dump())
+    async def create_unit(self, new_unit: CreateUnit):
+        async with unit_of_work(self.unit_repository.session):
+            create_unit = await self.unit_repository.add(new_unit.model_dump())
         if not new_unit:
             return Status.FAILED.value
+        await reference_data.rebuild(self.unit_repository.session)
         return create_unit
     
-    def update_unit(self, id: int, upd_unit: UpdateUnit):
+    async def update_unit(self, id: int, upd_unit: UpdateUnit):
         entity = upd_unit.model_dump()
         entity['id'] = id
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_unit = self.unit_repository.update(entity)
+        session = self.unit_repository.session
+        async with unit_of_work(session):
+            unit = await self.unit_repository.get_one_filter_by(id=id)
+            old_factor = unit.factor if unit else None
+            update_unit = await self.unit_repository.update(entity)
+            if old_factor and 'factor' in entity and entity['factor'] != old_factor:
+                # Значения в базовой единице пересчитываются одним UPDATE
+                await self.project_attribute_repository.update_by_filter(
+                    {'id_unit': id},
+                    {'value_number': ProjectAttribute.value_number * entity['factor'] / old_factor})
+            await materialize_projects(session, Project.id.in_(select(ProjectAttribute.id_project).filter_by(id_unit=id)),
+                                       snapshot=await reference_data.load(session))
+        await reference_data.rebuild(session)
         return update_unit
     
-    def delete_unit(self, id: int):
-        return self.unit_repository.delete(id)
+    async def delete_unit(self, id: int):
+        async with unit_of_work(self.unit_repository.session):
+            deleted = await self.unit_repository.delete(id)
+        await reference_data.rebuild(self.unit_repository.session)
+        return deleted
     
 
     # Attribute
-    def get_all_attributes_filter_by(self, **filter):
-        return self.attribute_repository.get_all_filter_by(**filter)
+    async def get_all_attributes_filter_by(self, page: PageParams, **filter):
+        return paginate_items(reference_data.snapshot.attributes.values(), page, **filter)
     
-    def get_one_attribute_filter_by(self, **filter):
-        return self.attribute_repository.get_one_filter_by(**filter)
+    async def get_attribute(self, id: int) -> AttributeResponse | None:
+        attribute = reference_data.snapshot.attributes.get(id)
+        if attribute is None: # создана в другом воркере и еще не попала в снимок
+            attribute = await self.attribute_repository.get_one_filter_by(id=id)
+            attribute = AttributeResponse.model_validate(attribute, from_attributes=True) if attribute else None
+        return attribute
+
+    async def get_one_attribute_filter_by(self, **filter):
+        return await self.attribute_repository.get_one_filter_by(**filter)
     
-    def create_attribute(self, new_attribute: CreateAttribute):
-        create_attribute = self.attribute_repository.add(new_attribute.model_dump())
+    async def create_attribute(self, new_attribute: CreateAttribute):
+        async with unit_of_work(self.attribute_repository.session):
+            create_attribute = await self.attribute_repository.add(new_attribute.model_dump())
         if not new_attribute:
             return Status.FAILED.value
+        await reference_data.rebuild(self.attribute_repository.session)
         return create_attribute
     
-    def update_attribute(self, id: int, upd_attribute: UpdateAttribute):
+    async def update_attribute(self, id: int, upd_attribute: UpdateAttribute):
         entity = upd_attribute.model_dump()
         entity['id'] = id
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_attribute = self.attribute_repository.update(entity)
+        session = self.attribute_repository.session
+        async with unit_of_work(session):
+            update_attribute = await self.attribute_repository.update(entity)
+            await materialize_projects(session, Project.id.in_(
+                select(ProjectAttribute.id_project).filter_by(id_attribute=id)),
+                snapshot=await reference_data.load(session))
+        await reference_data.rebuild(session)
         return update_attribute
     
-    def delete_attribute(self, id: int):
-        return self.attribute_repository.delete(id)
+    async def delete_attribute(self, id: int):
+        async with unit_of_work(self.attribute_repository.session):
+            deleted = await self.attribute_repository.delete(id)
+        await reference_data.rebuild(self.attribute_repository.session)
+        return deleted
     
 
     # Project Attribute
-    def get_all_project_attributes_filter_by(self, **filter):
-        return self.project_attribute_repository.get_all_filter_by(**filter)
+    async def get_all_project_attributes_filter_by(self, **filter):
+        return await self.project_attribute_repository.get_all_filter_by(**filter)
     
-    def get_one_project_attribute_filter_by(self, **filter):
-        return self.project_attribute_repository.get_one_filter_by(**filter)
+    async def get_one_project_attribute_filter_by(self, **filter):
+        return await self.project_attribute_repository.get_one_filter_by(**filter)
     
-    def create_project_attribute(self, new_project_attribute: ProjectAttributeForm):
-        create_project_attribute = self.project_attribute_repository.add(new_project_attribute.model_dump())
+    async def create_project_attribute(self, new_project_attribute: ProjectAttributeForm):
+        async with unit_of_work(self.project_attribute_repository.session):
+            create_project_attribute = await self.project_attribute_repository.add(new_project_attribute.model_dump())
         if not new_project_attribute:
             return Status.FAILED.value
         return create_project_attribute
     
-    def update_project_attribute(self, id: int, upd_project_attribute: ProjectAttributeForm):
+    async def update_project_attribute(self, id: int, upd_project_attribute: ProjectAttributeForm):
         entity = upd_project_attribute.model_dump()
         entity['id'] = id
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_project_attribute = self.project_attribute_repository.update(entity)
+        async with unit_of_work(self.project_attribute_repository.session):
+            update_project_attribute = await self.project_attribute_repository.update(entity)
         return update_project_attribute
     
-    def delete_project_attribute(self, id: int):
-        return self.project_attribute_repository.delete(id)
+    async def delete_project_attribute(self, id: int):
+        async with unit_of_work(self.project_attribute_repository.session):
+            return await self.project_attribute_repository.delete(id)
     
 
     # Project Image
-    def get_all_project_images_filter_by(self, **filter):
-        return self.project_image_repository.get_all_filter_by(**filter)
+    async def get_all_project_images_filter_by(self, **filter):
+        return await self.project_image_repository.get_all_filter_by(**filter)
     
-    def get_one_project_image_filter_by(self, **filter):
-        return self.project_image_repository.get_one_filter_by(**filter)
+    async def get_one_project_image_filter_by(self, **filter):
+        return await self.project_image_repository.get_one_filter_by(**filter)
     
-    def create_project_image(self, data: ProjectImageForm):
-        create_project_image = self.project_image_repository.add(data.model_dump())
+    async def create_project_image(self, data: ProjectImageForm):
+        session = self.project_image_repository.session
+        async with unit_of_work(session):
+            create_project_image = await self.project_image_repository.add(data.model_dump())
+            await materialize_projects(session, Project.id == data.id_project)
         if not data:
             return Status.FAILED.value
         return create_project_image
     
-    def delete_project_image(self, id: int):
-        return self.project_image_repository.delete(id)
+    async def delete_project_image(self, id: int):
+        session = self.project_image_repository.session
+        async with unit_of_work(session):
+            image = await self.project_image_repository.get_one_filter_by(id=id)
+            deleted = await self.project_image_repository.delete(id)
+            if image:
+                await materialize_projects(session, Project.id == image.id_project)
+        return deleted
 
     
     # Project
-    def get_all_projects_filter_by(self, id_attribute: int, attribute_value: str, **filter):
-        query = self.project_repository.get_all_filter_by(**filter).options(
-            joinedload(Project.project_attribute).joinedload(ProjectAttribute.attribute),
-            joinedload(Project.project_attribute).joinedload(ProjectAttribute.unit)
-        )
-        if id_attribute and attribute_value:
-            query = query.join(ProjectAttribute).filter(
-                ProjectAttribute.id_attribute == id_attribute,
-                ProjectAttribute.value == attribute_value
-            )
-        projects = query.all()
-        return projects
-        
-    def get_one_project_filter_by(self, **filter):
-        return self.project_repository.get_one_filter_by(**filter)
-    
-    def create_project(self, new_project: CreateProject):
+    def _filter_projects(self, query, page: PageParams, id_attribute: int, attribute_value: str,
+                         attribute_gte: float | None, attribute_lte: float | None):
+        by_number = attribute_gte is not None or attribute_lte is not None or page.sort == 'attribute'
+        if id_attribute and (attribute_value or by_number):
+            query = (query.join(ProjectAttribute, ProjectAttribute.id_project == Project.id)
+                     .filter(ProjectAttribute.id_attribute == id_attribute))
+            if attribute_value:
+                query = query.filter(ProjectAttribute.value == attribute_value)
+            if attribute_gte is not None:
+                query = query.filter(ProjectAttribute.value_number >= attribute_gte)
+            if attribute_lte is not None:
+                query = query.filter(ProjectAttribute.value_number <= attribute_lte)
+        if page.sort == 'attribute':
+            query = query.filter(ProjectAttribute.value_number.is_not(None))
+        return query
+
+    async def get_all_projects_filter_by(self, page: PageParams, id_attribute: int, attribute_value: str,
+                                         attribute_gte: float | None = None, attribute_lte: float | None = None,
+                                         **filter):
+        """attribute_gte/attribute_lte и sort='attribute' работают по value_number атрибута id_attribute,
+        то есть в базовой единице, и идут по индексу (id_attribute, value_number)."""
+        query = self.project_repository.select_filter_by(**filter).options(*PROJECT_LOAD_OPTIONS)
+        query = self._filter_projects(query, page, id_attribute, attribute_value, attribute_gte, attribute_lte)
+        if page.sort == 'attribute':
+            sort_value = lambda project: next(attr.value_number for attr in project.project_attribute
+                                              if attr.id_attribute == id_attribute)
+            projects, next_cursor = await self.project_repository.paginate(
+                query, page, ProjectAttribute.value_number, sort_value)
+        else:
+            projects, next_cursor = await self.project_repository.paginate(query, page)
+        await reference_data.ensure(self.project_repository.session, projects)
+        return projects, next_cursor
+
+    async def get_project_documents_filter_by(self, page: PageParams, id_attribute: int, attribute_value: str,
+                                              attribute_gte: float | None = None,
+                                              attribute_lte: float | None = None, **filter):
+        """То же, что get_all_projects_filter_by, но отдает готовые JSON-документы проектов
+        из projects_documents, без загрузки объектов ORM: ([документ, ...], курсор)."""
+        columns = [Project.id, Project.name, ProjectDocument.document]
+        if page.sort == 'attribute':
+            columns.append(ProjectAttribute.value_number)
+        query = (select(*columns).select_from(Project)
+                 .outerjoin(ProjectDocument, ProjectDocument.id_project == Project.id)
+                 .filter(*(getattr(Project, key) == value for key, value in filter.items())))
+        query = self._filter_projects(query, page, id_attribute, attribute_value, attribute_gte, attribute_lte)
+        if page.sort == 'attribute':
+            rows, next_cursor = await self.project_repository.paginate_rows(
+                query, page, ProjectAttribute.value_number, lambda row: row.value_number)
+        else:
+            rows, next_cursor = await self.project_repository.paginate_rows(query, page)
+        return await fill_missing_documents(self.project_repository.session, rows), next_cursor
+
+    async def get_project_document(self, id: int) -> str | None:
+        query = (select(Project.id, ProjectDocument.document).select_from(Project)
+                 .outerjoin(ProjectDocument, ProjectDocument.id_project == Project.id)
+                 .filter(Project.id == id))
+        rows = (await self.project_repository.session.execute(query)).all()
+        documents = await fill_missing_documents(self.project_repository.session, rows)
+        return documents[0] if documents else None
+
+    async def search_catalog(self, page: PageParams, attributes: dict[int, list[str]], **filter):
+        """Проекты, подходящие под все ограничения, и счетчики значений атрибутов по индексу фасетов.
+
+        Возвращает (проекты страницы, курсор следующей страницы, всего найдено, фасеты),
+        где фасеты - список (AttributeResponse, [(значение, количество), ...]).
+        """
+        matched, counters = facet_index.search(attributes, **filter)
+        ids = sorted(matched)
+        if page.cursor:
+            _, last_id = decode_cursor(page.cursor, 'id')
+            ids = ids[bisect_right(ids, last_id):]
+        page_ids = ids[:page.limit]
+        next_cursor = encode_cursor('id', page_ids[-1], page_ids[-1]) if len(ids) > page.limit else None
+
+        projects = []
+        if page_ids:
+            query = (self.project_repository.select_filter_by()
+                     .filter(Project.id.in_(page_ids))
+                     .options(*PROJECT_LOAD_OPTIONS)
+                     .order_by(Project.id))
+            projects = await self.project_repository.fetch_all(query)
+        snapshot = await reference_data.ensure(self.project_repository.session, projects)
+
+        facets = []
+        for id_attribute in sorted(counters):
+            attribute = snapshot.attributes.get(id_attribute)
+            if attribute:
+                values = sorted(counters[id_attribute].items(), key=lambda item: (-item[1], item[0]))
+                facets.append((attribute, values[:FACET_VALUES_LIMIT]))
+        return projects, next_cursor, len(matched), facets
+
+    async def search_projects(self, page: PageParams, q: str):
+        """Ранжированный поиск по индексу: ([(проект, score, подсветка), ...], курсор, всего найдено)."""
+        hits = search_index.search(q)
+        total = len(hits)
+        if page.cursor:
+            score, last_id = decode_cursor(page.cursor, 'rank')
+            hits = hits[bisect_right(hits, (-score, last_id), key=lambda hit: (-hit[1], hit[0])):]
+        page_hits = hits[:page.limit]
+        next_cursor = None
+        if len(hits) > page.limit:
+            next_cursor = encode_cursor('rank', page_hits[-1][1], page_hits[-1][0])
+
+        projects = {}
+        if page_hits:
+            query = (self.project_repository.select_filter_by()
+                     .filter(Project.id.in_([id for id, _ in page_hits]))
+                     .options(*PROJECT_LOAD_OPTIONS))
+            projects = {project.id: project for project in await self.project_repository.fetch_all(query)}
+            await reference_data.ensure(self.project_repository.session, projects.values())
+        results = [(projects[id], score, search_index.highlight(id, q))
+                   for id, score in page_hits if id in projects]
+        return results, next_cursor, total
+
+    async def get_one_project_filter_by(self, **filter):
+        return await self.project_repository.get_one_filter_by(**filter)
+
+    async def get_full_project_filter_by(self, **filter):
+        query = self.project_repository.select_filter_by(**filter).options(*PROJECT_LOAD_OPTIONS)
+        project = await self.project_repository.fetch_one(query)
+        if project:
+            await reference_data.ensure(self.project_repository.session, [project])
+        return project
+    
+    async def _set_value_numbers(self, attributes: list[dict]):
+        """Заполняет value_number у атрибутов из формы; множители единиц берутся одним запросом."""
+        unit_ids = {attribute['id_unit'] for attribute in attributes if attribute.get('id_unit')}
+        factors = {}
+        if unit_ids:
+            query = self.unit_repository.select_filter_by().filter(Unit.id.in_(unit_ids))
+            factors = {unit.id: unit.factor for unit in await self.unit_repository.fetch_all(query)}
+        for attribute in attributes:
+            attribute['value_number'] = normalize_value(attribute['value'], factors.get(attribute.get('id_unit')))
+
+    async def _write_attributes(self, id_project: int, attributes: list[dict], replace: bool = False):
+        """Весь набор атрибутов проекта одним upsert; с replace=True атрибуты, которых нет
+        в наборе, удаляются одним DELETE."""
+        rows = {attribute['id_attribute']: {'id_project': id_project,
+                                            'id_attribute': attribute['id_attribute'],
+                                            'value': attribute['value'],
+                                            'id_unit': attribute.get('id_unit')} for attribute in attributes}
+        rows = list(rows.values())
+        await self._set_value_numbers(rows)
+        if replace:
+            await self.project_attribute_repository.delete_where(
+                ProjectAttribute.id_project == id_project, ProjectAttribute.id_attribute.not_in(
+                    [row['id_attribute'] for row in rows]))
+        await self.project_attribute_repository.upsert(rows, ['value', 'id_unit', 'value_number'])
+
+    async def create_project(self, new_project: CreateProject):
         new_project_dict = new_project.model_dump()
         attributes = new_project_dict.pop('attributes', []) or []
         images = new_project_dict.pop('images', []) or []
 
-        create_project = self.project_repository.add(new_project_dict)
+        session = self.project_repository.session
+        try:
+            async with unit_of_work(session):
+                create_project = await self.project_repository.add(new_project_dict)
+                await self._write_attributes(create_project.id, attributes)
+                await materialize_projects(session, Project.id == create_project.id)
+        except IntegrityError:
+            await self._raise_if_slug_taken(new_project_dict.get('slug'))
+            raise
         if not new_project:
             return Status.FAILED.value
-        
-        if attributes:
-            for attribute in attributes:
-                attribute['id_project'] = create_project.id
-                self.project_attribute_repository.add(attribute)
+        await reindex_projects(session, id=create_project.id)
         return create_project
     
-    def update_project(self, id: int, upd_project: UpdateProject):
+    async def update_project(self, id: int, upd_project: UpdateProject):
         entity = upd_project.model_dump()
         entity['id'] = id
 
-        attributes = entity.pop('attributes', []) or []
+        attributes = entity.pop('attributes', None) # None - атрибуты не меняются, список - новый набор
         images = entity.pop('images', []) or []
 
         entity = {k: v for k, v in entity.items() if v is not None}
-        update_project = self.project_repository.update(entity)
-        if not update_project:
-            return Status.FAILED.value
-        
-        if attributes:
-            existing_attributes = self.project_attribute_repository.get_all_filter_by(id_project=id)
-            existing_attributes_dict = {attr.id_attribute: attr for attr in existing_attributes}
-            for attribute in attributes:
-                id_attribute = attribute['id_attribute']
-                value = attribute['value']
-                id_unit = attribute['id_unit']
-
-                if id_attribute in existing_attributes_dict:
-                    self.project_attribute_repository.update_by_filter(
-                        {'id_project': id, 'id_attribute': id_attribute},
-                        {'value': value, 'id_unit': id_unit})
-                else:
-                    attribute['id_project'] = id
-                    self.project_attribute_repository.add(attribute)
+        session = self.project_repository.session
+        # Сводка заказов разбита по городу и категории проекта
+        orders_stats = (track_order_stats(session, Order.id_project == id,
+                                          archive_criteria=(OrderArchive.id_project == id,))
+                        if 'id_category' in entity or 'id_city' in entity else nullcontext())
+        try:
+            async with unit_of_work(session), orders_stats:
+                update_project = await self.project_repository.update(entity)
+                if not update_project:
+                    return Status.FAILED.value
+
+                if attributes is not None:
+                    await self._write_attributes(id, attributes, replace=True)
+                await materialize_projects(session, Project.id == id)
+        except IntegrityError:
+            await self._raise_if_slug_taken(entity.get('slug'), id)
+            raise
+        await reindex_projects(session, id=id)
         return update_project
     
-    def delete_project(self, id: int):
-        self.project_attribute_repository.delete_by_filter(id_project=id)
-        self.project_image_repository.delete_by_filter(id_project=id)
-        return self.project_repository.delete(id)
+    async def mark_projects_done(self, ids):
+        """Отмечает проекты выполненными одним UPDATE; документы и индексы - только у изменившихся."""
+        session = self.project_repository.session
+        async with unit_of_work(session):
+            changed = (await session.scalars(
+                select(Project.id).filter(Project.id.in_(set(ids)), Project.is_done.is_not(True)))).all()
+            if not changed:
+                return 0
+            await self.project_repository.update_where({'is_done': True}, Project.id.in_(changed))
+            await materialize_projects(session, Project.id.in_(changed))
+        await reindex_projects(session, Project.id.in_(changed))
+        return len(changed)
+
+    async def delete_project(self, id: int):
+        session = self.project_repository.session
+        async with unit_of_work(session):
+            await delete_project_documents(session, id)
+            await self.project_attribute_repository.delete_by_filter(id_project=id)
+            await self.project_image_repository.delete_by_filter(id_project=id)
+            deleted = await self.project_repository.delete(id)
+        await reindex_projects(session, id=id)
+        return deleted
+
+    # Import
+    @staticmethod
+    def _import_names(row: ImportProject):
+        yield 'categories', normalize_name(row.category)
+        yield 'cities', normalize_name(row.city)
+        for attribute in row.attributes:
+            yield 'attributes', normalize_name(attribute.attribute)
+            if attribute.unit:
+                yield 'units', normalize_name(attribute.unit)
+
+    def _resolve_import_row(self, row: ImportProject, names: dict) -> tuple[dict | None, list[str]]:
+        """Строка импорта -> (проект с id справочников и атрибутами, ошибки)."""
+        errors = []
+        def lookup(table: str, name: str, label: str):
+            id = names[table].get(normalize_name(name))
+            if id is None:
+                errors.append(f'unknown {label}: {name}')
+            return id
+        project = row.model_dump(exclude={'category', 'city', 'attributes', 'main_image'})
+        if row.main_image:
+            project['main_image'] = row.main_image
+        project['id_category'] = lookup('categories', row.category, 'category')
+        project['id_city'] = lookup('cities', row.city, 'city')
+        attributes = {}
+        for attribute in row.attributes:
+            id_attribute = lookup('attributes', attribute.attribute, 'attribute')
+            id_unit = lookup('units', attribute.unit, 'unit') if attribute.unit else None
+            attributes[id_attribute] = {'id_attribute': id_attribute, 'value': attribute.value, 'id_unit': id_unit}
+        project['attributes'] = list(attributes.values())
+        return (None if errors else project), errors
+
+    async def _insert_import_batch(self, projects: list[dict]) -> list[int]:
+        """Проекты и их атрибуты двумя executemany в одной транзакции; возвращает id проектов."""
+        session = self.project_repository.session
+        async with unit_of_work(session):
+            snapshot = await reference_data.load(session)
+            await session.execute(insert(Project), [{k: v for k, v in project.items() if k != 'attributes'}
+                                                    for project in projects])
+            # RETURNING в MySQL нет; slug уникален (ux_projects_slug), поэтому id находятся по нему.
+            # Проект с таким slug, добавленный после проверки, сорвет вставку IntegrityError
+            query = select(Project.id, Project.slug).filter(Project.slug.in_([project['slug'] for project in projects]))
+            ids = dict((slug, id) for id, slug in (await session.execute(query)).all())
+            if len(ids) != len(projects):
+                raise RuntimeError(f'import batch of {len(projects)} projects mapped to {len(ids)} ids')
+            attributes = []
+            for project in projects:
+                for attribute in project['attributes']:
+                    unit = snapshot.units.get(attribute['id_unit'])
+                    attributes.append({**attribute, 'id_project': ids[project['slug']],
+                                       'value_number': normalize_value(attribute['value'], unit.factor if unit else None)})
+            if attributes:
+                await session.execute(insert(ProjectAttribute), attributes)
+            await materialize_projects(session, Project.id.in_(ids.values()), snapshot=snapshot)
+        await reindex_projects(session, Project.id.in_(ids.values()))
+        return list(ids.values())
+
+    async def import_projects(self, records, dry_run: bool = False) -> dict:
+        """Массовый импорт из iter_records: пачками по IMPORT_BATCH_SIZE строк, каждая пачка -
+        проверка, одна транзакция и одна вставка на таблицу. Ошибочные строки пропускаются
+        и попадают в отчет; с dry_run=True выполняется только проверка."""
+        session = self.project_repository.session
+        started = time.perf_counter()
+        total = imported = failed = 0
+        errors = []
+        errors_truncated = False
+        seen_slugs = set()
+        refreshed = False
+
+        def report_error(row: int | None, messages: list[str]):
+            nonlocal errors_truncated
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append(ImportRowError(row=row, errors=messages))
+            else:
+                errors_truncated = True
+
+        while True:
+            try:
+                # Чтение загруженного файла блокирующее, поэтому пачка читается в пуле потоков
+                batch = await run_in_threadpool(lambda: list(islice(records, IMPORT_BATCH_SIZE)))
+            except (UnicodeDecodeError, csv.Error) as e:
+                report_error(None, [f'file is not valid UTF-8 CSV/NDJSON: {e}'])
+                break
+            if not batch:
+                break
+            total += len(batch)
+
+            rows = []
+            for number, record, error in batch:
+                if error:
+                    failed += 1
+                    report_error(number, [error])
+                    continue
+                try:
+                    rows.append((number, ImportProject.model_validate(record)))
+                except ValidationError as e:
+                    failed += 1
+                    report_error(number, [f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in e.errors()])
+
+            slugs = [row.slug for _, row in rows]
+            existing = set(await session.scalars(select(Project.slug).filter(Project.slug.in_(slugs)))) if slugs else set()
+            names = reference_data.snapshot.names
+            if not refreshed and any(not all(key in names[table] for table, key in self._import_names(row))
+                                     for _, row in rows):
+                # Справочник мог появиться в другом воркере - один раз перечитываем снимок
+                names = (await reference_data.rebuild(session)).names
+                refreshed = True
+
+            projects, numbers = [], []
+            for number, row in rows:
+                project, row_errors = self._resolve_import_row(row, names)
+                if row.slug in existing or row.slug in seen_slugs:
+                    row_errors.append(f'slug already exists: {row.slug}')
+                if row_errors:
+                    failed += 1
+                    report_error(number, row_errors)
+                    continue
+                seen_slugs.add(row.slug)
+                projects.append(project)
+                numbers.append(number)
+
+            if projects and not dry_run:
+                try:
+                    await self._insert_import_batch(projects)
+                except SQLAlchemyError as e: # пачка откатывается целиком, следующие продолжают импортироваться
+                    failed += len(projects)
+                    seen_slugs.difference_update(project['slug'] for project in projects)
+                    for number in numbers:
+                        report_error(number, [f'database error: {e.__class__.__name__}'])
+                    continue
+            imported += len(projects)
+
+        seconds = time.perf_counter() - started
+        errors.sort(key=lambda error: error.row or 0)
+        return {'dry_run': dry_run, 'total': total, 'imported': imported, 'failed': failed,
+                'seconds': round(seconds, 3), 'rows_per_second': round(total / seconds, 1) if seconds else 0.0,
+                'errors': errors, 'errors_truncated': errors_truncated}
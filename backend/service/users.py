@@ -1,31 +1,46 @@
 from utils.enums import Roles, AuthStatus
 from fastapi import HTTPException
-from passlib.hash import pbkdf2_sha256
+from sqlalchemy.exc import IntegrityError
 from schemas.users import UserCreate, UserUpdate
 from crud.users import UserRepository
+from service.auth import auth_cache
+from utils.passwords import password_hasher
+from utils.pagination import PageParams
+from utils.unit_of_work import unit_of_work
 
 class UserService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
-    def get_all_users_filter_by(self, **filter):
-        users = self.user_repository.get_all_filter_by(**filter)
-        return users
+    async def get_all_users_filter_by(self, page: PageParams, **filter):
+        query = self.user_repository.select_filter_by(**filter)
+        return await self.user_repository.paginate(query, page)
 
-    def get_user_filter_by(self, **filter):
-        user = self.user_repository.get_one_filter_by(**filter)
+    async def get_user_filter_by(self, **filter):
+        user = await self.user_repository.get_one_filter_by(**filter)
         return user
 
-    def update(self, user_id: int, data: UserUpdate):
+    async def update(self, user_id: int, data: UserUpdate):
         entity = data.model_dump()
-        user = self.user_repository.get_one_filter_by(id=user_id)
-        if data.password and not pbkdf2_sha256.verify(data.password, user.password):
+        user = await self.user_repository.get_one_filter_by(id=user_id)
+        if data.password and not await password_hasher.verify(data.password, user.password):
             raise HTTPException(status_code=403, detail={'status': AuthStatus.INVALID_PASSWORD.value})
         if data.password:
-            entity['password'] = pbkdf2_sha256.hash(data.password)
-        self.user_repository.update(user_id, entity)
-        updated_user = self.user_repository.get_one_filter_by(id=user_id)
+            entity['password'] = await password_hasher.hash(data.password)
+        entity['id'] = user_id
+        entity = {k: v for k, v in entity.items() if v is not None}
+        session = self.user_repository.session
+        try:
+            async with unit_of_work(session):
+                await self.user_repository.update(entity)
+        except IntegrityError: # уникальный индекс ux_users_email; операция откатывается целиком
+            raise HTTPException(status_code=400, detail={'status': AuthStatus.EMAIL_ALREADY_EXISTS.value})
+        auth_cache.invalidate(user_id)
+        updated_user = await self.user_repository.get_one_filter_by(id=user_id)
         return updated_user
 
-    def delete_user(self, user_id: int):
-        return self.user_repository.delete(user_id)
\ No newline at end of file
+    async def delete_user(self, user_id: int):
+        async with unit_of_work(self.user_repository.session):
+            deleted = await self.user_repository.delete(user_id)
+        auth_cache.invalidate(user_id)
+        return deleted
\ No newline at end of file
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, inspect, update as sql_update, delete as sql_delete
+from sqlalchemy.dialects import mysql, sqlite
+from utils.pagination import PageParams, encode_cursor, decode_cursor
 
 class AbstractRepository(ABC):
     @abstractmethod
@@ -26,41 +29,126 @@ class AbstractRepository(ABC):
     def delete_by_filter(self, **filter):
         pass
 
-class IREpository(AbstractRepository):
-    def __init__(self, model, session: Session):
+def apply_keyset(statement, model, page: PageParams, sort_column=None):
+    """Добавляет к Select условие поиска после курсора, сортировку и LIMIT.
+
+    sort_column задается, когда ключ сортировки - колонка другой таблицы из JOIN.
+    """
+    id_column = model.id
+    if sort_column is None:
+        sort_column = getattr(model, page.sort)
+    if page.cursor:
+        value, last_id = decode_cursor(page.cursor, page.sort)
+        if page.sort == 'id':
+            statement = statement.filter(id_column > last_id)
+        else:
+            statement = statement.filter(or_(sort_column > value,
+                                             and_(sort_column == value, id_column > last_id)))
+    order_by = [id_column] if page.sort == 'id' else [sort_column, id_column]
+    return statement.order_by(*order_by).limit(page.limit + 1)
+
+def split_page(items: list, page: PageParams, sort_value=None):
+    if len(items) <= page.limit:
+        return items, None
+    items = items[:page.limit]
+    last = items[-1]
+    value = sort_value(last) if sort_value else getattr(last, page.sort)
+    return items, encode_cursor(page.sort, value, last.id)
+
+def build_upsert(model, dialect: str, rows: list[dict], update_columns=(), increment_columns=()):
+    """INSERT ... ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite) для строк rows.
+
+    При совпадении первичного ключа update_columns перезаписываются, а к
+    increment_columns прибавляется новое значение.
+    """
+    if dialect == 'mysql':
+        statement = mysql.insert(model).values(rows)
+        new = statement.inserted
+        return statement.on_duplicate_key_update(
+            {**{column: new[column] for column in update_columns},
+             **{column: getattr(model, column) + new[column] for column in increment_columns}})
+    if dialect == 'sqlite':
+        statement = sqlite.insert(model).values(rows)
+        new = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=[column.name for column in inspect(model).primary_key],
+            set_={**{column: new[column] for column in update_columns},
+                  **{column: getattr(model, column) + new[column] for column in increment_columns}})
+    raise ValueError(f'unsupported database dialect {dialect!r}: only mysql and sqlite are supported')
+
+
+class AsyncIREpository(AbstractRepository):
+    """Запись не коммитит: транзакцией управляет сервис через utils.unit_of_work."""
+
+    def __init__(self, model, session: AsyncSession):
         self.model = model
         self.session = session
 
-    def get_all_filter_by(self, **filters):
-        query = self.session.query(self.model)
+    def select_filter_by(self, **filters):
+        statement = select(self.model)
         for key, value in filters.items():
-            query = query.filter(getattr(self.model, key) == value)
-        return query
+            statement = statement.filter(getattr(self.model, key) == value)
+        return statement
+
+    async def fetch_all(self, statement) -> list:
+        return list((await self.session.scalars(statement)).all())
+
+    async def fetch_one(self, statement):
+        return (await self.session.scalars(statement.limit(1))).first()
 
-    def get_one_filter_by(self, **filter):
-        return self.session.query(self.model).filter_by(**filter).first()
+    async def get_all_filter_by(self, **filters) -> list:
+        return await self.fetch_all(self.select_filter_by(**filters))
 
-    def add(self, entity: dict):
+    async def get_one_filter_by(self, **filter):
+        return await self.fetch_one(select(self.model).filter_by(**filter))
+
+    async def paginate(self, statement, page: PageParams, sort_column=None, sort_value=None):
+        """Keyset-пагинация по (page.sort, id): возвращает (строки, курсор следующей страницы).
+
+        Для сортировки по колонке из JOIN передаются sort_column и sort_value(строка) -> значение.
+        """
+        items = await self.fetch_all(apply_keyset(statement, self.model, page, sort_column))
+        return split_page(items, page, sort_value)
+
+    async def paginate_rows(self, statement, page: PageParams, sort_column=None, sort_value=None):
+        """Как paginate, но для select по отдельным колонкам: возвращает строки Row без объектов модели."""
+        items = list((await self.session.execute(apply_keyset(statement, self.model, page, sort_column))).all())
+        return split_page(items, page, sort_value)
+
+    async def add(self, entity: dict):
         entity = self.model(**entity)
         self.session.add(entity)
-        self.session.commit()
+        await self.session.flush()
         return entity
 
-    def update(self, entity: dict):
-        self.session.query(self.model).filter_by(id=entity['id']).update(entity)
-        self.session.commit()
+    async def update(self, entity: dict):
+        await self.session.execute(sql_update(self.model).filter_by(id=entity['id']).values(entity))
         return entity
 
-    def delete(self, id: int):
-        self.session.query(self.model).filter_by(id=id).delete()
-        self.session.commit()
+    async def delete(self, id: int):
+        await self.session.execute(sql_delete(self.model).filter_by(id=id))
 
-    def update_by_filter(self, filters: dict, updates: dict):
-        result = self.session.query(self.model).filter_by(**filters).update(updates)
-        self.session.commit()
-        return result
+    async def update_by_filter(self, filters: dict, updates: dict):
+        result = await self.session.execute(sql_update(self.model).filter_by(**filters).values(updates))
+        return result.rowcount
 
-    def delete_by_filter(self, **filter):
-        result = self.session.query(self.model).filter_by(**filter).delete()
-        self.session.commit()
-        return result > 0
+    async def delete_by_filter(self, **filter):
+        result = await self.session.execute(sql_delete(self.model).filter_by(**filter))
+        return result.rowcount > 0
+
+    async def update_where(self, values: dict, *criteria):
+        """Один UPDATE по произвольным условиям (IN, выражения в values). Объекты
+        модели, уже загруженные в сессию, не обновляются."""
+        result = await self.session.execute(sql_update(self.model).filter(*criteria).values(values)
+                                            .execution_options(synchronize_session=False))
+        return result.rowcount
+
+    async def delete_where(self, *criteria):
+        result = await self.session.execute(sql_delete(self.model).filter(*criteria))
+        return result.rowcount
+
+    async def upsert(self, rows: list[dict], update_columns: list[str]):
+        """Вставляет строки одним запросом; при совпадении первичного ключа обновляет update_columns."""
+        if rows:
+            await self.session.execute(
+                build_upsert(self.model, self.session.get_bind().dialect.name, rows, update_columns))
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+import os
+import re
+from typing import BinaryIO, Iterator
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+IMPORT_CONTENT_TYPES = {'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson', 'text/csv': 'csv'}
+IMPORT_EXTENSIONS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+# Колонки CSV с полями проекта; остальные колонки - атрибуты, единица в заголовке: "Площадь [м²]"
+CSV_PROJECT_COLUMNS = ('name', 'slug', 'description', 'is_done', 'main_image', 'category', 'city')
+UNIT_IN_HEADER = re.compile(r'^(.*?)\s*\[(.+)\]$')
+
+
+def detect_import_format(filename: str | None, content_type: str | None) -> str | None:
+    extension = os.path.splitext(filename or '')[1].lower()
+    return IMPORT_EXTENSIONS.get(extension) or IMPORT_CONTENT_TYPES.get((content_type or '').split(';')[0].strip())
+
+
+def iter_records(file: BinaryIO, format: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Читает загрузку построчно, не держа ее в памяти целиком: (номер строки, запись, ошибка разбора).
+
+    NDJSON - по объекту на строку в формате ImportProject. CSV - заголовок и по
+    проекту на строку, атрибуты в колонках с их названиями. Ошибка кодировки или
+    структуры CSV прерывает чтение исключением (UnicodeDecodeError, csv.Error).
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        if format == 'ndjson':
+            yield from _ndjson_records(text)
+        else:
+            yield from _csv_records(text)
+    finally:
+        text.detach() # файл закрывает UploadFile
+
+
+def _ndjson_records(text):
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield number, None, 'expected a JSON object'
+            continue
+        yield number, record, None
+
+
+def _csv_records(text):
+    reader = csv.DictReader(text)
+    attribute_columns = []
+    for column in reader.fieldnames or []:
+        if column in CSV_PROJECT_COLUMNS:
+            continue
+        match = UNIT_IN_HEADER.match(column)
+        attribute_columns.append((column, *(match.groups() if match else (column, None))))
+    for record in reader:
+        record = {key: value.strip() if isinstance(value, str) else value for key, value in record.items()}
+        project = {column: record[column] for column in CSV_PROJECT_COLUMNS if record.get(column)}
+        project['attributes'] = [{'attribute': name, 'value': record[column], 'unit': unit}
+                                 for column, name, unit in attribute_columns if record.get(column)]
+        yield reader.line_num, project, None
@@ -5,6 +5,13 @@ class Status(Enum):
     FAILED = 'FAILED'
     NOT_FOUND = 'NOT_FOUND'
     UNAUTHORIZED = 'UNAUTHORIZED'
+    INVALID_CURSOR = 'INVALID_CURSOR'
+    BUSY = 'BUSY'
+    FILE_TOO_LARGE = 'FILE_TOO_LARGE'
+    UNSUPPORTED_MEDIA_TYPE = 'UNSUPPORTED_MEDIA_TYPE'
+    INVALID_FILTER = 'INVALID_FILTER'
+    INVALID_TRANSITION = 'INVALID_TRANSITION'
+    SLUG_ALREADY_EXISTS = 'SLUG_ALREADY_EXISTS'
 
 class AuthStatus(Enum):
     SUCCESS = 'SUCCESS'
@@ -20,6 +27,7 @@ class AuthStatus(Enum):
     INVALID_EMAIL_OR_PASSWORD = 'INVALID_EMAIL_OR_PASSWORD'
     TOKEN_EXPIRED = 'TOKEN_EXPIRED'
     USER_NOT_FOUND = 'USER_NOT_FOUND'
+    EMAIL_ALREADY_EXISTS = 'EMAIL_ALREADY_EXISTS'
     FORBIDDEN = 'FORBIDDEN'
 
 class Roles(Enum):
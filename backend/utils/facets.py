@@ -0,0 +1,114 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FacetDocument:
+    id: int
+    id_category: int
+    id_city: int
+    is_done: bool
+    attributes: dict[int, str]
+
+
+class FacetIndex:
+    """Инвертированный индекс проектов по категории, городу и значениям атрибутов.
+
+    Строится при старте приложения и обновляется ProjectService при записи
+    проекта, поэтому подсчет фасетов - это пересечение множеств id в памяти,
+    а не GROUP BY по projects_attributes на каждый запрос.
+    """
+
+    def __init__(self):
+        self.documents: dict[int, FacetDocument] = {}
+        self.by_category: dict[int, set[int]] = defaultdict(set)
+        self.by_city: dict[int, set[int]] = defaultdict(set)
+        self.by_done: dict[bool, set[int]] = defaultdict(set)
+        self.by_attribute: dict[tuple[int, str], set[int]] = defaultdict(set)
+
+    @staticmethod
+    def _document(project) -> FacetDocument:
+        return FacetDocument(id=project.id,
+                             id_category=project.id_category,
+                             id_city=project.id_city,
+                             is_done=bool(project.is_done),
+                             attributes={attr.id_attribute: attr.value for attr in project.project_attribute})
+
+    @staticmethod
+    def _discard(postings: dict, key, id: int):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(id)
+            if not ids:
+                del postings[key]
+
+    def rebuild(self, projects):
+        self.__init__()
+        for project in projects:
+            self.update(project)
+
+    def update(self, project):
+        """Project должен быть загружен вместе с project_attribute."""
+        self.remove(project.id)
+        document = self._document(project)
+        self.documents[document.id] = document
+        self.by_category[document.id_category].add(document.id)
+        self.by_city[document.id_city].add(document.id)
+        self.by_done[document.is_done].add(document.id)
+        for id_attribute, value in document.attributes.items():
+            self.by_attribute[(id_attribute, value)].add(document.id)
+
+    def remove(self, id: int):
+        document = self.documents.pop(id, None)
+        if document is None:
+            return
+        self._discard(self.by_category, document.id_category, id)
+        self._discard(self.by_city, document.id_city, id)
+        self._discard(self.by_done, document.is_done, id)
+        for id_attribute, value in document.attributes.items():
+            self._discard(self.by_attribute, (id_attribute, value), id)
+
+    def _match(self, base: set[int], attributes: dict[int, list[str]], skip: int | None = None) -> set[int]:
+        result = base
+        for id_attribute, values in attributes.items():
+            if id_attribute == skip:
+                continue
+            # Значения одного атрибута объединяются через ИЛИ, разные атрибуты - через И
+            matched = set().union(*(self.by_attribute.get((id_attribute, value), ()) for value in values))
+            result = result & matched
+        return result
+
+    def search(self, attributes: dict[int, list[str]], id_category: int | None = None,
+               id_city: int | None = None, is_done: bool | None = None) -> tuple[set[int], dict[int, Counter]]:
+        """Возвращает id подходящих проектов и счетчики значений по каждому атрибуту.
+
+        Для атрибута, по которому уже есть ограничение, счетчики считаются без
+        этого ограничения, чтобы клиент видел, сколько даст выбор другого значения.
+        """
+        base = set(self.documents)
+        if id_category is not None:
+            base &= self.by_category.get(id_category, set())
+        if id_city is not None:
+            base &= self.by_city.get(id_city, set())
+        if is_done is not None:
+            base &= self.by_done.get(is_done, set())
+
+        matched = self._match(base, attributes)
+        facets: dict[int, Counter] = defaultdict(Counter)
+        for id in matched:
+            for id_attribute, value in self.documents[id].attributes.items():
+                if id_attribute not in attributes:
+                    facets[id_attribute][value] += 1
+        for id_attribute in attributes:
+            counter = facets[id_attribute]
+            for id in self._match(base, attributes, skip=id_attribute):
+                value = self.documents[id].attributes.get(id_attribute)
+                if value is not None:
+                    counter[value] += 1
+        return matched, facets
+
+    def stats(self) -> dict:
+        return {'projects': len(self.documents), 'attribute_values': len(self.by_attribute)}
+
+
+facet_index = FacetIndex()
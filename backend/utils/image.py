@@ -1,20 +1,159 @@
+import hashlib
 import os
-from fastapi import UploadFile
+import re
+import secrets
+import stat
+import tempfile
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from config.images import IMAGES_DIR, VARIANTS_DIR, IMAGE_VARIANTS, IMAGE_MAX_SIZE, IMAGE_CHUNK_SIZE
+from utils.cache import TTLCache
+from utils.enums import Status
 
-def save_image(image: UploadFile) -> str:
-    save_path = f'images'
-    os.makedirs(save_path, exist_ok=True)
-    image_path = os.path.join(save_path, image.filename)
+# Имена вида <name>.<16 hex sha256>.<ext> не меняют содержимое никогда
+HASHED_NAME = re.compile(r'\.([0-9a-f]{16})\.\w+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+# Расширение файла варианта -> формат Pillow
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
 
-    with open(image_path, "wb") as f:
-        f.write(image.file.read())
-        
-    return image_path
+@dataclass(frozen=True)
+class ImageMeta:
+    path: str
+    stat_result: os.stat_result
+    etag: str
+    last_modified: str
+
+# stat и хэш содержимого горячих картинок, чтобы не ходить в файловую систему на каждый запрос
+image_meta_cache = TTLCache(max_size=4096, ttl=300)
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Расширение по сигнатуре файла; имени и Content-Type от клиента не доверяем."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return '.gif'
+    return None
+
+def _image_stem(filename: str | None) -> str:
+    stem = os.path.splitext(os.path.basename(filename or ''))[0]
+    stem = re.sub(r'[^\w-]+', '-', stem).strip('-_').lower()[:64]
+    return stem or 'image'
+
+async def save_image(image: UploadFile) -> str:
+    """Пишет загрузку на диск кусками вне event loop и возвращает имя файла.
+
+    Файл сначала пишется во временный, а затем атомарно переименовывается в
+    <имя>-<случайный суффикс>.<16 hex sha256>.<ext>, поэтому картинку можно
+    кэшировать как immutable, а удаление файла одной записи не задевает другие.
+    IMAGE_MAX_SIZE здесь - лимит хранения: к этому моменту starlette уже сохранил
+    тело запроса во временный файл. Ранний обрыв загрузки делает UploadLimitMiddleware
+    (для эндпоинтов с одной картинкой - по тому же IMAGE_MAX_SIZE).
+    """
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    head = await image.read(IMAGE_CHUNK_SIZE)
+    extension = sniff_image_type(head)
+    if extension is None:
+        raise HTTPException(status_code=415, detail={'status': Status.UNSUPPORTED_MEDIA_TYPE.value})
+
+    fd, temp_path = await run_in_threadpool(tempfile.mkstemp, dir=IMAGES_DIR, suffix='.part')
+    f = os.fdopen(fd, 'wb')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > IMAGE_MAX_SIZE:
+                raise HTTPException(status_code=413, detail={'status': Status.FILE_TOO_LARGE.value})
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+            chunk = await image.read(IMAGE_CHUNK_SIZE)
+        await run_in_threadpool(f.close)
+        image_name = f'{_image_stem(image.filename)}-{secrets.token_hex(4)}.{digest.hexdigest()[:16]}{extension}'
+        await run_in_threadpool(os.replace, temp_path, os.path.join(IMAGES_DIR, image_name))
+    except BaseException:
+        f.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    image_meta_cache.invalidate(image_name)
+    return image_name
+
+def variant_name(image_name: str, variant: str, extension: str) -> str:
+    """house-1a2b.<hash>.jpg -> house-1a2b-card.<hash>.webp: хэш оригинала остается в имени."""
+    match = HASHED_NAME.search(image_name)
+    if match:
+        return f'{image_name[:match.start()]}-{variant}.{match.group(1)}.{extension}'
+    return f'{os.path.splitext(image_name)[0]}-{variant}.{extension}'
+
+def variant_skip_marker(name: str) -> str:
+    """Маркер варианта, который не строится: он не меньше оригинала."""
+    return os.path.join(VARIANTS_DIR, name + '.original')
 
 def delete_image(image: str) -> None:
     if image == "placeholder.png":
         return
-    save_path = f'images'
+    save_path = IMAGES_DIR
     image_path = os.path.join(save_path, image)
     if os.path.exists(image_path):
-        os.remove(image_path)
\ No newline at end of file
+        os.remove(image_path)
+    image_meta_cache.invalidate(image)
+    for variant in IMAGE_VARIANTS:
+        for extension in VARIANT_FORMATS:
+            name = variant_name(image, variant, extension)
+            for path in (os.path.join(VARIANTS_DIR, name), variant_skip_marker(name)):
+                if os.path.exists(path):
+                    os.remove(path)
+            image_meta_cache.invalidate(os.path.join('variants', name))
+
+def _load_image_meta(image_path: str) -> ImageMeta | None:
+    try:
+        stat_result = os.stat(image_path)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return ImageMeta(path=image_path,
+                     stat_result=stat_result,
+                     etag=f'"{digest.hexdigest()[:32]}"',
+                     last_modified=formatdate(stat_result.st_mtime, usegmt=True))
+
+async def get_image_meta(image_name: str) -> ImageMeta | None:
+    meta = image_meta_cache.get(image_name)
+    if meta is None:
+        meta = await run_in_threadpool(_load_image_meta, os.path.join(IMAGES_DIR, image_name))
+        if meta is not None:
+            image_meta_cache.set(image_name, meta)
+    return meta
+
+def image_cache_headers(image_name: str, meta: ImageMeta) -> dict:
+    return {
+        'etag': meta.etag,
+        'last-modified': meta.last_modified,
+        'cache-control': IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(image_name) else REVALIDATE_CACHE_CONTROL,
+    }
+
+def is_not_modified(request_headers: Headers, meta: ImageMeta) -> bool:
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or meta.etag in tags
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(meta.stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from config.images import IMAGES_DIR, VARIANTS_DIR, IMAGE_VARIANTS, IMAGE_VARIANT_WORKERS
+from utils.image import VARIANT_FORMATS, variant_name, variant_skip_marker
+
+try:
+    from PIL import Image, ImageOps
+except ImportError: # Pillow не установлен - отдаем оригиналы
+    Image = None
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def variants_enabled() -> bool:
+    return Image is not None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS)
+    return _executor
+
+
+def _skip(name: str):
+    """Пустой маркер: вариант не нужен, отдается оригинал и повторно не строится."""
+    open(variant_skip_marker(name), 'wb').close()
+
+
+def _render(image_name: str, targets: list[tuple[str, str]]) -> list[str]:
+    """Выполняется в дочернем процессе: уменьшает оригинал до нужных вариантов.
+
+    Вариант не пишется, если оригинал уже не шире целевой ширины или если
+    сжатый результат не меньше оригинала - тогда вместо него отдается оригинал.
+    """
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+    original_path = os.path.join(IMAGES_DIR, image_name)
+    original_size = os.path.getsize(original_path)
+    rendered = []
+    with Image.open(original_path) as original:
+        original = ImageOps.exif_transpose(original)
+        for variant, extension in targets:
+            name = variant_name(image_name, variant, extension)
+            width = IMAGE_VARIANTS[variant]
+            image = original.copy()
+            image.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+            if image.size == original.size:
+                _skip(name)
+                continue
+            image_format = VARIANT_FORMATS[extension]
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            fd, temp_path = tempfile.mkstemp(dir=VARIANTS_DIR, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, format=image_format, quality=82, optimize=True)
+                if os.path.getsize(temp_path) >= original_size:
+                    os.remove(temp_path)
+                    _skip(name)
+                    continue
+                os.replace(temp_path, os.path.join(VARIANTS_DIR, name))
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            rendered.append(name)
+    return rendered
+
+
+async def generate_variants(image_name: str):
+    """Строит все варианты картинки; вызывается фоновой задачей после загрузки."""
+    if not variants_enabled():
+        return
+    targets = [(variant, extension) for variant in IMAGE_VARIANTS for extension in VARIANT_FORMATS]
+    await asyncio.get_running_loop().run_in_executor(_get_executor(), _render, image_name, targets)
+
+
+async def get_variant(image_name: str, variant: str, extension: str) -> str | None:
+    """Имя файла варианта в VARIANTS_DIR; недостающий вариант строится при первом запросе.
+
+    None - отдавать оригинал: Pillow нет, оригинал не картинка или вариант не меньше него.
+    """
+    if not variants_enabled():
+        return None
+    name = variant_name(image_name, variant, extension)
+    if not os.path.exists(os.path.join(VARIANTS_DIR, name)):
+        if os.path.exists(variant_skip_marker(name)) or not os.path.exists(os.path.join(IMAGES_DIR, image_name)):
+            return None
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(
+                _get_executor(), _render, image_name, [(variant, extension)])
+        except OSError: # оригинал не картинка или поврежден
+            return None
+        if name not in rendered:
+            return None
+    return name
+
+
+def pick_variant(width: int) -> str:
+    """Наименьший вариант, который не уже запрошенной ширины."""
+    for variant, variant_width in sorted(IMAGE_VARIANTS.items(), key=lambda item: item[1]):
+        if variant_width >= width:
+            return variant
+    return max(IMAGE_VARIANTS, key=IMAGE_VARIANTS.get)
+
+
+def pick_extension(accept: str) -> str:
+    return 'webp' if 'image/webp' in accept else 'jpg'
@@ -0,0 +1,53 @@
+import re
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from utils.enums import Status
+
+
+class UploadLimitMiddleware:
+    """Ограничивает размер multipart-запросов до того, как тело будет прочитано.
+
+    Запрос с Content-Length больше лимита отклоняется сразу, а при chunked-передаче
+    тело считается по мере поступления и чтение обрывается на превышении лимита.
+    Это единственная проверка, которая срабатывает до того, как starlette сохранит
+    тело во временный файл. route_limits - (метод, регулярное выражение пути, лимит)
+    для эндпоинтов со своим, меньшим лимитом.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, route_limits=()):
+        self.app = app
+        self.max_size = max_size
+        self.route_limits = [(method, re.compile(path), limit) for method, path, limit in route_limits]
+
+    def limit_for(self, scope: Scope) -> int:
+        for method, path, limit in self.route_limits:
+            if scope['method'] == method and path.fullmatch(scope['path']):
+                return limit
+        return self.max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if not headers.get('content-type', '').startswith('multipart/form-data'):
+            return await self.app(scope, receive, send)
+        max_size = self.limit_for(scope)
+        content_length = headers.get('content-length', '')
+        if content_length.isdigit() and int(content_length) > max_size:
+            response = JSONResponse(status_code=413, content={'detail': {'status': Status.FILE_TOO_LARGE.value}})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > max_size:
+                    raise HTTPException(status_code=413, detail={'status': Status.FILE_TOO_LARGE.value})
+            return message
+
+        await self.app(scope, limited_receive, send)
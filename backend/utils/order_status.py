@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from types import MappingProxyType
+from config.orders import ORDER_ARCHIVE_AFTER_DAYS
+from utils.enums import OrderStatus
+
+
+@dataclass(frozen=True)
+class StatusRule:
+    """Куда можно перейти из статуса и что сделать при входе в него."""
+    next: frozenset[OrderStatus] = frozenset()
+    stamp: str | None = None # дата заказа, которая ставится сегодняшней, если еще пуста
+    marks_project_done: bool = False
+
+
+ORDER_STATUS_RULES = MappingProxyType({
+    OrderStatus.PENDING: StatusRule(frozenset({OrderStatus.APPROVED, OrderStatus.CANCELLED})),
+    OrderStatus.APPROVED: StatusRule(frozenset({OrderStatus.IN_PROGRESS, OrderStatus.CANCELLED})),
+    OrderStatus.IN_PROGRESS: StatusRule(
+        frozenset({OrderStatus.AWAITING_PAYMENT, OrderStatus.AWAITING_SIGN_OFF, OrderStatus.CANCELLED}),
+        stamp='start_date'),
+    OrderStatus.AWAITING_PAYMENT: StatusRule(frozenset({OrderStatus.PAID, OrderStatus.CANCELLED})),
+    OrderStatus.PAID: StatusRule(frozenset({OrderStatus.IN_PROGRESS, OrderStatus.AWAITING_SIGN_OFF}),
+                                 stamp='payment_date'),
+    OrderStatus.AWAITING_SIGN_OFF: StatusRule(
+        frozenset({OrderStatus.COMPLETED, OrderStatus.IN_PROGRESS, OrderStatus.AWAITING_PAYMENT})),
+    OrderStatus.COMPLETED: StatusRule(stamp='end_date', marks_project_done=True),
+    OrderStatus.CANCELLED: StatusRule(),
+})
+
+
+def _check_rules(rules):
+    """Таблица проверяется при импорте: ошибка в ней не должна дойти до запроса."""
+    missing = set(OrderStatus) - rules.keys()
+    if missing:
+        raise ValueError(f'no transition rules for {sorted(missing)}')
+    for status, rule in rules.items():
+        if not rule.next <= rules.keys():
+            raise ValueError(f'unknown target status in {status.value}: {sorted(rule.next - rules.keys())}')
+        if status in rule.next:
+            raise ValueError(f'{status.value} is a transition to itself')
+    reachable, queue = {OrderStatus.PENDING}, [OrderStatus.PENDING]
+    while queue:
+        for status in rules[queue.pop()].next - reachable:
+            reachable.add(status)
+            queue.append(status)
+    if reachable != rules.keys():
+        raise ValueError(f'unreachable statuses: {sorted(rules.keys() - reachable)}')
+
+
+_check_rules(ORDER_STATUS_RULES)
+
+# Из них переходов нет: такие заказы со временем уходят в архив
+FINAL_STATUSES = frozenset(status for status, rule in ORDER_STATUS_RULES.items() if not rule.next)
+
+
+def can_transition(current: str, new: str) -> bool:
+    """Повтор текущего статуса - не переход, он всегда допустим."""
+    return current == new or OrderStatus(new) in ORDER_STATUS_RULES[OrderStatus(current)].next
+
+
+def archive_cutoff(today: date | None = None) -> date:
+    """Заказы, не менявшиеся с этой даты, могут быть в архиве; более новые - только в orders."""
+    return (today or date.today()) - timedelta(days=ORDER_ARCHIVE_AFTER_DAYS)
@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Literal
+from fastapi import HTTPException, Query, Response
+from utils.enums import Status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: str | None = None
+    sort: str = 'id'
+
+
+def page_params(*sort_keys: str):
+    """Зависимость с параметрами страницы; первый ключ сортировки - по умолчанию."""
+    sort_keys = sort_keys or ('id',)
+
+    def get_page_params(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: str | None = Query(None),
+                        sort: Literal[sort_keys] = Query(sort_keys[0])) -> PageParams:
+        return PageParams(limit=limit, cursor=cursor, sort=sort)
+    return get_page_params
+
+
+def set_next_cursor(response: Response, next_cursor: str | None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def encode_cursor(sort: str, value, id: int) -> str:
+    kind = None
+    if isinstance(value, date):
+        kind, value = 'date', value.isoformat()
+    elif isinstance(value, Decimal):
+        kind, value = 'decimal', str(value)
+    payload = json.dumps({'s': sort, 't': kind, 'v': value, 'id': id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """Возвращает (значение ключа сортировки, id) последней строки предыдущей страницы."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if payload['s'] != sort:
+            raise ValueError(sort)
+        value = payload['v']
+        if payload['t'] == 'date':
+            value = date.fromisoformat(value)
+        elif payload['t'] == 'decimal':
+            value = Decimal(value)
+        return value, int(payload['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail={'status': Status.INVALID_CURSOR.value})
@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config.auth import PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+from utils.enums import Status
+
+
+class PasswordHasher:
+    """Хэширование паролей в отдельном пуле потоков, чтобы не блокировать event loop.
+
+    pbkdf2 считается в hashlib без GIL, поэтому потоков достаточно. Пул ограничен
+    max_workers, а очередь ожидающих - max_queue: при всплеске логинов лишние
+    запросы сразу получают 503, а не занимают воркер на десятки секунд.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_queue: int):
+        # Хэши с другим числом раундов считаются устаревшими и пересчитываются при логине
+        self.context = CryptContext(schemes=['pbkdf2_sha256'],
+                                    pbkdf2_sha256__default_rounds=rounds,
+                                    pbkdf2_sha256__min_rounds=rounds,
+                                    pbkdf2_sha256__max_rounds=rounds)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hasher')
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail={'status': Status.BUSY.value})
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(self.context.verify, password, password_hash)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """Проверяет пароль; вторым элементом возвращает новый хэш, если параметры изменились."""
+        return await self._run(self.context.verify_and_update, password, password_hash)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.max_workers,
+            'in_flight': min(self.pending, self.max_workers),
+            'queue_depth': max(0, self.pending - self.max_workers),
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(rounds=PASSWORD_HASH_ROUNDS,
+                                 max_workers=PASSWORD_HASH_WORKERS,
+                                 max_queue=PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Mapping
+from fastapi import Request, Response
+from sqlalchemy import select
+from models.cities import City
+from models.projects import Category, Unit, Attribute
+from schemas.cities import CityResponse
+from schemas.projects import CategoryResponse, UnitResponse, AttributeResponse
+from utils.abstract_repository import split_page
+from utils.pagination import PageParams, decode_cursor
+
+EMPTY = MappingProxyType({})
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.split()).casefold()
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Неизменяемый снимок справочников: id -> DTO.
+
+    etag считается по содержимому, поэтому у воркеров с одинаковыми данными он совпадает.
+    """
+    version: int = 0
+    etag: str = '"0"'
+    categories: Mapping[int, CategoryResponse] = field(default_factory=lambda: EMPTY)
+    cities: Mapping[int, CityResponse] = field(default_factory=lambda: EMPTY)
+    units: Mapping[int, UnitResponse] = field(default_factory=lambda: EMPTY)
+    attributes: Mapping[int, AttributeResponse] = field(default_factory=lambda: EMPTY)
+
+    @cached_property
+    def names(self) -> dict[str, dict[str, int]]:
+        """Поиск id по названию без учета регистра: {'categories': {'дома': 1}, ...}.
+        Единицы находятся и по name, и по full_name. Считается один раз на снимок."""
+        names = {}
+        for table, _, _ in REFERENCE_TABLES:
+            lookup = names[table] = {}
+            for item in getattr(self, table).values():
+                for name in (item.name, getattr(item, 'full_name', None)):
+                    if name:
+                        lookup.setdefault(normalize_name(name), item.id)
+        return names
+
+    def has_project_references(self, projects) -> bool:
+        for project in projects:
+            if project.id_category not in self.categories or project.id_city not in self.cities:
+                return False
+            for attr in project.project_attribute:
+                if attr.id_attribute not in self.attributes or (attr.id_unit and attr.id_unit not in self.units):
+                    return False
+        return True
+
+
+REFERENCE_TABLES = (
+    ('categories', Category, CategoryResponse),
+    ('cities', City, CityResponse),
+    ('units', Unit, UnitResponse),
+    ('attributes', Attribute, AttributeResponse),
+)
+
+
+class ReferenceData:
+    """Держит текущий снимок; пересборка подменяет его одной ссылкой, читатели не видят половину."""
+
+    def __init__(self):
+        self.snapshot = ReferenceSnapshot()
+        self._lock = asyncio.Lock()
+
+    async def load(self, session) -> ReferenceSnapshot:
+        """Читает справочники в новый снимок, не подменяя текущий: так внутри транзакции
+        можно собрать документы с еще не закоммиченными названиями."""
+        tables, digest = {}, hashlib.sha256()
+        for name, model, schema in REFERENCE_TABLES:
+            query = select(model).order_by(model.id).execution_options(populate_existing=True)
+            rows = [schema.model_validate(row, from_attributes=True) for row in await session.scalars(query)]
+            tables[name] = MappingProxyType({row.id: row for row in rows})
+            digest.update(json.dumps([row.model_dump() for row in rows], ensure_ascii=False).encode())
+        return ReferenceSnapshot(version=self.snapshot.version + 1,
+                                 etag=f'"{digest.hexdigest()[:32]}"',
+                                 **tables)
+
+    async def rebuild(self, session) -> ReferenceSnapshot:
+        # Пересборки идут по очереди, чтобы более старая не перезаписала более новую
+        async with self._lock:
+            self.snapshot = await self.load(session)
+            return self.snapshot
+
+    async def ensure(self, session, projects) -> ReferenceSnapshot:
+        """Снимок, в котором есть все справочники проектов; при промахе (запись в другом воркере) пересобирается."""
+        if not self.snapshot.has_project_references(projects):
+            await self.rebuild(session)
+        return self.snapshot
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {'version': snapshot.version, 'etag': snapshot.etag,
+                **{name: len(getattr(snapshot, name)) for name, _, _ in REFERENCE_TABLES}}
+
+
+def paginate_items(items, page: PageParams, **filter):
+    """Фильтр на равенство и keyset-страница по списку DTO, как AsyncIREpository.paginate по таблице."""
+    items = [item for item in items if all(getattr(item, k) == v for k, v in filter.items())]
+    if page.sort == 'id':
+        key = lambda item: item.id
+    else:
+        key = lambda item: (getattr(item, page.sort), item.id)
+    items.sort(key=key)
+    if page.cursor:
+        value, last_id = decode_cursor(page.cursor, page.sort)
+        items = items[bisect_right(items, last_id if page.sort == 'id' else (value, last_id), key=key):]
+    return split_page(items[:page.limit + 1], page)
+
+
+def row_etag(item) -> str:
+    """ETag одной записи по ее содержимому, для записи, прочитанной из базы мимо снимка."""
+    digest = hashlib.sha256(json.dumps(item.model_dump(), ensure_ascii=False).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def check_reference_etag(request: Request, response: Response, table: str | None = None,
+                         item=None) -> Response | None:
+    """Ставит ETag текущего снимка; если у клиента он уже есть, возвращает ответ 304.
+
+    Для одной записи (table, item) ETag снимка годится, только если запись взята из него.
+    Запись из базы (в снимок еще не попала) сверяется по своему ETag, иначе устаревший
+    снимок ответил бы 304 на данные, которых в нем нет.
+    """
+    snapshot = reference_data.snapshot
+    etag = snapshot.etag
+    if item is not None and getattr(snapshot, table).get(item.id) is not item:
+        etag = row_etag(item)
+    response.headers['etag'] = etag
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        if '*' in tags or etag in tags:
+            return Response(status_code=304, headers={'etag': etag})
+    return None
+
+
+reference_data = ReferenceData()
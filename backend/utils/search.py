@@ -0,0 +1,156 @@
+import html
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+# Вес совпадения в поле: название важнее описания
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'city': 2.0, 'attributes': 1.0, 'description': 1.0}
+# Слово запроса как начало более длинного слова: "кирпич" -> "кирпичный"
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_TERMS = 50
+SNIPPET_LENGTH = 200
+K1, B = 1.2, 0.75
+
+WORD = re.compile(r'\w+')
+
+
+def tokenize(text: str | None) -> list[str]:
+    return WORD.findall((text or '').lower().replace('ё', 'е'))
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    id: int
+    name: str
+    description: str
+    terms: tuple[str, ...]
+    length: float
+
+
+class SearchIndex:
+    """Инвертированный индекс для ранжированного поиска по проектам (BM25 по взвешенным полям).
+
+    Как и индекс фасетов, живет в памяти процесса, строится при старте и
+    обновляется ProjectService при записи, поэтому одинаково работает на
+    MySQL и на SQLite. Все слова запроса должны найтись в проекте.
+    """
+
+    def __init__(self):
+        self.documents: dict[int, SearchDocument] = {}
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self.terms: list[str] = [] # отсортированный словарь для поиска по префиксу
+        self.total_length = 0.0
+
+    @staticmethod
+    def _fields(project) -> dict[str, str]:
+        return {
+            'name': project.name,
+            'category': project.category.name if project.category else '',
+            'city': project.city.name if project.city else '',
+            'attributes': ' '.join(attr.value for attr in project.project_attribute),
+            'description': project.description,
+        }
+
+    def rebuild(self, projects):
+        self.__init__()
+        for project in projects:
+            self.update(project)
+
+    def update(self, project):
+        """Project должен быть загружен с category, city и project_attribute."""
+        self.remove(project.id)
+        frequencies = Counter()
+        for field, text in self._fields(project).items():
+            for token in tokenize(text):
+                frequencies[token] += FIELD_WEIGHTS[field]
+        for term, frequency in frequencies.items():
+            if term not in self.postings:
+                insort(self.terms, term)
+            self.postings[term][project.id] = frequency
+        length = sum(frequencies.values())
+        self.documents[project.id] = SearchDocument(id=project.id,
+                                                    name=project.name,
+                                                    description=project.description or '',
+                                                    terms=tuple(frequencies),
+                                                    length=length)
+        self.total_length += length
+
+    def remove(self, id: int):
+        document = self.documents.pop(id, None)
+        if document is None:
+            return
+        self.total_length -= document.length
+        for term in document.terms:
+            postings = self.postings[term]
+            postings.pop(id, None)
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        expanded = [(token, 1.0)] if token in self.postings else []
+        start = bisect_left(self.terms, token)
+        for term in self.terms[start:start + MAX_PREFIX_TERMS + 1]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                expanded.append((term, PREFIX_WEIGHT))
+        return expanded
+
+    def search(self, query: str) -> list[tuple[int, float]]:
+        """(id, score) всех подходящих проектов по убыванию score, при равенстве - по id."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self.documents:
+            return []
+        count = len(self.documents)
+        documents = self.documents
+        length_weight = K1 * B / (self.total_length / count or 1.0)
+        scores = None
+        for token in tokens:
+            token_scores: dict[int, float] = {}
+            for term, weight in self._expand(token):
+                postings = self.postings[term]
+                factor = weight * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)) * (K1 + 1)
+                for id, frequency in postings.items():
+                    score = factor * frequency / (frequency + K1 * (1 - B) + length_weight * documents[id].length)
+                    if score > token_scores.get(id, 0.0):
+                        token_scores[id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {id: scores[id] + token_scores[id] for id in scores.keys() & token_scores.keys()}
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def highlight(self, id: int, query: str) -> dict[str, str]:
+        """Название и фрагмент описания с совпадениями в <mark>; текст экранирован для HTML."""
+        document = self.documents.get(id)
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if document is None or not tokens:
+            return {}
+        pattern = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, tokens)) + r')\w*', re.IGNORECASE)
+        description = document.description
+        match = pattern.search(description)
+        if len(description) > SNIPPET_LENGTH:
+            start = max(0, match.start() - SNIPPET_LENGTH // 4) if match else 0
+            description = ('…' if start else '') + description[start:start + SNIPPET_LENGTH] + '…'
+        return {'name': self._mark(pattern, document.name), 'description': self._mark(pattern, description)}
+
+    @staticmethod
+    def _mark(pattern: re.Pattern, text: str) -> str:
+        parts, position = [], 0
+        for match in pattern.finditer(text):
+            parts.append(html.escape(text[position:match.start()]))
+            parts.append(f'<mark>{html.escape(match.group())}</mark>')
+            position = match.end()
+        parts.append(html.escape(text[position:]))
+        return ''.join(parts)
+
+    def stats(self) -> dict:
+        return {'projects': len(self.documents), 'terms': len(self.postings)}
+
+
+search_index = SearchIndex()
@@ -0,0 +1,108 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from utils.search import tokenize
+
+SCAN_FACTOR = 20 # сколько ключей просматривать на одну подсказку, прежде чем ранжировать
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: str
+    id: int
+    label: str
+    slug: str | None = None
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(tokenize(text))
+
+
+class SuggestIndex:
+    """Подсказки по префиксу: отсортированный массив ключей и bisect.
+
+    Ключи - название целиком и каждый его хвост с начала слова ("дом из кирпича",
+    "из кирпича", "кирпича"), а для проектов еще и slug, поэтому "кирп" находит
+    "Дом из кирпича". Запрос не ходит в БД.
+    """
+
+    def __init__(self):
+        self.keys: list[tuple[str, str, int]] = [] # (ключ, kind, id), отсортирован
+        self.items: dict[tuple[str, int], tuple[Suggestion, tuple[str, ...]]] = {}
+
+    @staticmethod
+    def _keys(label: str, slug: str | None) -> tuple[str, ...]:
+        """Первым идет название целиком."""
+        words = _normalize(label).split()
+        keys = [' '.join(words[i:]) for i in range(len(words))]
+        if slug:
+            keys.append(_normalize(slug))
+        return tuple(dict.fromkeys(keys))
+
+    def put(self, kind: str, id: int, label: str, slug: str | None = None):
+        self.discard(kind, id)
+        keys = self._keys(label, slug)
+        for key in keys:
+            insort(self.keys, (key, kind, id))
+        self.items[(kind, id)] = (Suggestion(kind=kind, id=id, label=label, slug=slug), keys)
+
+    def discard(self, kind: str, id: int):
+        item = self.items.pop((kind, id), None)
+        if item is None:
+            return
+        for key in item[1]:
+            position = bisect_left(self.keys, (key, kind, id))
+            if position < len(self.keys) and self.keys[position] == (key, kind, id):
+                del self.keys[position]
+
+    def replace_kind(self, kind: str, suggestions):
+        """Заменяет все записи одного вида: [(id, label, slug), ...]; массив сортируется один раз."""
+        items = {key: item for key, item in self.items.items() if key[0] != kind}
+        keys = [key for key in self.keys if key[1] != kind]
+        for id, label, slug in suggestions:
+            item_keys = self._keys(label, slug)
+            items[(kind, id)] = (Suggestion(kind=kind, id=id, label=label, slug=slug), item_keys)
+            keys.extend((key, kind, id) for key in item_keys)
+        keys.sort()
+        self.keys, self.items = keys, items
+
+    def suggest(self, q: str, limit: int = 10, kinds: set[str] | None = None) -> list[Suggestion]:
+        prefix = _normalize(q)
+        if not prefix:
+            return []
+        found: dict[tuple[str, int], bool] = {}
+        position = bisect_left(self.keys, (prefix,))
+        scanned = 0
+        while position < len(self.keys) and scanned < limit * SCAN_FACTOR:
+            key, kind, id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            if kinds is None or kind in kinds:
+                # Совпадение с начала названия важнее совпадения с середины
+                found[(kind, id)] = found.get((kind, id), False) or key == self.items[(kind, id)][1][0]
+            position += 1
+            scanned += 1
+        ranked = sorted(found.items(), key=lambda item: (not item[1], len(self.items[item[0]][0].label),
+                                                         self.items[item[0]][0].label))
+        return [self.items[key][0] for key, _ in ranked[:limit]]
+
+    def stats(self) -> dict:
+        return {'items': len(self.items), 'keys': len(self.keys)}
+
+
+class ProjectSuggestions:
+    """Проекты в SuggestIndex через общий интерфейс индексов каталога."""
+
+    def __init__(self, index: SuggestIndex):
+        self.index = index
+
+    def rebuild(self, projects):
+        self.index.replace_kind('project', [(project.id, project.name, project.slug) for project in projects])
+
+    def update(self, project):
+        self.index.put('project', project.id, project.name, project.slug)
+
+    def remove(self, id: int):
+        self.index.discard('project', id)
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,50 @@
+from contextlib import asynccontextmanager
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+AFTER_COMMIT_KEY = 'after_commit' # session.info: корутины, которые выполнятся после commit внешней операции
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession):
+    """Одна транзакция на операцию сервиса: репозитории только выполняют запросы,
+    commit делается один раз в конце, при исключении - rollback.
+
+    Вложенная операция (сервис вызывает сервис) работает в транзакции внешней и
+    сама не коммитит. Откатить часть операции, не теряя остальное, можно
+    через session.begin_nested() (SAVEPOINT).
+    """
+    depth = session.info.get('unit_of_work_depth', 0)
+    session.info['unit_of_work_depth'] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            await session.commit()
+    except BaseException:
+        if depth == 0:
+            await session.rollback()
+        raise
+    finally:
+        session.info['unit_of_work_depth'] = depth
+    if depth == 0:
+        for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+            await callback()
+
+
+async def after_commit(session: AsyncSession, callback):
+    """Внутри операции откладывает callback() до commit самой внешней, при rollback он
+    отбрасывается; вне операции транзакция уже закрыта, и callback выполняется сразу.
+
+    Так обновляется то, что живет вне базы (индексы в памяти): вложенная операция
+    не должна показывать изменения, которые внешняя еще может откатить.
+    """
+    if session.info.get('unit_of_work_depth'):
+        session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+    else:
+        await callback()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_after_commit(session):
+    session.info.pop(AFTER_COMMIT_KEY, None)
@@ -0,0 +1,21 @@
+import re
+
+NUMBER = re.compile(r'[-+]?\d+(?:\.\d+)?')
+
+
+def parse_number(value: str | None) -> float | None:
+    """'1 200,5' -> 1200.5; строки, которые не являются числом целиком, дают None."""
+    if value is None:
+        return None
+    value = re.sub(r'[\s ]', '', value).replace(',', '.')
+    if not NUMBER.fullmatch(value):
+        return None
+    return float(value)
+
+
+def normalize_value(value: str | None, factor: float | None) -> float | None:
+    """Числовое значение атрибута в базовой единице: значение * units.factor."""
+    number = parse_number(value)
+    if number is None:
+        return None
+    return number * (factor if factor is not None else 1)